@@ -1,15 +1,19 @@
-from flask import Flask, request, jsonify, send_file
+from io import BytesIO
+from app.journal import AssignmentJournal
+from app.pdf import PdfRenderer
 from app.render import ScheduleRenderer
 from core.schedule import Schedule
 from core.roster import Roster
 from core.stats import AssignmentStats
 from core.history import AssignmentHistory
+from core.task.date_task import format_keys, parse_keys
+from core.validation import ConstraintIndex
 from util import assignments_from_html
 from logging.config import dictConfig
 from logging import info
 import json
 import os
-import pdfkit
+from time import perf_counter
 
 from util.helpers import write_dict_to_file
 
@@ -23,7 +27,10 @@ def create_app(
     history: AssignmentHistory,
     stats: AssignmentStats,
     **options,
-) -> Flask:
+) -> "Flask":
+    # imported here so the core classes and app.render load without flask,
+    # e.g. run.py -n only renders html
+    from flask import Flask, request, jsonify, send_file, make_response
 
     initialize_logger()
 
@@ -34,6 +41,35 @@ def create_app(
     # TODO blueprints
     # TODO Move to views
     renderer = ScheduleRenderer(schedule, roster, stats)
+    pdf_renderer = PdfRenderer(
+        renderer,
+        html_path=app.config.get("HTML_OUTPUT_PATH"),
+        pdf_path=app.config.get("PDF_OUTPUT_PATH"),
+    )
+
+    # edits since the json output was last written, see PATCH /assignments.
+    # Without a json output or journal path edits are only kept in memory
+    json_output_path = app.config.get("JSON_OUTPUT_PATH")
+    journal_path = app.config.get("JOURNAL_PATH") or (
+        json_output_path and os.path.splitext(json_output_path)[0] + ".journal.jsonl"
+    )
+    journal = AssignmentJournal(journal_path) if journal_path else None
+
+    def compact_journal():
+        """write the whole schedule to the json output and start a new journal"""
+        if json_output_path:
+            write_dict_to_file(format_keys(schedule.assignments), json_output_path)
+        if journal:
+            journal.compact()
+
+    # pick up edits made before the server last stopped
+    changes = journal.replay() if journal else {}
+    if changes:
+        schedule.update_assignments(changes)
+        compact_journal()
+
+    # the solver's hard constraints, to check edits as they are made
+    constraints = ConstraintIndex(schedule, roster, history)
 
     @app.put("/commit")
     def commit():
@@ -46,45 +82,50 @@ def create_app(
 
         if os.path.exists(app.config["TMP_WORKING_PATH"]):
             with open(app.config["TMP_WORKING_PATH"], "r") as f:
-                assignments = json.loads(f.read())
+                assignments = parse_keys(json.loads(f.read()))
 
                 if assignments != schedule.assignments:
                     history.remove_assignments(assignments)
+                    stats.remove_assignments(assignments)
                 else:
                     return jsonify({"message": "success"}), 304
 
-        # update json
+        # update json, then the stats (a DecayedStats saves its counters
+        # against the history's new version), as core/batch.py does
         history.record_assignments(schedule.assignments)
+        stats.record_assignments(schedule.assignments)
 
         # write new assignments to tmp working dir
-        write_dict_to_file(schedule.assignments, app.config["TMP_WORKING_PATH"])
+        write_dict_to_file(
+            format_keys(schedule.assignments), app.config["TMP_WORKING_PATH"]
+        )
+        compact_journal()
 
         return jsonify({"message": "success"}), 200
 
     @app.get("/pdf")
     def download_pdf():
+        """
+        the pdf is converted in the background and cached by the same hash as
+        the html pages, requests while it converts share the conversion and
+        an unchanged schedule is served from the cache (or a 304)
+        """
         pdf_output_filename = f"schedule-{schedule.month}-{schedule.year}.pdf"
-        html = renderer.render_schedule_to_html(interactive=False)
-
-        with open(app.config["HTML_OUTPUT_PATH"], "w+") as f:
-            f.write(html)
-
-        pdfkit.from_file(
-            app.config["HTML_OUTPUT_PATH"],
-            app.config["PDF_OUTPUT_PATH"],
-            options={
-                "orientation": "Landscape",
-                "page-size": "Legal",
-                "enable-local-file-access": "",
-            },
-        )
+        etag = pdf_renderer.cache_key()
+        if etag in request.if_none_match:
+            response = make_response("", 304)
+        else:
+            etag, future = pdf_renderer.submit()
+            response = send_file(
+                BytesIO(future.result()),
+                mimetype="application/pdf",
+                download_name=pdf_output_filename,
+                as_attachment=True,
+            )
 
-        return send_file(
-            app.config["PDF_OUTPUT_PATH"],
-            mimetype="application/pdf",
-            download_name=pdf_output_filename,
-            as_attachment=True,
-        )
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     @app.post("/save")
     def save():
@@ -93,25 +134,137 @@ def create_app(
 
         write json assignments to json output so we don't lose work if
         server crashes, run script will read from there
-        TODO instead of sending the entire html page, send json schedule format
+
+        schedule.js sends only the changes to PATCH /assignments, this is
+        kept for pages rendered before it did
         """
         new_schedule_html = request.data.decode("utf-8")
         new_assignments = assignments_from_html(new_schedule_html)
 
-        # set new assignments
+        # set new assignments, the cells that changed are hand edits
+        edits = {
+            date_task: person
+            for date_task, person in parse_keys(new_assignments).items()
+            if schedule.assignments.get(date_task) != person
+        }
         schedule.set_assignments(new_assignments)
+        constraints.apply(new_assignments)
+        if edits and journal:
+            journal.append(edits)
 
         # json output
-        write_dict_to_file(schedule.assignments, app.config["JSON_OUTPUT_PATH"])
+        compact_journal()
 
         return jsonify({"message": "success"}), 204
 
+    @app.patch("/assignments")
+    def update_assignments():
+        """
+        apply a json object of changed date_task -> person pairs
+
+        changes are checked against the solver's hard constraints, applied to
+        the schedule in place and appended to the journal, all or none
+        """
+        changes = request.get_json(silent=True)
+        if not isinstance(changes, dict) or not changes:
+            return (
+                jsonify({"message": "expected a json object of date_task -> person"}),
+                400,
+            )
+
+        violations = constraints.check(changes)
+        if violations:
+            return (
+                jsonify(
+                    {
+                        "message": "invalid assignments",
+                        "errors": format_keys(violations),
+                    }
+                ),
+                400,
+            )
+
+        schedule.update_assignments(changes)
+        constraints.apply(changes)
+        if journal:
+            journal.append(changes)
+
+        return jsonify({"message": "success"}), 200
+
+    @app.post("/repair")
+    def repair_schedule():
+        """
+        re-solve the cells that were not edited by hand, see core/repair.py
+
+        an optional json object {"weeks": k} only re-solves the cells within k
+        weeks of an edit. 409 when no schedule keeps the edits
+        """
+        body = request.get_json(silent=True) or {}
+        weeks = body.get("weeks") if isinstance(body, dict) else None
+        if weeks is not None and (not isinstance(weeks, int) or weeks < 0):
+            return jsonify({"message": "weeks must be a whole number"}), 400
+
+        from core.repair import repair
+
+        start = perf_counter()
+        try:
+            changes = repair(
+                schedule,
+                roster,
+                history,
+                journal.edits() if journal else {},
+                weeks=weeks,
+                stats=stats,
+            )
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 409
+
+        constraints.apply(changes)
+        compact_journal()
+
+        return (
+            jsonify(
+                {
+                    "message": "success",
+                    "changes": format_keys(changes),
+                    "seconds": round(perf_counter() - start, 3),
+                }
+            ),
+            200,
+        )
+
+    @app.post("/validate")
+    def validate():
+        """
+        check a proposed move, a json object of date_task -> person, against
+        eligibility, exclusions and the consecutive-week rule without applying it
+        """
+        changes = request.get_json(silent=True)
+        if not isinstance(changes, dict):
+            return (
+                jsonify({"message": "expected a json object of date_task -> person"}),
+                400,
+            )
+
+        violations = constraints.check(changes)
+        return jsonify({"valid": not violations, "violations": format_keys(violations)})
+
     @app.get("/")
     def get_schedule():
-        # TODO cache using hash of assignment dict to key?
-        schedule_html = renderer.render_schedule_to_html()
+        """
+        rendered pages are cached by a hash of the assignments, roster and
+        stats, which doubles as an ETag so an unchanged page is a 304
+        """
+        etag = renderer.cache_key()
+        if etag in request.if_none_match:
+            response = make_response("", 304)
+        else:
+            response = make_response(renderer.render_schedule_to_html())
 
-        return schedule_html
+        response.set_etag(etag)
+        # always revalidate, the schedule changes under the same url
+        response.headers["Cache-Control"] = "no-cache"
+        return response
 
     return app
 
@@ -0,0 +1,65 @@
+import json
+import os
+
+from core.task.date_task import format_keys, parse_keys
+
+
+class AssignmentJournal:
+    """
+    Append-only log of hand edits to a schedule, one json object of
+    date_task -> person changes per line
+
+    Edits are appended instead of rewriting the schedule's json output, the
+    json output plus the journal replayed in order is the current schedule.
+    Once the json output is rewritten compact() folds the journal into the
+    edits file, which keeps every cell edited since the schedule was solved
+    (see core/repair.py) until clear()
+    """
+
+    def __init__(self, path, edits_path=None):
+        self.path = path
+        self.edits_path = edits_path or os.path.splitext(path)[0] + ".edits.json"
+
+    def append(self, changes):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(format_keys(changes), sort_keys=True) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def replay(self):
+        """DateTask -> person changes in the journal, later edits win"""
+        changes = {}
+        if not os.path.exists(self.path):
+            return changes
+
+        with open(self.path, "r") as f:
+            for line in f:
+                # a partly written last line from a crash is ignored
+                try:
+                    changes.update(parse_keys(json.loads(line)))
+                except ValueError:
+                    continue
+        return changes
+
+    def edits(self):
+        """DateTask -> person of every cell edited since the journal was cleared"""
+        edits = {}
+        if os.path.exists(self.edits_path):
+            with open(self.edits_path, "r") as f:
+                edits = parse_keys(json.load(f))
+        edits.update(self.replay())
+        return edits
+
+    def compact(self):
+        """fold the journal into the edits file, the json output has its changes"""
+        edits = self.edits()
+        with open(self.edits_path, "w") as f:
+            json.dump(format_keys(edits), f, indent=4, sort_keys=True)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def clear(self):
+        """forget every edit, e.g. the schedule was solved again"""
+        for path in (self.path, self.edits_path):
+            if os.path.exists(path):
+                os.remove(path)
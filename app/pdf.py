@@ -0,0 +1,89 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app.render import ScheduleRenderer
+
+PDF_OPTIONS = {
+    "orientation": "Landscape",
+    "page-size": "Legal",
+    "enable-local-file-access": "",
+}
+
+# converted pdfs kept per renderer, older ones are dropped first
+MAX_CACHED_PDFS = 4
+
+
+def html_to_pdf(html):
+    """pdf bytes of an html string, wkhtmltopdf reads it from stdin"""
+    import pdfkit
+
+    return pdfkit.from_string(html, False, options=PDF_OPTIONS)
+
+
+class PdfRenderer:
+    """
+    PDFs of a schedule, converted from the rendered html in a background
+    thread and cached by the same cache_key as the html
+
+    Requests for a schedule that is already being converted wait on the same
+    conversion, an unchanged schedule is served from the cache. Conversions
+    run one at a time, wkhtmltopdf is a process per pdf
+
+    html_path, pdf_path: also write the html and pdf there once converted
+    """
+
+    def __init__(
+        self,
+        renderer: ScheduleRenderer,
+        html_path=None,
+        pdf_path=None,
+        convert=html_to_pdf,
+    ):
+        self.renderer = renderer
+        self.html_path = html_path
+        self.pdf_path = pdf_path
+        self.convert = convert
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+        self.lock = threading.Lock()
+        # cache_key -> Future of the pdf bytes
+        self.futures = {}
+
+    def cache_key(self):
+        return self.renderer.cache_key(interactive=False)
+
+    def submit(self):
+        """
+        (cache_key, Future of the pdf bytes) of the current schedule, a
+        conversion is only started when there is none for it yet or the last
+        one failed
+        """
+        with self.lock:
+            key = self.cache_key()
+            future = self.futures.get(key)
+            if future is None or (future.done() and future.exception() is not None):
+                html = self.renderer.render_schedule_to_html(interactive=False)
+                future = self.executor.submit(self.render, html)
+
+                self.futures.pop(key, None)
+                if len(self.futures) >= MAX_CACHED_PDFS:
+                    del self.futures[next(iter(self.futures))]
+                self.futures[key] = future
+
+            return key, future
+
+    def pdf(self, timeout=None):
+        """pdf bytes of the current schedule, waits for the conversion"""
+        return self.submit()[1].result(timeout)
+
+    def render(self, html):
+        pdf = self.convert(html)
+
+        if self.html_path:
+            with open(self.html_path, "w") as f:
+                f.write(html)
+        if self.pdf_path:
+            with open(self.pdf_path, "wb") as f:
+                f.write(pdf)
+
+        return pdf
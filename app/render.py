@@ -1,4 +1,6 @@
 import calendar
+import hashlib
+import os
 
 from core.roster import Roster
 from core.stats import AssignmentStats
@@ -6,11 +8,30 @@ from core.stats import AssignmentStats
 calendar.setfirstweekday(calendar.SUNDAY)
 
 from core.schedule import Schedule
+from core.task import DateTask
 from util import *
 
 EMPTY_HEADER_CELL = "<th class='empty'></th>"
 EMPTY_DATA_CELL = "<td class='empty'></td>"
 
+STYLE_PATH = "app/static/style.css"
+
+# rendered pages kept per renderer, one per (assignments, interactive) is
+# plenty, older pages are dropped first
+MAX_CACHED_PAGES = 8
+
+# (mtime, css) of STYLE_PATH, re-read only when the file changes
+_style = (None, "")
+
+
+def read_style():
+    global _style
+    mtime = os.path.getmtime(STYLE_PATH)
+    if _style[0] != mtime:
+        with open(STYLE_PATH, "r") as f:
+            _style = (mtime, f.read())
+    return _style[1]
+
 
 def count_day_of_week_in_month(calendar, day_of_week):
     count = 0
@@ -27,6 +48,50 @@ class ScheduleRenderer:
         self.roster = roster
         self.stats = stats
 
+        # whole pages by cache_key(), and fragments (rows, headers, datalists)
+        # that stay valid until the month, roster or stats change
+        self.page_cache = {}
+        self.fragment_cache = {}
+        self.fragment_version = None
+
+    def cache_key(self, interactive=True):
+        """
+        content hash of everything a rendered page depends on, also used as the
+        page's ETag
+        """
+        return hashlib.sha1(
+            repr(
+                (
+                    interactive,
+                    self.schedule.year,
+                    self.schedule.month,
+                    self.schedule.assignments_hash,
+                    self.roster.version,
+                    self.stats.version,
+                    os.path.getmtime(STYLE_PATH),
+                )
+            ).encode()
+        ).hexdigest()
+
+    def cached_fragment(self, key, render):
+        """
+        render() once per key, fragments are dropped when the month, roster or
+        stats change, anything else a fragment depends on must be in its key
+        """
+        version = (
+            self.schedule.year,
+            self.schedule.month,
+            self.roster.version,
+            self.stats.version,
+        )
+        if version != self.fragment_version:
+            self.fragment_cache = {}
+            self.fragment_version = version
+
+        if key not in self.fragment_cache:
+            self.fragment_cache[key] = render()
+        return self.fragment_cache[key]
+
     def render_schedule_to_html(
         self,
         interactive=True,
@@ -39,6 +104,14 @@ class ScheduleRenderer:
 
             Could color-code
         """
+        key = self.cache_key(interactive)
+        if key not in self.page_cache:
+            if len(self.page_cache) >= MAX_CACHED_PAGES:
+                del self.page_cache[next(iter(self.page_cache))]
+            self.page_cache[key] = self.render_page(interactive)
+        return self.page_cache[key]
+
+    def render_page(self, interactive):
 
         # assumes sunday, wednesday only
         self.num_services = max(
@@ -48,8 +121,7 @@ class ScheduleRenderer:
 
         service_names = self.schedule.service_names
 
-        with open("app/static/style.css", "r") as f:
-            style = f.read()
+        style = read_style()
 
         # TODO jinja template for this?
         # Clean-up non-interactive logic, something about link and script tags,
@@ -98,6 +170,12 @@ class ScheduleRenderer:
         """
 
     def render_service_header_row(self, service_name, day_of_week):
+        return self.cached_fragment(
+            ("header", service_name, day_of_week),
+            lambda: self.render_uncached_service_header_row(service_name, day_of_week),
+        )
+
+    def render_uncached_service_header_row(self, service_name, day_of_week):
         # if no services this week, leave out of schedule
         dates = [
             (
@@ -137,11 +215,21 @@ class ScheduleRenderer:
                     self.render_assignment_input(
                         trimmed_duty,
                         self.schedule.service_assignments[service][
-                            f"{self.schedule.year}-{self.schedule.month}-{week[day_of_week]}-{trimmed_duty}"
+                            DateTask(
+                                self.schedule.year,
+                                self.schedule.month,
+                                week[day_of_week],
+                                trimmed_duty,
+                            )
                         ],
                         week[day_of_week],
                     )
-                    if f"{self.schedule.year}-{self.schedule.month}-{week[day_of_week]}-{trimmed_duty}"
+                    if DateTask(
+                        self.schedule.year,
+                        self.schedule.month,
+                        week[day_of_week],
+                        trimmed_duty,
+                    )
                     in self.schedule.service_assignments[service]
                     and week[day_of_week] != 0
                     else """<td class="empty-duty-cell"></td>"""
@@ -153,6 +241,25 @@ class ScheduleRenderer:
         return EMPTY_DATA_CELL.join(assignments)
 
     def render_duty_row(self, service, trimmed_duty, day_of_week):
+        # a row only changes when one of its assignees does
+        assignees = tuple(
+            self.schedule.service_assignments[service].get(
+                DateTask(
+                    self.schedule.year,
+                    self.schedule.month,
+                    week[day_of_week],
+                    trimmed_duty,
+                )
+            )
+            for week in self.schedule.calendar
+            if week[day_of_week]
+        )
+        return self.cached_fragment(
+            ("row", service, trimmed_duty, day_of_week, assignees),
+            lambda: self.render_uncached_duty_row(service, trimmed_duty, day_of_week),
+        )
+
+    def render_uncached_duty_row(self, service, trimmed_duty, day_of_week):
         padding = ""
 
         return f"""
@@ -167,7 +274,7 @@ class ScheduleRenderer:
     def render_duty_assignment_rows(self, service, day_of_week):
         trimmed_duty_names = dict.fromkeys(
             [
-                trim_task_name(duty)
+                duty.task_key
                 for duty in self.schedule.service_assignments[service].keys()
             ]
         )
@@ -225,9 +332,9 @@ class ScheduleRenderer:
         assignments = [
             (
                 f"""
-                {self.render_assignment_input(trimmed_duty, service_assignments[f'{self.schedule.year}-{self.schedule.month}-{i}-{trimmed_duty}'], i)}
+                {self.render_assignment_input(trimmed_duty, service_assignments[DateTask(self.schedule.year, self.schedule.month, i, trimmed_duty)], i)}
                 """
-                if f"{self.schedule.year}-{self.schedule.month}-{i}-{trimmed_duty}"
+                if DateTask(self.schedule.year, self.schedule.month, i, trimmed_duty)
                 in service_assignments
                 else ""
             )
@@ -237,6 +344,19 @@ class ScheduleRenderer:
         return EMPTY_DATA_CELL.join([a for a in assignments if a])
 
     def render_weekly_duty_row(self, trimmed_duty):
+        service_assignments = self.schedule.service_assignments["weekly"]
+        assignees = tuple(
+            service_assignments.get(
+                DateTask(self.schedule.year, self.schedule.month, i, trimmed_duty)
+            )
+            for i in self.schedule.first_calendar_days_for_each_week
+        )
+        return self.cached_fragment(
+            ("weekly", trimmed_duty, assignees),
+            lambda: self.render_uncached_weekly_duty_row(trimmed_duty),
+        )
+
+    def render_uncached_weekly_duty_row(self, trimmed_duty):
         padding = ""
 
         return f"""
@@ -251,7 +371,7 @@ class ScheduleRenderer:
     def render_weekly_duty_assignment_rows(self):
         trimmed_duty_names = dict.fromkeys(
             [
-                trim_task_name(duty)
+                duty.task_key
                 for duty in self.schedule.service_assignments["weekly"].keys()
             ]
         )
@@ -276,7 +396,7 @@ class ScheduleRenderer:
                 [
                     f"""
                         <tr>
-                            <td class="monthly">{self.schedule.duty_names[duty]}</td>
+                            <td class="monthly">{self.schedule.duty_names[duty.task_key]}</td>
                             <td class="assignment">{assignee}</td>
                         </tr>"""
                     for duty, assignee in self.schedule.service_assignments[
@@ -297,20 +417,22 @@ class ScheduleRenderer:
         """
 
     def render_data_lists(self):
-        # ordered by DECREASING assignment_delta
-        lists = []
-        for task in self.roster.task_keys:
-            eligible = set(self.roster.get_eligible(task))
-            delta_sort = sorted(
-                [
-                    item
-                    for item in self.stats.assignment_delta[task].items()
-                    if item[0] in eligible
-                ],
-                key=lambda item: item[1],
-            )
-            lists.append(
-                f'\n<datalist id="{task}">\n{"\n".join([f'<option value="{k}"></option>' for k,v in delta_sort])}\n</datalist>'
+        return "\n".join(
+            self.cached_fragment(
+                ("datalist", task), lambda: self.render_data_list(task)
             )
+            for task in self.roster.task_keys
+        )
 
-        return "\n".join(lists)
+    def render_data_list(self, task):
+        # ordered by DECREASING assignment_delta
+        eligible = set(self.roster.get_eligible(task))
+        delta_sort = sorted(
+            [
+                item
+                for item in self.stats.assignment_delta[task].items()
+                if item[0] in eligible
+            ],
+            key=lambda item: item[1],
+        )
+        return f'\n<datalist id="{task}">\n{"\n".join([f'<option value="{k}"></option>' for k,v in delta_sort])}\n</datalist>'
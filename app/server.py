@@ -0,0 +1,289 @@
+import calendar
+import itertools
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import Flask, jsonify, redirect
+from pulp import LpSolutionIntegerFeasible, LpSolutionOptimal, LpStatus
+
+import app as schedule_app
+from app.journal import AssignmentJournal
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.solver import SchedulingProblem
+from core.stats import AssignmentStats
+from core.task.date_task import format_keys
+from util.data import data_version, file_version
+from util.helpers import write_dict_to_file
+
+SCHEDULE_PATH = re.compile(r"^/schedules/(\d{4})/(\d{1,2})(/.*)?$")
+
+
+class ScheduleServer:
+    """
+    WSGI app serving every month's schedule from one process
+
+    /schedules/<year>/<month>/ is that month's create_app, created from its
+    saved json output the first time it is requested. Roster, history and
+    stats are loaded once and shared by every month, a commit updates them
+    in place. They are reloaded (and the months recreated from their json
+    output and journal) when a data csv changes or something else writes the
+    save file
+
+    Months that have not been solved are solved in a background queue, one
+    at a time, POST /schedules/<year>/<month>/solve and poll GET /jobs/<id>
+
+    output_dir, prefix: each month is written to
+    <output_dir>/output/{json,html}/<prefix>-<month>-<year>, as run.py -n does
+
+    solver_options and backend: see SchedulingProblem.solve and
+    SchedulingProblem
+
+    create_stats(roster, history): the shared stats, e.g. a DecayedStats
+    """
+
+    def __init__(
+        self,
+        save_file,
+        output_dir,
+        prefix,
+        solver_options=None,
+        backend="pulp",
+        create_stats=AssignmentStats,
+    ):
+        self.save_file = save_file
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.solver_options = solver_options or {}
+        self.backend = backend
+        self.create_stats = create_stats
+
+        self.json_dir = f"{output_dir}/output/json"
+        self.html_dir = f"{output_dir}/output/html"
+        os.makedirs(self.json_dir, exist_ok=True)
+        os.makedirs(self.html_dir, exist_ok=True)
+
+        # guards the shared data and months against a reload or a finished solve
+        self.lock = threading.RLock()
+        self.data_version = None
+        self.months = {}
+        self.load_data()
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="solve")
+        self.job_ids = itertools.count(1)
+        self.jobs = {}
+
+        self.index = self.create_index()
+
+    def current_data_version(self):
+        return data_version(), file_version(self.save_file)
+
+    def load_data(self):
+        with self.lock:
+            self.data_version = self.current_data_version()
+            # csvs that did not change are not parsed again, see util/data.py
+            self.roster = Roster()
+            self.history = AssignmentHistory(self.save_file)
+            self.stats = self.create_stats(self.roster, self.history)
+            self.months = {}
+
+    def reload_if_changed(self):
+        if self.current_data_version() != self.data_version:
+            self.load_data()
+
+    def committed(self):
+        """
+        a month app's PUT /commit updated the shared history and stats in
+        place, its write to the save file is not a change to reload for
+        """
+        with self.lock:
+            self.data_version = self.data_version[0], file_version(self.save_file)
+
+    def paths(self, year, month):
+        stem = f"{self.prefix}-{month}-{year}"
+        return {
+            "HTML_OUTPUT_PATH": f"{self.html_dir}/{stem}.html",
+            "PDF_OUTPUT_PATH": f"{self.output_dir}/{stem}.pdf",
+            "JSON_OUTPUT_PATH": f"{self.json_dir}/{stem}.json",
+            "JOURNAL_PATH": f"{self.json_dir}/{stem}.journal.jsonl",
+            "TMP_WORKING_PATH": f"/tmp/{stem}.json",
+        }
+
+    def saved_months(self):
+        """(year, month) of every month with a json output, oldest first"""
+        pattern = re.compile(rf"^{re.escape(self.prefix)}-(\d{{1,2}})-(\d{{4}})\.json$")
+        months = []
+        for path in os.listdir(self.json_dir):
+            match = pattern.match(path)
+            if match:
+                months.append((int(match.group(2)), int(match.group(1))))
+        return sorted(months)
+
+    def month_app(self, year, month):
+        """the month's flask app, None when it has not been solved"""
+        with self.lock:
+            if (year, month) not in self.months:
+                options = self.paths(year, month)
+                if not os.path.exists(options["JSON_OUTPUT_PATH"]):
+                    return None
+
+                schedule = Schedule(year, month)
+                with open(options["JSON_OUTPUT_PATH"], "r") as f:
+                    schedule.set_assignments(json.load(f))
+
+                self.months[(year, month)] = schedule_app.create_app(
+                    schedule, self.roster, self.history, self.stats, options=options
+                )
+            return self.months[(year, month)]
+
+    def submit(self, year, month):
+        """queue a solve of the month, a queued or running solve is reused"""
+        # requests are served on separate threads, two posts must not both
+        # queue the month
+        with self.lock:
+            for job in self.jobs.values():
+                if (job["year"], job["month"]) == (year, month) and job["status"] in (
+                    "queued",
+                    "running",
+                ):
+                    return dict(job)
+
+            job = {
+                "id": next(self.job_ids),
+                "year": year,
+                "month": month,
+                "status": "queued",
+                "submitted": datetime.now().isoformat(timespec="seconds"),
+            }
+            self.jobs[job["id"]] = job
+            self.executor.submit(self.run_job, job)
+            return dict(job)
+
+    def update_job(self, job, **changes):
+        with self.lock:
+            job.update(changes)
+
+    def run_job(self, job):
+        self.update_job(
+            job, status="running", started=datetime.now().isoformat(timespec="seconds")
+        )
+        try:
+            solve_seconds = round(self.solve(job["year"], job["month"]), 3)
+            self.update_job(job, solve_seconds=solve_seconds, status="done")
+        except Exception as e:
+            self.update_job(job, status="failed", error=str(e))
+        self.update_job(job, finished=datetime.now().isoformat(timespec="seconds"))
+
+    def job_list(self):
+        """copies of the jobs, run_job updates them from the solve thread"""
+        with self.lock:
+            return [dict(job) for job in self.jobs.values()]
+
+    def solve(self, year, month):
+        """solve the month, replacing its saved schedule and any edits to it"""
+        self.reload_if_changed()
+        with self.lock:
+            schedule = Schedule(year, month)
+            problem = SchedulingProblem(
+                schedule,
+                self.roster,
+                self.history,
+                stats=self.stats,
+                backend=self.backend,
+            )
+
+        problem.solve(**self.solver_options)
+        if problem.prob.sol_status not in (
+            LpSolutionOptimal,
+            LpSolutionIntegerFeasible,
+        ):
+            raise ValueError(f"no schedule found ({LpStatus[problem.prob.status]})")
+
+        options = self.paths(year, month)
+        with self.lock:
+            write_dict_to_file(
+                format_keys(schedule.assignments), options["JSON_OUTPUT_PATH"]
+            )
+            AssignmentJournal(options["JOURNAL_PATH"]).clear()
+            self.months.pop((year, month), None)
+
+        return problem.solve_time
+
+    def create_index(self):
+        index = Flask("Congregation Roster Server", static_folder="app/static")
+
+        @index.get("/")
+        def list_schedules():
+            links = "".join(
+                f'<li><a href="/schedules/{year}/{month}/">'
+                f"{calendar.month_name[month]} {year}</a></li>"
+                for year, month in self.saved_months()
+            )
+            return f"<!DOCTYPE html><html><body><h1>Schedules</h1><ul>{links}</ul></body></html>"
+
+        @index.post("/schedules/<int:year>/<int:month>/solve")
+        def solve_schedule(year, month):
+            if not 1 <= month <= 12:
+                return jsonify({"message": f"invalid month {month}"}), 404
+
+            job = self.submit(year, month)
+            response = jsonify(job)
+            response.status_code = 202
+            response.headers["Location"] = f"/jobs/{job['id']}"
+            return response
+
+        @index.get("/jobs")
+        def list_jobs():
+            return jsonify(self.job_list())
+
+        @index.get("/jobs/<int:job_id>")
+        def job_status(job_id):
+            job = next((job for job in self.job_list() if job["id"] == job_id), None)
+            if job is None:
+                return jsonify({"message": f"no job {job_id}"}), 404
+            return jsonify(job)
+
+        @index.get("/schedules/<int:year>/<int:month>")
+        def schedule_page(year, month):
+            # pages use relative urls for their endpoints
+            return redirect(f"/schedules/{year}/{month}/", 308)
+
+        @index.get("/schedules/<int:year>/<int:month>/", defaults={"rest": ""})
+        @index.get("/schedules/<int:year>/<int:month>/<path:rest>")
+        def unsolved_schedule(year, month, rest):
+            return (
+                jsonify(
+                    {
+                        "message": f"no schedule for {month}/{year}, "
+                        f"POST /schedules/{year}/{month}/solve to solve it"
+                    }
+                ),
+                404,
+            )
+
+        return index
+
+    def __call__(self, environ, start_response):
+        self.reload_if_changed()
+
+        match = SCHEDULE_PATH.match(environ.get("PATH_INFO", ""))
+        if match and match.group(3) and match.group(3) != "/solve":
+            year, month, rest = int(match.group(1)), int(match.group(2)), match.group(3)
+            month_app = self.month_app(year, month) if 1 <= month <= 12 else None
+            if month_app is not None:
+                prefix = f"/schedules/{year}/{month}"
+                environ["SCRIPT_NAME"] = environ.get("SCRIPT_NAME", "") + prefix
+                environ["PATH_INFO"] = rest
+                if environ.get("REQUEST_METHOD") == "PUT" and rest == "/commit":
+                    with self.lock:
+                        response = month_app(environ, start_response)
+                        self.committed()
+                    return response
+                return month_app(environ, start_response)
+
+        return self.index(environ, start_response)
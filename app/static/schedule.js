@@ -5,6 +5,10 @@ document.addEventListener("DOMContentLoaded", (event) => {
   var lastValue = "";
   var toastEl = document.getElementById("toast");
   var assignmentFreqMap = new Map();
+  // date_task -> person edits not yet sent to the server
+  var pendingChanges = {};
+  // date_task -> person as last saved on the server
+  var savedAssignments = {};
 
   function hideToast() {
     toastEl.style.opacity = "0.0";
@@ -25,7 +29,7 @@ document.addEventListener("DOMContentLoaded", (event) => {
   }
 
   async function commit() {
-    await fetch("/commit", {
+    await fetch("commit", {
       method: "PUT",
     }).then((res) => {
       if (res.status === 200 || res.status === 304) {
@@ -35,20 +39,120 @@ document.addEventListener("DOMContentLoaded", (event) => {
     showToast("Committing...");
   }
 
+  function recordChange(cell) {
+    pendingChanges[cell.getAttribute("data-duty")] =
+      cell.querySelector("input").value.trim();
+  }
+
+  function dutyCell(dateTask) {
+    return document.querySelector(`td.duty-cell[data-duty="${dateTask}"]`);
+  }
+
+  function setCellValue(cell, value) {
+    const input = cell.querySelector("input");
+    input.value = value;
+    input.setAttribute("value", value);
+    input.setAttribute("placeholder", value);
+  }
+
+  document.querySelectorAll("td.duty-cell").forEach((cell) => {
+    savedAssignments[cell.getAttribute("data-duty")] = cell
+      .querySelector("input")
+      .value.trim();
+  });
+
+  function highlightViolations(changes, violations) {
+    Object.keys(changes).forEach((dateTask) => {
+      const cell = dutyCell(dateTask);
+      if (!cell) {
+        return;
+      }
+
+      const found = violations[dateTask] || [];
+      cell.classList.toggle("constraint-violation", found.length > 0);
+      if (found.length > 0) {
+        cell.setAttribute("title", found.map((v) => v.message).join("\n"));
+      } else {
+        cell.removeAttribute("title");
+      }
+    });
+  }
+
+  // check a move against the solver's rules as soon as it is made
+  async function validateChanges(changes) {
+    await fetch("validate", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify(changes),
+    })
+      .then((res) => res.json())
+      .then((body) => {
+        highlightViolations(changes, body.violations || {});
+        if (!body.valid) {
+          showToast(
+            Object.values(body.violations)
+              .flat()
+              .map((v) => v.message)
+              .join("\n")
+          );
+        }
+      });
+  }
+
   function saveAfterDelay() {
     if (this.saveTimer) {
-      window.clearTimeout(saveTimer);
+      window.clearTimeout(this.saveTimer);
       this.saveTimer = null;
     }
 
     this.saveTimer = setTimeout(async function () {
-      await fetch("/save", {
-        method: "POST",
-        body: document.documentElement.innerHTML,
-      }).then((res) => {
-        if (res.status === 204) {
+      const changes = pendingChanges;
+      pendingChanges = {};
+      if (Object.keys(changes).length === 0) {
+        return;
+      }
+
+      await fetch("assignments", {
+        method: "PATCH",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify(changes),
+      }).then(async (res) => {
+        if (res.status === 200) {
+          Object.assign(savedAssignments, changes);
           showToast("Saved");
           updateAssignedCount();
+        } else {
+          const body = await res.json();
+          const errors = body.errors || {};
+          highlightViolations(changes, errors);
+
+          // the patch is all or none, put the rejected cells back as saved
+          // (still highlighted) and resend the others unless edited since
+          const valid = {};
+          Object.entries(changes).forEach(([dateTask, person]) => {
+            const cell = dutyCell(dateTask);
+            if (dateTask in errors) {
+              if (cell && !(dateTask in pendingChanges)) {
+                setCellValue(cell, savedAssignments[dateTask] || "");
+              }
+            } else {
+              valid[dateTask] = person;
+            }
+          });
+          if (Object.keys(errors).length > 0) {
+            pendingChanges = { ...valid, ...pendingChanges };
+            if (Object.keys(pendingChanges).length > 0) {
+              saveAfterDelay();
+            }
+          }
+          updateAssignedCount();
+
+          showToast(
+            Object.values(errors)
+              .flat()
+              .map((v) => v.message)
+              .join("\n") || body.message
+          );
         }
       });
     }, 2000);
@@ -162,6 +266,9 @@ document.addEventListener("DOMContentLoaded", (event) => {
       setupInput(dragSrcEl.querySelector("input"));
       setupInput(this.querySelector("input"));
 
+      recordChange(dragSrcEl);
+      recordChange(this);
+      validateChanges({ ...pendingChanges });
       saveAfterDelay();
     }
 
@@ -253,7 +360,7 @@ document.addEventListener("DOMContentLoaded", (event) => {
   });
 
   document.getElementById("download-pdf").onclick = async function () {
-    window.location = "/pdf";
+    window.location = "pdf";
   };
 
   document.getElementById("toggle-assignment-count").onclick =
@@ -278,6 +385,8 @@ document.addEventListener("DOMContentLoaded", (event) => {
       if (dirty) {
         // console.log("dirty blur: {}", e.target.value);
         dirty = false;
+        recordChange(e.target.closest("td.duty-cell"));
+        validateChanges({ ...pendingChanges });
         saveAfterDelay();
         clearHighlights();
       }
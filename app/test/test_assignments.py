@@ -0,0 +1,159 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date
+from unittest import mock
+
+import app
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.solver import SchedulingProblem
+from core.stats import AssignmentStats, DecayedStats
+from core.validation import validate_assignments
+
+
+class AssignmentsEndpointTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        history_file = f"{self.dir}/history.json"
+        shutil.copy("data/previous-assignments.json", history_file)
+
+        self.roster = Roster()
+        self.history = AssignmentHistory(history_file)
+        self.stats = AssignmentStats(self.roster, self.history)
+
+        self.schedule = Schedule(2025, 4)
+        self.schedule.set_assignments(
+            self.history.assignments_between(date(2025, 4, 1), date(2025, 5, 1))
+        )
+        self.options = {
+            "JSON_OUTPUT_PATH": f"{self.dir}/schedule.json",
+            "TMP_WORKING_PATH": f"{self.dir}/tmp.json",
+        }
+        self.client = self.create_client()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def create_client(self):
+        return app.create_app(
+            self.schedule, self.roster, self.history, self.stats, options=self.options
+        ).test_client()
+
+    def assignment(self, task_key):
+        date_task = self.schedule.get_date_tasks(task_key)[0]
+        return date_task, self.schedule.assignments[date_task]
+
+    def test_valid_change_is_applied_and_journaled(self):
+        date_task, person = self.assignment("song_leader")
+        other = next(
+            p
+            for p in self.roster.get_eligible("song_leader")
+            if p != person
+            and not validate_assignments(
+                {date_task: p}, self.schedule, self.roster, self.history
+            )
+        )
+
+        res = self.client.patch("/assignments", json={str(date_task): other})
+
+        assert res.status_code == 200
+        assert self.schedule.assignments[date_task] == other
+        assert os.path.exists(f"{self.dir}/schedule.journal.jsonl")
+
+        # a restarted app replays the journal into the json output
+        self.schedule.update_assignments({date_task: person})
+        self.create_client()
+        assert self.schedule.assignments[date_task] == other
+        with open(self.options["JSON_OUTPUT_PATH"]) as f:
+            assert json.load(f)[str(date_task)] == other
+        assert not os.path.exists(f"{self.dir}/schedule.journal.jsonl")
+
+    def test_repair_keeps_edits(self):
+        # a solved month, the historical months have hand edits that break rules
+        self.schedule = Schedule(2025, 5)
+        SchedulingProblem(self.schedule, self.roster, self.history).solve()
+        self.client = self.create_client()
+
+        date_task, person = self.assignment("song_leader")
+        other = next(
+            p
+            for p in self.roster.get_eligible("song_leader")
+            if p != person
+            and not validate_assignments(
+                {date_task: p}, self.schedule, self.roster, self.history
+            )
+        )
+        self.client.patch("/assignments", json={str(date_task): other})
+
+        res = self.client.post("/repair", json={"weeks": 1})
+
+        assert res.status_code == 200
+        assert self.schedule.assignments[date_task] == other
+        with open(self.options["JSON_OUTPUT_PATH"]) as f:
+            assert json.load(f)[str(date_task)] == other
+
+        # the edit stays pinned in later repairs
+        with open(f"{self.dir}/schedule.journal.edits.json") as f:
+            assert json.load(f) == {str(date_task): other}
+
+    def test_ineligible_change_is_rejected(self):
+        date_task, person = self.assignment("song_leader")
+        ineligible = next(
+            p
+            for p in self.roster.people
+            if not self.roster.is_eligible(p, "song_leader")
+        )
+
+        res = self.client.patch("/assignments", json={str(date_task): ineligible})
+
+        assert res.status_code == 400
+        assert str(date_task) in res.get_json()["errors"]
+        assert self.schedule.assignments[date_task] == person
+
+    def test_edits_without_output_paths(self):
+        # e.g. benchmarks/bench_pipeline.py, nothing is written but tmp.json
+        self.options = {"TMP_WORKING_PATH": f"{self.dir}/tmp.json"}
+        self.client = self.create_client()
+        date_task, person = self.assignment("song_leader")
+        other = next(
+            p
+            for p in self.roster.get_eligible("song_leader")
+            if p != person
+            and not validate_assignments(
+                {date_task: p}, self.schedule, self.roster, self.history
+            )
+        )
+
+        res = self.client.patch("/assignments", json={str(date_task): other})
+
+        assert res.status_code == 200
+        assert self.client.put("/commit").status_code == 200
+        assert self.schedule.assignments[date_task] == other
+        assert sorted(os.listdir(self.dir)) == ["history.json", "tmp.json"]
+
+    def test_commit_updates_decayed_stats(self):
+        self.stats = DecayedStats(self.roster, self.history)
+        self.schedule = Schedule(2025, 5)
+        SchedulingProblem(
+            self.schedule, self.roster, self.history, stats=self.stats
+        ).solve()
+        self.client = self.create_client()
+
+        assert self.client.put("/commit").status_code == 200
+
+        # the saved counters match the committed history, no rebuild
+        with mock.patch.object(
+            DecayedStats, "rebuild", side_effect=AssertionError("rebuilt")
+        ):
+            loaded = DecayedStats(self.roster, self.history)
+        assert loaded.as_of == self.stats.as_of
+        assert loaded.actual_avg.equals(self.stats.actual_avg)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import threading
+import unittest
+from datetime import date
+
+from app.pdf import PdfRenderer
+from app.render import ScheduleRenderer
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.stats import AssignmentStats
+
+
+class PdfRendererTests(unittest.TestCase):
+
+    def setUp(self):
+        roster = Roster()
+        history = AssignmentHistory("data/previous-assignments.json")
+        self.schedule = Schedule(2025, 4)
+        self.schedule.set_assignments(
+            history.assignments_between(date(2025, 4, 1), date(2025, 5, 1))
+        )
+        renderer = ScheduleRenderer(
+            self.schedule, roster, AssignmentStats(roster, history)
+        )
+
+        self.conversions = 0
+        self.converting = threading.Event()
+
+        def convert(html):
+            self.conversions += 1
+            self.converting.wait(5)
+            return html.encode()
+
+        self.pdf_renderer = PdfRenderer(renderer, convert=convert)
+
+    def test_requests_share_a_conversion(self):
+        _, first = self.pdf_renderer.submit()
+        _, second = self.pdf_renderer.submit()
+        self.converting.set()
+
+        assert first is second
+        assert first.result(5) == self.pdf_renderer.pdf(5)
+        assert self.conversions == 1
+
+    def test_changed_schedule_is_converted_again(self):
+        self.converting.set()
+        before = self.pdf_renderer.pdf(5)
+
+        first, second = self.schedule.get_date_tasks("song_leader")[:2]
+        self.schedule.update_assignments(
+            {
+                first: self.schedule.assignments[second],
+                second: self.schedule.assignments[first],
+            }
+        )
+
+        assert self.pdf_renderer.pdf(5) != before
+        assert self.conversions == 2
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from datetime import date
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.stats import AssignmentStats
+from ..render import ScheduleRenderer
+
+
+class ScheduleRendererTests(unittest.TestCase):
+
+    def setUp(self):
+        self.roster = Roster()
+        history = AssignmentHistory("data/previous-assignments.json")
+        self.stats = AssignmentStats(self.roster, history)
+
+        self.schedule = Schedule(2025, 4)
+        self.schedule.set_assignments(
+            history.assignments_between(date(2025, 4, 1), date(2025, 5, 1))
+        )
+        self.renderer = ScheduleRenderer(self.schedule, self.roster, self.stats)
+
+    def fresh_render(self):
+        return ScheduleRenderer(
+            self.schedule, self.roster, self.stats
+        ).render_schedule_to_html()
+
+    def test_cached_render_matches_fresh_render(self):
+        html = self.renderer.render_schedule_to_html()
+        assert self.renderer.render_schedule_to_html() is html
+
+        # swap two people, only their rows are rendered again
+        assignments = dict(self.schedule.assignments)
+        date_task1, date_task2 = [
+            date_task
+            for date_task in assignments
+            if date_task.task_key == "song_leader"
+        ][:2]
+        assignments[date_task1], assignments[date_task2] = (
+            assignments[date_task2],
+            assignments[date_task1],
+        )
+        etag = self.renderer.cache_key()
+        self.schedule.set_assignments(assignments)
+
+        assert self.renderer.cache_key() != etag
+        assert self.renderer.render_schedule_to_html() == self.fresh_render()
+
+    def test_stats_change_invalidates_fragments(self):
+        self.renderer.render_schedule_to_html()
+
+        next_month = Schedule(2025, 5)
+        first = next_month.get_date_tasks("song_leader")[0]
+        self.stats.record_assignments(
+            {first: self.roster.get_eligible("song_leader")[0]}
+        )
+
+        assert self.renderer.render_schedule_to_html() == self.fresh_render()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from functools import partial
+
+from werkzeug.test import Client
+
+from app.server import ScheduleServer
+from core.stats import DecayedStats
+
+
+class ScheduleServerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.save_file = f"{self.dir}/history.json"
+        shutil.copy("data/previous-assignments.json", self.save_file)
+
+        self.server = ScheduleServer(self.save_file, self.dir, "roster")
+        self.client = Client(self.server)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def wait(self, job_id):
+        for _ in range(300):
+            job = self.client.get(f"/jobs/{job_id}").get_json()
+            if job["status"] not in ("queued", "running"):
+                return job
+            time.sleep(0.1)
+        self.fail(f"job {job_id} did not finish")
+
+    def test_unsolved_month_is_solved_in_the_background(self):
+        assert self.client.get("/schedules/2025/5/").status_code == 404
+
+        res = self.client.post("/schedules/2025/5/solve")
+        assert res.status_code == 202
+        assert self.client.post("/schedules/2025/5/solve").get_json()["id"] == (
+            res.get_json()["id"]
+        )
+
+        assert self.wait(res.get_json()["id"])["status"] == "done"
+        assert os.path.exists(f"{self.dir}/output/json/roster-5-2025.json")
+
+        page = self.client.get("/schedules/2025/5/")
+        assert page.status_code == 200
+        assert b"May" in page.data
+        assert self.client.get("/schedules/2025/5").status_code == 308
+        assert b"/schedules/2025/5/" in self.client.get("/").data
+
+    def test_concurrent_submits_share_a_job(self):
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            jobs = list(pool.map(lambda _: self.server.submit(2025, 5), range(8)))
+
+        assert {job["id"] for job in jobs} == {jobs[0]["id"]}
+        assert len(self.server.job_list()) == 1
+        assert self.wait(jobs[0]["id"])["status"] == "done"
+
+    def test_stats_are_created_by_the_factory(self):
+        server = ScheduleServer(
+            self.save_file,
+            self.dir,
+            "roster",
+            create_stats=partial(DecayedStats, half_life=6),
+        )
+
+        assert isinstance(server.stats, DecayedStats)
+        assert server.stats.half_life == 6
+
+    def test_data_changes_reload_the_months(self):
+        self.client.post("/schedules/2025/5/solve")
+        self.wait(1)
+        self.client.get("/schedules/2025/5/")
+        roster = self.server.roster
+
+        os.utime(self.save_file, (time.time() + 10, time.time() + 10))
+        self.client.get("/schedules/2025/5/")
+
+        assert self.server.roster is not roster
+        assert list(self.server.months) == [(2025, 5)]
+
+    def test_commit_keeps_the_loaded_data(self):
+        # the last commit is kept in /tmp, a commit must not be a 304
+        tmp_working_path = self.server.paths(2025, 5)["TMP_WORKING_PATH"]
+        if os.path.exists(tmp_working_path):
+            os.remove(tmp_working_path)
+        self.client.post("/schedules/2025/5/solve")
+        self.wait(1)
+        month_app = self.server.month_app(2025, 5)
+        roster = self.server.roster
+
+        assert self.client.put("/schedules/2025/5/commit").status_code == 200
+        self.client.get("/schedules/2025/5/")
+
+        assert self.server.roster is roster
+        assert self.server.month_app(2025, 5) is month_app
+        assert self.server.history.assignments_between(
+            date(2025, 5, 1), date(2025, 6, 1)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+#!/opt/anaconda3/envs/roster/bin/python3
+# coding: utf-8
+"""
+Time SchedulingProblem model construction on the data/ csvs
+
+    python -m benchmarks.bench_model_build [year month [repeat]]
+"""
+
+import statistics
+import sys
+import time
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.solver import SchedulingProblem
+from core.stats import AssignmentStats
+
+
+def run(year, month, repeat):
+    roster = Roster()
+    history = AssignmentHistory("data/previous-assignments.json")
+    stats = AssignmentStats(roster, history)
+
+    build_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        problem = SchedulingProblem(Schedule(year, month), roster, history, stats=stats)
+        build_times.append(time.perf_counter() - start)
+
+    print(
+        f"{month}/{year}: {len(problem.x)} variables, "
+        f"{len(problem.prob.constraints)} constraints"
+    )
+    print(
+        f"model build: median {statistics.median(build_times):.3f}s "
+        f"min {min(build_times):.3f}s over {repeat} runs"
+    )
+
+
+if __name__ == "__main__":
+    year, month = (
+        (int(arg) for arg in sys.argv[1:3]) if len(sys.argv) > 2 else (2025, 5)
+    )
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 5
+    run(year, month, repeat)
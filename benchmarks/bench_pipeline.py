@@ -0,0 +1,249 @@
+#!/opt/anaconda3/envs/roster/bin/python3
+# coding: utf-8
+"""
+Time the whole pipeline (load, stats, model build, solve, render, commit) on
+synthetic congregations of increasing size, see benchmarks/synthetic.py
+
+    python -m benchmarks.bench_pipeline [people:duties:years ...]
+        [--year 2026 --month 1] [--compare benchmarks/results/<commit>.json]
+
+Each scale is generated into its own temporary workspace (data/ plus a link
+to app/) and run in a subprocess with that workspace as its working
+directory, the core classes read data/ relative to it. Results are written
+to benchmarks/results/<commit>.json so runs on different commits can be
+compared with --compare
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import date
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO, "benchmarks", "results")
+
+DEFAULT_SCALES = ["44:22:1", "100:30:3", "200:44:5"]
+
+# top level phases reported in the summary table
+SUMMARY_PHASES = [
+    "load_history",
+    "load_roster",
+    "stats",
+    "model_build",
+    "solve",
+    "render",
+    "commit",
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "scales",
+        nargs="*",
+        default=DEFAULT_SCALES,
+        help="people:duties:years of history, default %(default)s",
+    )
+    parser.add_argument("--year", type=int, default=2026, help="month to schedule")
+    parser.add_argument("--month", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--compare", help="a previous results json to compare phase timings against"
+    )
+    parser.add_argument(
+        "--no_save", action="store_true", help="do not write benchmarks/results"
+    )
+    # run one scale inside a generated workspace, used by the parent process
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def git_commit():
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=REPO, capture_output=True, text=True
+        ).stdout.strip()
+
+    commit = git("rev-parse", "--short", "HEAD") or "unknown"
+    dirty = bool(git("status", "--porcelain", "--untracked-files=no"))
+    return commit, dirty
+
+
+def run_scale(scale, year, month, seed):
+    """generate a workspace for scale and time the pipeline in a subprocess"""
+    people, duties, years = (int(n) for n in scale.split(":"))
+
+    from benchmarks.synthetic import write_data
+
+    with tempfile.TemporaryDirectory(prefix="roster-bench-") as workspace:
+        first_month = date(year - years, month, 1)
+        write_data(
+            f"{workspace}/data",
+            people,
+            duties,
+            start_date=first_month,
+            # new people join a couple of months before the scheduled month
+            join_date=date(year - 1, 11, 1) if years else first_month,
+            seed=seed,
+        )
+        os.symlink(os.path.join(REPO, "app"), f"{workspace}/app")
+
+        result_path = f"{workspace}/result.json"
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.bench_pipeline",
+                "--worker",
+                result_path,
+                "--year",
+                str(year),
+                "--month",
+                str(month),
+                "--seed",
+                str(seed),
+                scale,
+            ],
+            cwd=workspace,
+            env={**os.environ, "PYTHONPATH": REPO},
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+        with open(result_path) as f:
+            return json.load(f)
+
+
+def worker(result_path, scale, year, month, seed):
+    """runs with a generated workspace as the working directory"""
+    import app
+    from app.render import ScheduleRenderer
+    from benchmarks.synthetic import write_history
+    from core.history import AssignmentHistory
+    from core.roster import Roster
+    from core.schedule import Schedule
+    from core.solver import SchedulingProblem
+    from core.stats import AssignmentStats
+    from util.profiling import Profiler
+
+    years = int(scale.split(":")[2])
+    history_file = "data/previous-assignments.json"
+    write_history(history_file, Roster(), year - years, month, years * 12, seed=seed)
+
+    profiler = Profiler()
+
+    with profiler.phase("load_history"):
+        history = AssignmentHistory(history_file)
+    with profiler.phase("load_roster"):
+        roster = Roster()
+    with profiler.phase("stats"):
+        stats = AssignmentStats(roster, history)
+    with profiler.phase("model_build"):
+        schedule = Schedule(year, month)
+        problem = SchedulingProblem(
+            schedule, roster, history, stats=stats, profiler=profiler
+        )
+
+    # solve() adds its own solve and set_assignments phases
+    problem.solve()
+
+    with profiler.phase("render") as phase:
+        html = ScheduleRenderer(schedule, roster, stats).render_schedule_to_html()
+        phase["html_kb"] = round(len(html) / 1024, 1)
+
+    flask_app = app.create_app(
+        schedule,
+        roster,
+        history,
+        stats,
+        options={
+            "TMP_WORKING_PATH": "commit.json",
+            "JSON_OUTPUT_PATH": "schedule.json",
+            "JOURNAL_PATH": "schedule.journal.jsonl",
+        },
+    )
+    with profiler.phase("commit") as phase:
+        phase["status_code"] = flask_app.test_client().put("/commit").status_code
+
+    result = {
+        "scale": scale,
+        "people": len(roster.people),
+        "duties": len(roster.task_keys),
+        "history_assignments": len(history.assignment_history),
+        **profiler.to_dict(),
+    }
+    with open(result_path, "w") as f:
+        json.dump(result, f, indent=4, default=str)
+
+
+def seconds_by_phase(result):
+    return {
+        entry["phase"]: entry["seconds"]
+        for entry in result["phases"]
+        if entry["depth"] == 0
+    }
+
+
+def print_results(results, baseline=None):
+    baseline = {result["scale"]: result for result in (baseline or [])}
+
+    print(f"{'scale':<16}" + "".join(f"{phase:>14}" for phase in SUMMARY_PHASES))
+    for result in results:
+        seconds = seconds_by_phase(result)
+        print(
+            f"{result['scale']:<16}"
+            + "".join(f"{seconds.get(phase, 0):>13.3f}s" for phase in SUMMARY_PHASES)
+        )
+
+        if result["scale"] in baseline:
+            before = seconds_by_phase(baseline[result["scale"]])
+            print(
+                f"{'  vs baseline':<16}"
+                + "".join(
+                    (
+                        f"{seconds.get(phase, 0) / before[phase]:>13.2f}x"
+                        if before.get(phase)
+                        else f"{'-':>14}"
+                    )
+                    for phase in SUMMARY_PHASES
+                )
+            )
+
+
+def main():
+    args = parse_args()
+
+    if args.worker:
+        return worker(args.worker, args.scales[0], args.year, args.month, args.seed)
+
+    results = []
+    for scale in args.scales:
+        print(f"running {scale} (people:duties:years)...", flush=True)
+        results.append(run_scale(scale, args.year, args.month, args.seed))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+
+    if not args.no_save:
+        commit, dirty = git_commit()
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{commit}{'-dirty' if dirty else ''}.json")
+        with open(path, "w") as f:
+            json.dump(
+                {"commit": commit, "dirty": dirty, "results": results},
+                f,
+                indent=4,
+                default=str,
+            )
+        print(f"results: {os.path.relpath(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/opt/anaconda3/envs/roster/bin/python3
+# coding: utf-8
+"""
+Import time of the entry points, from python -X importtime
+
+    python -m benchmarks.bench_startup [module ...] [--repeat 5] [--top 8]
+
+Each module is imported in a fresh interpreter --repeat times, the median
+total and the heaviest top-level packages it pulls in are reported. run.py
+only imports the solver, flask and the server in the code paths that use
+them, this shows what loading a saved month still costs
+"""
+
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+DEFAULT_MODULES = ["run", "app", "app.render", "core.schedule", "core.solver"]
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "modules",
+        nargs="*",
+        default=DEFAULT_MODULES,
+        help="modules to import, default %(default)s",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--top", type=int, default=8, help="heaviest packages listed per module"
+    )
+    return parser.parse_args()
+
+
+def import_times(module):
+    """
+    (total, package -> cumulative) microseconds of one import of module in a
+    fresh interpreter. A package's time includes the packages it imports
+    """
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+
+    total = 0
+    packages = defaultdict(int)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        name, cumulative = match.group(4), int(match.group(2))
+        # imports made directly by the interpreter, everything else is nested
+        if len(match.group(3)) == 1:
+            total += cumulative
+        if "." not in name and name != module.split(".")[0]:
+            packages[name] = max(packages[name], cumulative)
+    return total, packages
+
+
+def main():
+    args = parse_args()
+
+    print(f"{'module':<20}{'median':>10}  heaviest packages (ms)")
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        total = statistics.median(total for total, _ in runs)
+
+        packages = {
+            package: statistics.median(run.get(package, 0) for _, run in runs)
+            for package in runs[0][1]
+        }
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[: args.top]
+        print(
+            f"{module:<20}{total / 1000:>8.1f}ms  "
+            + ", ".join(f"{package} {us / 1000:.1f}" for package, us in heaviest)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/opt/anaconda3/envs/roster/bin/python3
+# coding: utf-8
+"""
+Time AssignmentStats against the previous per-person regex implementation on
+synthetic multi-year histories
+
+    python -m benchmarks.bench_stats [years ...]
+"""
+
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.stats import AssignmentStats
+from core.stats.stats import gamma
+from core.task.date_task import format_keys
+
+
+def synthetic_history(roster, start_year, years, seed=0):
+    """assign a random eligible person to every date_task for `years` years"""
+    rng = random.Random(seed)
+    eligible = {task: roster.get_eligible(task) for task in roster.task_keys}
+    history = {}
+
+    for i in range(years * 12):
+        year, month = start_year + i // 12, i % 12 + 1
+        schedule = Schedule(year, month)
+        for task in roster.task_keys:
+            if not eligible[task]:
+                continue
+            for date_task in schedule.get_date_tasks(task):
+                history[str(date_task)] = rng.choice(eligible[task])
+
+    return history
+
+
+def legacy_actual_avg(roster, history):
+    """AssignmentStats.actual_avg as computed before the vectorized rewrite"""
+    assignment_history = format_keys(history.assignment_history)
+    assignment_history_df = pd.DataFrame(
+        {
+            "Key": assignment_history.keys(),
+            "Value": assignment_history.values(),
+        }
+    )
+    assignment_history_df = assignment_history_df.pivot_table(
+        index="Value", columns="Key", aggfunc=lambda x: 1, fill_value=0
+    )
+    for person in roster.people:
+        if person not in assignment_history_df.index:
+            assignment_history_df.loc[person] = 0
+
+    actual_avg = pd.DataFrame(index=roster.people, columns=roster.task_keys)
+    for person in roster.people:
+        for task in roster.task_keys:
+            date_task_pattern = re.compile(f"[0-9]+-[0-9]+-(?:[0-9]+-)?{task}")
+            assignment_frequency = assignment_history_df.loc[
+                person,
+                assignment_history_df.columns.str.contains(
+                    date_task_pattern, regex=True
+                ),
+            ].sum()
+            rounds = max(history.rounds(person, task), 1)
+            actual_avg.at[person, task] = assignment_frequency / rounds
+            if rounds <= 5:
+                avg = actual_avg.at[person, task]
+                actual_avg.at[person, task] = (1 if avg == 0 else avg) * (
+                    1 + (1 - gamma * rounds)
+                )
+
+    return actual_avg
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, time.perf_counter() - start
+
+
+def run(years_list):
+    roster = Roster()
+
+    print(
+        f"{'years':>6} {'assignments':>12} {'legacy (s)':>11} {'stats (s)':>10} {'speedup':>8}"
+    )
+    for years in years_list:
+        with tempfile.TemporaryDirectory() as tmp:
+            history_file = os.path.join(tmp, "history.json")
+            with open(history_file, "w") as f:
+                json.dump(synthetic_history(roster, 2024, years), f)
+
+            history = AssignmentHistory(history_file)
+
+            legacy, legacy_time = timed(legacy_actual_avg, roster, history)
+            stats, stats_time = timed(AssignmentStats, roster, history)
+
+            pd.testing.assert_frame_equal(
+                stats.actual_avg, legacy.astype(float), check_names=False
+            )
+
+            print(
+                f"{years:>6} {len(history.assignment_history):>12} {legacy_time:>11.3f} "
+                f"{stats_time:>10.3f} {legacy_time / stats_time:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    run([int(years) for years in sys.argv[1:]] or [1, 2, 5])
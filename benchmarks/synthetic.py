@@ -0,0 +1,153 @@
+"""
+Synthetic congregations for benchmarks, the same csvs as data/ at any scale
+
+The duty mix follows the real data: most duties are done at each Sunday
+service (code 0) and split across two services, about a quarter on
+Wednesdays (code 3), and the rest weekly (code w). Duties at the same
+service are excluded from each other at random, every duty has enough
+eligible people to be staffed each week
+"""
+
+import json
+import os
+import random
+
+import pandas as pd
+
+SERVICES = {
+    "0": ["1st Service 9:00", "2nd Service 10:30"],
+    "3": ["Wednesday"],
+}
+
+
+def person_name(i):
+    return f"Person{i:05d}, Synthetic"
+
+
+def duty_codes(num_duties):
+    """task_key -> duty code, in the proportions of data/duty-codes.csv"""
+    codes = {}
+    for i in range(num_duties):
+        fraction = i / num_duties
+        code = "0" if fraction < 0.6 else "3" if fraction < 0.85 else "w"
+        codes[f"duty_{i:03d}"] = code
+    return codes
+
+
+def write_data(
+    data_dir,
+    num_people,
+    num_duties,
+    start_date,
+    join_date,
+    eligibility=0.35,
+    exclusion=0.3,
+    new_people=0.1,
+    seed=0,
+):
+    """
+    write prefs, prefs_update_history, men, duty-codes, duty-names,
+    exclusions and service-times csvs for a synthetic congregation to data_dir
+
+    start_date: when everyone's prefs were last updated, except for a
+    `new_people` fraction who join on join_date
+    """
+    rng = random.Random(seed)
+    os.makedirs(data_dir, exist_ok=True)
+
+    codes = duty_codes(num_duties)
+    task_keys = list(codes)
+    people = [person_name(i) for i in range(num_people)]
+
+    # eligibility, at least 6 people per duty so a month can always be staffed
+    prefs = pd.DataFrame(index=pd.Index(people, name="name"), columns=task_keys)
+    for task_key in task_keys:
+        eligible = [person for person in people if rng.random() < eligibility]
+        chosen = set(eligible)
+        others = [person for person in people if person not in chosen]
+        eligible += rng.sample(others, max(0, min(6, num_people) - len(eligible)))
+        prefs.loc[eligible, task_key] = 1
+    prefs.to_csv(f"{data_dir}/prefs.csv")
+
+    joined = {
+        person: start_date if rng.random() >= new_people else join_date
+        for person in people
+    }
+    pref_updates = prefs.copy().astype(object)
+    for person in people:
+        day = joined[person]
+        pref_updates.loc[person] = prefs.loc[person].map(
+            lambda eligible: (
+                f"{day.year}-{day.month}-{day.day}" if eligible == 1 else None
+            )
+        )
+    pref_updates.to_csv(f"{data_dir}/prefs_update_history.csv")
+
+    pd.DataFrame(
+        {
+            "name": people,
+            "date_joined": [f"{d.year}-{d.month}-{d.day}" for d in joined.values()],
+            "email": "",
+            "phone": "",
+        }
+    ).to_csv(f"{data_dir}/men.csv", index=False)
+
+    pd.DataFrame([codes]).to_csv(f"{data_dir}/duty-codes.csv", index=False)
+
+    pd.DataFrame(
+        {"Name": [key.replace("_", " ").title() for key in task_keys]},
+        index=task_keys,
+    ).to_csv(f"{data_dir}/duty-names.csv")
+
+    # services, Sunday duties alternate between the two morning services
+    service_names = [name for names in SERVICES.values() for name in names]
+    service_times = pd.DataFrame(index=service_names, columns=task_keys)
+    service_of = {}
+    for i, (task_key, code) in enumerate(codes.items()):
+        if code in SERVICES:
+            service_of[task_key] = SERVICES[code][i % len(SERVICES[code])]
+            service_times.at[service_of[task_key], task_key] = 1
+    service_times.to_csv(f"{data_dir}/service-times.csv")
+
+    # exclusions, a man only does one of two duties in the same service
+    exclusions = pd.DataFrame(index=task_keys, columns=task_keys)
+    for task_key in task_keys:
+        exclusions.at[task_key, task_key] = 1
+    for i, task1 in enumerate(task_keys):
+        for task2 in task_keys[i + 1 :]:
+            same_service = service_of.get(task1, codes[task1]) == service_of.get(
+                task2, codes[task2]
+            )
+            if same_service and rng.random() < exclusion:
+                exclusions.at[task1, task2] = 1
+                exclusions.at[task2, task1] = 1
+    exclusions.to_csv(f"{data_dir}/exclusions.csv")
+
+    return people, task_keys
+
+
+def write_history(path, roster, start_year, start_month, num_months, seed=0):
+    """
+    a random eligible person for every date_task of num_months months from
+    start_year/start_month, written as a previous-assignments json
+    """
+    # imported here, Schedule reads data/ relative to the working directory
+    from core.schedule import Schedule
+
+    rng = random.Random(seed)
+    eligible = {task: roster.get_eligible(task) for task in roster.task_keys}
+    history = {}
+
+    schedule = Schedule(start_year, start_month)
+    for i in range(num_months):
+        year = start_year + (start_month - 1 + i) // 12
+        month = (start_month - 1 + i) % 12 + 1
+        schedule.set_year_month(year, month)
+        for task in roster.task_keys:
+            for date_task in schedule.get_date_tasks(task):
+                history[str(date_task)] = rng.choice(eligible[task])
+
+    with open(path, "w") as f:
+        json.dump(history, f, indent=4)
+
+    return history
@@ -1 +1,14 @@
-from .solver import *
+# core.solver imports pulp, it is only loaded when a solver name is used
+# (PEP 562) so loading a saved schedule does not pay for it
+from importlib import import_module
+
+
+def __getattr__(name):
+    # import_module rather than `from . import solver`, which looks the
+    # submodule up on this package and recurses while it is still importing
+    solver = import_module(f"{__name__}.solver")
+
+    try:
+        return getattr(solver, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
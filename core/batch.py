@@ -0,0 +1,69 @@
+from datetime import date
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.stats import AssignmentStats
+
+
+def month_range(year, month, num_months):
+    """(year, month) for num_months consecutive months starting at year/month"""
+    for i in range(num_months):
+        yield year + (month - 1 + i) // 12, (month - 1 + i) % 12 + 1
+
+
+def rolling_horizon(
+    year,
+    month,
+    num_months,
+    roster: Roster,
+    history: AssignmentHistory,
+    stats: AssignmentStats = None,
+    saved_assignments=lambda year, month: None,
+    verbose=False,
+    solver_options=None,
+    backend="pulp",
+):
+    """
+    Schedule num_months consecutive months, committing each month to history
+    before solving the next so the consecutive-week rule and fairness stats
+    see the months before it
+
+    saved_assignments(year, month) may return a previously saved schedule to
+    use instead of solving that month
+
+    solver_options: solver, time_limit, threads and gap passed to
+    SchedulingProblem.solve, backend to SchedulingProblem
+
+    Stats are computed from history once (unless given) and then updated with
+    each committed month. Yields each month's Schedule once it is committed
+    """
+    if stats is None:
+        stats = AssignmentStats(roster, history)
+
+    for year, month in month_range(year, month, num_months):
+        schedule = Schedule(year, month)
+
+        assignments = saved_assignments(year, month)
+        if assignments:
+            schedule.set_assignments(assignments)
+        else:
+            # pulp is only imported once a month has to be solved
+            from core.solver import SchedulingProblem
+
+            SchedulingProblem(
+                schedule, roster, history, stats=stats, backend=backend
+            ).solve(verbose=verbose, **(solver_options or {}))
+
+        # replace anything previously committed for this month
+        next_year, next_month = list(month_range(year, month, 2))[1]
+        previous = history.assignments_between(
+            date(year, month, 1), date(next_year, next_month, 1)
+        )
+        history.remove_assignments(previous)
+        stats.remove_assignments(previous)
+
+        history.record_assignments(schedule.assignments)
+        stats.record_assignments(schedule.assignments)
+
+        yield schedule
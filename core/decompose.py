@@ -0,0 +1,282 @@
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from pulp import LpSolutionIntegerFeasible, LpSolutionOptimal, LpStatus
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.solver import SchedulingProblem
+from core.stats import AssignmentStats
+from core.task.tasks import TaskMetadata
+
+# (roster, history, stats, bias) of a worker process, see init_worker
+_shared = None
+
+
+def task_components(roster: Roster, task_keys=None):
+    """
+    Groups of tasks that can be solved on their own, the connected components
+    of the tasks linked by an exclusion someone is eligible for on both sides
+
+    Exclusions are the only constraints between two tasks and the objective
+    is a sum over single assignments, so the month's best schedule is made of
+    each group's best schedule. Tasks keep the roster's order
+    """
+    task_keys = list(task_keys or roster.task_keys)
+    eligible = roster.eligible_sets
+
+    linked = defaultdict(set)
+    for task1, task2 in roster.excluded_tasks:
+        if (
+            task1 != task2
+            and task1 in eligible
+            and task2 in eligible
+            and eligible[task1] & eligible[task2]
+        ):
+            linked[task1].add(task2)
+            linked[task2].add(task1)
+
+    components = []
+    seen = set()
+    for task_key in task_keys:
+        if task_key in seen:
+            continue
+
+        seen.add(task_key)
+        component = set()
+        stack = [task_key]
+        while stack:
+            task = stack.pop()
+            component.add(task)
+            for other in linked[task]:
+                if other not in seen and other in task_keys:
+                    seen.add(other)
+                    stack.append(other)
+
+        components.append([task for task in task_keys if task in component])
+
+    return components
+
+
+def duty_clusters(task_keys):
+    """task_keys grouped by duty code (a service day or weekly), in order"""
+    metadata = TaskMetadata()
+    clusters = defaultdict(list)
+    for task_key in task_keys:
+        clusters[metadata.get_duty_code(task_key)].append(task_key)
+    return list(clusters.values())
+
+
+def blocked_by(schedule: Schedule, roster: Roster, task_keys, assignments):
+    """
+    (date_task, person) pairs of task_keys' date_tasks ruled out by the
+    assignments of other tasks, the person already does an excluded task in
+    that calendar week
+    """
+    # (task_key, week) -> people assigned
+    assigned = defaultdict(set)
+    for date_task, person in assignments.items():
+        if date_task.task_key not in task_keys:
+            assigned[(date_task.task_key, schedule.week_of(date_task))].add(person)
+
+    excluded_with = defaultdict(set)
+    for task1, task2 in roster.excluded_tasks:
+        excluded_with[task1].add(task2)
+        excluded_with[task2].add(task1)
+
+    blocked = set()
+    for task_key in task_keys:
+        for date_task in schedule.get_date_tasks(task_key):
+            week = schedule.week_of(date_task)
+            for other in excluded_with[task_key]:
+                blocked.update(
+                    (date_task, person) for person in assigned[(other, week)]
+                )
+    return blocked
+
+
+def init_worker(roster, history, stats, bias):
+    global _shared
+    _shared = roster, history, stats, bias
+
+
+def solve_part(year, month, task_keys, blocked, backend, solver_options, shared=None):
+    """
+    Solve the month's task_keys with the blocked pairs left out, backend as
+    in SchedulingProblem. Runs in a worker process (see init_worker) unless
+    shared is given
+    """
+    roster, history, stats, bias = shared or _shared
+
+    schedule = Schedule(year, month)
+    problem = SchedulingProblem(
+        schedule,
+        roster,
+        history,
+        stats=stats,
+        bias=bias,
+        task_keys=task_keys,
+        blocked=blocked,
+        backend=backend,
+    )
+    problem.solve(**solver_options)
+
+    return {
+        "task_keys": task_keys,
+        "status": problem.prob.status,
+        "sol_status": problem.prob.sol_status,
+        "objective": problem.prob.objective.value(),
+        "solve_seconds": problem.solve_time,
+        "assignments": dict(schedule.assignments or {}),
+    }
+
+
+class PartPool:
+    """
+    Solves parts of a month in worker processes, in this process when only
+    one part is solved at a time. Workers are spawned on first use and get
+    their own copy of the roster, history and stats
+    """
+
+    def __init__(self, shared, processes=None):
+        self.shared = shared
+        self.processes = processes
+        self.executor = None
+
+    def map(self, jobs):
+        if len(jobs) == 1 or self.processes == 1:
+            return [solve_part(*job, shared=self.shared) for job in jobs]
+
+        if self.executor is None:
+            # spawn, as core/scenarios.py, workers load their own singletons
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=self.shared,
+            )
+        return list(self.executor.map(solve_part, *zip(*jobs)))
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+def solve_decomposed(
+    schedule: Schedule,
+    roster: Roster,
+    history: AssignmentHistory,
+    stats: AssignmentStats = None,
+    bias=None,
+    coordinate=False,
+    rounds=5,
+    processes=None,
+    backend="pulp",
+    **solver_options,
+):
+    """
+    Solve the month as independent groups of tasks (see task_components),
+    each its own smaller model, in parallel across processes
+
+    coordinate: also split each group by duty code (see duty_clusters). The
+    clusters of a group share people through exclusions, so they are solved
+    one after the other with the other clusters' assignments blocking anyone
+    doing an excluded task that week, and again in rounds while the
+    objective improves. Each re-solve can keep its cluster's assignments, so
+    the objective never gets worse, but it may stop short of the optimum a
+    single model finds. Separate groups are still solved in parallel
+
+    processes: worker processes, one per part by default, 1 solves
+    everything in this process
+
+    backend is passed to SchedulingProblem and solver_options to its solve,
+    parts are not warm started
+
+    Sets the schedule's assignments and returns a summary of the parts,
+    rounds, objective and timings. Raises ValueError when a part has no
+    schedule, e.g. a cluster solved first took everyone a later one needs
+    """
+    start = perf_counter()
+    if stats is None:
+        stats = AssignmentStats(roster, history)
+
+    components = task_components(roster)
+    parts = [
+        duty_clusters(component) if coordinate else [component]
+        for component in components
+    ]
+
+    assignments = {}
+    # (component, cluster) -> objective of its last solve
+    objectives = {}
+    solve_seconds = 0
+    completed_rounds = 0
+
+    pool = PartPool((roster, history, stats, bias), processes)
+    try:
+        for completed_rounds in range(1, (rounds if coordinate else 1) + 1):
+            previous_objective = sum(objectives.values())
+
+            # the i-th cluster of every component at once
+            for step in range(max(len(clusters) for clusters in parts)):
+                steps = [
+                    (component, clusters[step])
+                    for component, clusters in enumerate(parts)
+                    if step < len(clusters)
+                ]
+                results = pool.map(
+                    [
+                        (
+                            schedule.year,
+                            schedule.month,
+                            task_keys,
+                            blocked_by(schedule, roster, task_keys, assignments),
+                            backend,
+                            solver_options,
+                        )
+                        for _, task_keys in steps
+                    ]
+                )
+
+                for (component, task_keys), result in zip(steps, results):
+                    if result["sol_status"] not in (
+                        LpSolutionOptimal,
+                        LpSolutionIntegerFeasible,
+                    ):
+                        raise ValueError(
+                            f"no schedule for {', '.join(task_keys)} "
+                            f"({LpStatus[result['status']]})"
+                        )
+
+                    assignments = {
+                        date_task: person
+                        for date_task, person in assignments.items()
+                        if date_task.task_key not in task_keys
+                    }
+                    assignments.update(result["assignments"])
+                    objectives[(component, step)] = result["objective"]
+                    solve_seconds += result["solve_seconds"]
+
+            if completed_rounds > 1 and (
+                sum(objectives.values()) <= previous_objective + 1e-9
+            ):
+                break
+    finally:
+        pool.close()
+
+    # in roster order of people, as SchedulingProblem.solve sets them
+    order = {person: i for i, person in enumerate(roster.people)}
+    schedule.set_assignments(
+        dict(sorted(assignments.items(), key=lambda item: order.get(item[1], -1)))
+    )
+
+    return {
+        "parts": [task_keys for clusters in parts for task_keys in clusters],
+        "rounds": completed_rounds,
+        "objective": sum(objectives.values()),
+        "solve_seconds": solve_seconds,
+        "seconds": perf_counter() - start,
+    }
@@ -0,0 +1,367 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.stats import AssignmentBiases, AssignmentStats, bias_value
+
+# smallest change of the objective counted as an improvement
+EPSILON = 1e-9
+
+
+class HeuristicScheduler:
+    """
+    A schedule without a MIP solver, in milliseconds, for when CBC is not
+    installed or too slow, as a baseline and as a warm start for
+    SchedulingProblem
+
+    Keeps the rules of SchedulingProblem: only eligible people, no two
+    excluded tasks in a calendar week, no one on consecutive dates of a task
+    (across the month boundary too), no one more than once a month unless
+    there are fewer people than dates, then everyone at least once and no one
+    more than one more than anyone else, and assignments already committed
+    for the month are kept
+
+    Date_tasks with the fewest candidates are filled first, each by the
+    feasible person with the best score, the objective's coefficient
+    ideal_avg - actual_avg * bias. Then people are moved to other dates and
+    swapped between tasks while that improves the objective. The result
+    follows the rules but need not be optimal
+    """
+
+    def __init__(
+        self,
+        schedule: Schedule,
+        roster: Roster,
+        history: AssignmentHistory,
+        stats: AssignmentStats = None,
+        bias=None,
+    ):
+        self.schedule = schedule
+        self.roster = roster
+        if stats is None:
+            stats = AssignmentStats(roster, history)
+        if bias is None:
+            bias = AssignmentBiases().bias
+
+        self.task_keys = roster.task_keys
+        self.date_tasks = [
+            date_task
+            for task_key in self.task_keys
+            for date_task in schedule.get_date_tasks(task_key)
+        ]
+        self.candidates = {
+            task_key: roster.get_eligible(task_key) for task_key in self.task_keys
+        }
+
+        # (task_key, person) -> objective coefficient, only for eligible people
+        self.score = {
+            (task_key, person): stats.ideal_avg[task_key]
+            - stats.actual_avg.at[person, task_key] * bias_value(bias[task_key], person)
+            for task_key in self.task_keys
+            for person in self.candidates[task_key]
+        }
+
+        # most times anyone does a task this month, and the tasks everyone
+        # eligible does at least once, see constrain_do_not_over_assign_in_month
+        self.cap = {}
+        self.at_least_once = set()
+        for task_key in self.task_keys:
+            num_dates = len(schedule.get_date_tasks(task_key))
+            num_eligible = len(self.candidates[task_key])
+            if num_eligible >= num_dates:
+                self.cap[task_key] = 1
+            elif num_eligible:
+                self.cap[task_key] = (num_dates + num_eligible - 1) // num_eligible
+                self.at_least_once.add(task_key)
+
+        self.excluded_with = defaultdict(set)
+        for task1, task2 in roster.excluded_tasks:
+            if task1 != task2:
+                self.excluded_with[task1].add(task2)
+                self.excluded_with[task2].add(task1)
+
+        week_of_day = {
+            day: week
+            for week, days in enumerate(schedule.calendar)
+            for day in days
+            if day
+        }
+        self.week = {
+            date_task: week_of_day[date_task.day] for date_task in self.date_tasks
+        }
+
+        # known assignments from the week before the month on, as the model's
+        # historical variables. This month's are kept as they are
+        lookback_start = datetime(schedule.year, schedule.month, 1) - timedelta(days=7)
+        month_date_tasks = set(self.date_tasks)
+        self.known = {}
+        self.pinned = {}
+        for date_task, person in history.assignments_between(
+            lookback_start.date()
+        ).items():
+            if date_task in month_date_tasks:
+                self.pinned[date_task] = person
+            elif date_task.task_key in self.candidates:
+                self.known[date_task] = person
+
+        # date_task -> the dates before and after it of the same task
+        self.neighbors = {}
+        for task_key in self.task_keys:
+            dates = sorted(
+                set(schedule.get_date_tasks(task_key))
+                | {
+                    date_task
+                    for date_task in self.known
+                    if date_task.task_key == task_key
+                }
+            )
+            for i, date_task in enumerate(dates):
+                if date_task in month_date_tasks:
+                    self.neighbors[date_task] = (
+                        dates[max(i - 1, 0) : i] + dates[i + 1 : i + 2]
+                    )
+
+        self.assignments = {}
+        # (task_key, person) -> times assigned this month
+        self.count = defaultdict(int)
+        # (person, week) -> task_keys assigned that week
+        self.week_tasks = defaultdict(list)
+
+    def assign(self, date_task, person):
+        self.assignments[date_task] = person
+        self.count[(date_task.task_key, person)] += 1
+        self.week_tasks[(person, self.week[date_task])].append(date_task.task_key)
+
+    def unassign(self, date_task):
+        person = self.assignments.pop(date_task)
+        self.count[(date_task.task_key, person)] -= 1
+        self.week_tasks[(person, self.week[date_task])].remove(date_task.task_key)
+        return person
+
+    def feasible(self, date_task, person):
+        """whether person may take the unassigned date_task"""
+        task_key = date_task.task_key
+        if (task_key, person) not in self.score:
+            return False
+        if self.count[(task_key, person)] >= self.cap[task_key]:
+            return False
+
+        excluded = self.excluded_with[task_key]
+        if any(
+            other in excluded
+            for other in self.week_tasks[(person, self.week[date_task])]
+        ):
+            return False
+
+        # with a single eligible person they do every date
+        if len(self.candidates[task_key]) >= 2:
+            for neighbor in self.neighbors[date_task]:
+                if self.assignments.get(neighbor, self.known.get(neighbor)) == person:
+                    return False
+        return True
+
+    def removable(self, date_task):
+        """whether date_task's person may give it up, everyone keeps one"""
+        if date_task in self.pinned:
+            return False
+        task_key = date_task.task_key
+        person = self.assignments[date_task]
+        return task_key not in self.at_least_once or self.count[(task_key, person)] > 1
+
+    def objective(self):
+        return sum(
+            self.score.get((date_task.task_key, person), 0)
+            for date_task, person in self.assignments.items()
+        )
+
+    def solve(self, max_passes=20):
+        """
+        schedule the month, sets the schedule's assignments and returns them.
+        Raises ValueError when a date_task is left without anyone who may do it
+        """
+        start = perf_counter()
+
+        for date_task, person in self.pinned.items():
+            self.assign(date_task, person)
+
+        # scarcest first, a task everyone must do before its spare dates fill
+        for date_task in sorted(
+            (
+                date_task
+                for date_task in self.date_tasks
+                if date_task not in self.pinned
+            ),
+            key=lambda date_task: (
+                len(self.candidates[date_task.task_key]),
+                date_task,
+            ),
+        ):
+            if not self.fill(date_task):
+                raise ValueError(f"no one can be assigned to {date_task}")
+
+        self.cover()
+        for _ in range(max_passes):
+            if not (self.move() | self.swap()):
+                break
+
+        self.solve_time = perf_counter() - start
+        self.objective_value = self.objective()
+
+        # in roster order of people, as SchedulingProblem.solve sets them
+        order = {person: i for i, person in enumerate(self.roster.people)}
+        self.schedule.set_assignments(
+            dict(
+                sorted(
+                    self.assignments.items(), key=lambda item: order.get(item[1], -1)
+                )
+            )
+        )
+        return self.schedule.assignments
+
+    def fill(self, date_task):
+        """assign the best feasible person, moving one other assignment if needed"""
+        task_key = date_task.task_key
+        options = [
+            person
+            for person in self.candidates[task_key]
+            if self.feasible(date_task, person)
+        ]
+        if options:
+            self.assign(
+                date_task,
+                min(
+                    options,
+                    key=lambda person: (
+                        # people who have not done it yet first
+                        task_key in self.at_least_once
+                        and self.count[(task_key, person)] > 0,
+                        -self.score[(task_key, person)],
+                    ),
+                ),
+            )
+            return True
+
+        # someone gives up one of their assignments this month to a person
+        # who may take it
+        for person in sorted(
+            self.candidates[task_key],
+            key=lambda person: -self.score[(task_key, person)],
+        ):
+            for other in self.blocking(date_task, person):
+                self.unassign(other)
+                if self.feasible(date_task, person):
+                    self.assign(date_task, person)
+                    replacements = [
+                        replacement
+                        for replacement in self.candidates[other.task_key]
+                        if self.feasible(other, replacement)
+                    ]
+                    if replacements:
+                        self.assign(
+                            other,
+                            max(
+                                replacements,
+                                key=lambda p: self.score[(other.task_key, p)],
+                            ),
+                        )
+                        return True
+                    self.unassign(date_task)
+                self.assign(other, person)
+        return False
+
+    def blocking(self, date_task, person):
+        """person's own assignments this month that could stop them taking date_task"""
+        task_key = date_task.task_key
+        week = self.week[date_task]
+        return [
+            other
+            for other, assigned in list(self.assignments.items())
+            if assigned == person
+            and self.removable(other)
+            and (
+                other.task_key == task_key
+                or (
+                    self.week[other] == week
+                    and other.task_key in self.excluded_with[task_key]
+                )
+            )
+        ]
+
+    def cover(self):
+        """give everyone who must do a task at least once one of its dates"""
+        for task_key in self.task_keys:
+            if task_key not in self.at_least_once:
+                continue
+            date_tasks = self.schedule.get_date_tasks(task_key)
+            for person in self.candidates[task_key]:
+                if self.count[(task_key, person)]:
+                    continue
+                for date_task in date_tasks:
+                    if not self.removable(date_task):
+                        continue
+                    previous = self.unassign(date_task)
+                    if self.feasible(date_task, person):
+                        self.assign(date_task, person)
+                        break
+                    self.assign(date_task, previous)
+                else:
+                    raise ValueError(f"{person} cannot be given any {task_key} date")
+
+    def move(self):
+        """hand each date to a better scoring person who may take it"""
+        improved = False
+        for date_task in self.date_tasks:
+            if not self.removable(date_task):
+                continue
+
+            task_key = date_task.task_key
+            person = self.unassign(date_task)
+            current = self.score[(task_key, person)]
+            better = [
+                other
+                for other in self.candidates[task_key]
+                if self.score[(task_key, other)] > current + EPSILON
+                and self.feasible(date_task, other)
+            ]
+            if better:
+                person = max(better, key=lambda other: self.score[(task_key, other)])
+                improved = True
+            self.assign(date_task, person)
+        return improved
+
+    def swap(self):
+        """swap the people of two dates of different tasks when that scores better"""
+        improved = False
+        for i, first in enumerate(self.date_tasks):
+            for second in self.date_tasks[i + 1 :]:
+                if first.task_key == second.task_key:
+                    continue
+                if not (self.removable(first) and self.removable(second)):
+                    continue
+
+                person1 = self.assignments[first]
+                person2 = self.assignments[second]
+                gain = (
+                    self.score.get((first.task_key, person2), float("-inf"))
+                    + self.score.get((second.task_key, person1), float("-inf"))
+                    - self.score[(first.task_key, person1)]
+                    - self.score[(second.task_key, person2)]
+                )
+                if gain <= EPSILON:
+                    continue
+
+                self.unassign(first)
+                self.unassign(second)
+                if self.feasible(first, person2):
+                    self.assign(first, person2)
+                    if self.feasible(second, person1):
+                        self.assign(second, person1)
+                        improved = True
+                        continue
+                    self.unassign(first)
+                self.assign(first, person1)
+                self.assign(second, person2)
+        return improved
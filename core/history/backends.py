@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+from datetime import date
+
+from core.task.date_task import DateTask
+from util.helpers import write_dict_to_file
+
+DATE_FORMAT = "%Y-%m-%d"
+DATE_TASK_PATTERN = (
+    r"^(?P<year>[0-9]+)-(?P<month>[0-9]+)-(?:(?P<day>[0-9]+)-)?(?P<task_key>\w+)$"
+)
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+def parse_date_task(date_task):
+    """
+    split a date_task string into its (date, task_key) parts
+
+    date_tasks without a day (monthly duties) are dated to the 1st
+    """
+    date_task = DateTask.parse(date_task)
+    return date_task.date, date_task.task_key
+
+
+def create_backend(path):
+    """choose a history backend from the file extension"""
+    if os.path.splitext(path)[1] in SQLITE_SUFFIXES:
+        return SqliteHistoryBackend(path)
+    return JsonHistoryBackend(path)
+
+
+class HistoryBackend:
+    """
+    Storage for the assignment history, a mapping of date_task -> person,
+    date_tasks are `{year}-{month}-{day}-{task_key}` strings at this level
+
+    Backends store dates and task keys parsed so AssignmentHistory and
+    AssignmentStats can query by date range and task without re-parsing
+    every date_task
+    """
+
+    def items(self, start=None, end=None):
+        """(date_task, person) pairs dated in [start, end), unbounded if None"""
+        raise NotImplementedError
+
+    def frame(self):
+        """typed history with columns date (datetime64), task_key and person"""
+        raise NotImplementedError
+
+    def task_dates(self):
+        """(task_key, date) of every date_task, ordered by task_key then date"""
+        raise NotImplementedError
+
+    def append(self, assignments):
+        raise NotImplementedError
+
+    def delete(self, date_tasks):
+        raise NotImplementedError
+
+
+class JsonHistoryBackend(HistoryBackend):
+    """the whole history as one flat json dict, rewritten on every change"""
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, "r") as file:
+            self.assignments = json.load(file)
+
+    def items(self, start=None, end=None):
+        if start is None and end is None:
+            yield from self.assignments.items()
+            return
+
+        for date_task, person in self.assignments.items():
+            date_task_date = parse_date_task(date_task)[0]
+            if (start is None or date_task_date >= start) and (
+                end is None or date_task_date < end
+            ):
+                yield date_task, person
+
+    def frame(self):
+        import pandas as pd
+
+        date_tasks = pd.Series(list(self.assignments.keys()), dtype=str)
+        parts = date_tasks.str.extract(DATE_TASK_PATTERN)
+
+        return pd.DataFrame(
+            {
+                "date": pd.to_datetime(
+                    {
+                        "year": parts["year"].astype(int),
+                        "month": parts["month"].astype(int),
+                        "day": parts["day"].fillna(1).astype(int),
+                    }
+                ),
+                "task_key": parts["task_key"],
+                "person": list(self.assignments.values()),
+            }
+        )
+
+    def task_dates(self):
+        return sorted(
+            (task_key, date_task_date)
+            for date_task_date, task_key in map(parse_date_task, self.assignments)
+        )
+
+    def append(self, assignments):
+        self.assignments.update(assignments)
+        write_dict_to_file(self.assignments, self.path)
+
+    def delete(self, date_tasks):
+        for key in date_tasks:
+            self.assignments.pop(key, None)
+        write_dict_to_file(self.assignments, self.path)
+
+
+class SqliteHistoryBackend(HistoryBackend):
+    """
+    history stored as rows of (date_task, date, task_key, person) in a local
+    SQLite database, indexed on (task_key, date) and (person, task_key) so a
+    commit only touches the month's rows
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+
+        with self.connection:
+            self.connection.executescript("""
+                CREATE TABLE IF NOT EXISTS assignments (
+                    date_task TEXT PRIMARY KEY,
+                    date TEXT NOT NULL,
+                    task_key TEXT NOT NULL,
+                    person TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS assignments_task_key_date
+                    ON assignments (task_key, date);
+                CREATE INDEX IF NOT EXISTS assignments_person_task_key
+                    ON assignments (person, task_key);
+                """)
+
+    def __getstate__(self):
+        # the connection cannot be pickled, a copy sent to another process
+        # (see core/decompose.py) opens its own
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def items(self, start=None, end=None):
+        query = "SELECT date_task, person FROM assignments WHERE 1 = 1"
+        params = []
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(start.isoformat())
+        if end is not None:
+            query += " AND date < ?"
+            params.append(end.isoformat())
+
+        yield from self.connection.execute(query, params)
+
+    def frame(self):
+        import pandas as pd
+
+        frame = pd.read_sql_query(
+            "SELECT date, task_key, person FROM assignments", self.connection
+        )
+        frame["date"] = pd.to_datetime(frame["date"], format=DATE_FORMAT)
+        return frame
+
+    def task_dates(self):
+        # read in the order of the (task_key, date) index, nothing is sorted
+        for task_key, task_date in self.connection.execute(
+            "SELECT task_key, date FROM assignments ORDER BY task_key, date"
+        ):
+            yield task_key, date.fromisoformat(task_date)
+
+    def append(self, assignments):
+        rows = [
+            (date_task, *self.date_and_task_key(date_task), person)
+            for date_task, person in assignments.items()
+        ]
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO assignments (date_task, date, task_key, person) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete(self, date_tasks):
+        with self.connection:
+            self.connection.executemany(
+                "DELETE FROM assignments WHERE date_task = ?",
+                [(date_task,) for date_task in date_tasks],
+            )
+
+    @staticmethod
+    def date_and_task_key(date_task):
+        date_task_date, task_key = parse_date_task(date_task)
+        return date_task_date.isoformat(), task_key
@@ -1,12 +1,10 @@
 import calendar
-import json
-import pandas as pd
+from bisect import bisect_left
+from collections import defaultdict
 from datetime import datetime
-from util.helpers import (
-    trim_task_date,
-    trim_task_name,
-    write_dict_to_file,
-)
+from core.history.backends import create_backend
+from core.task.date_task import format_keys, parse_keys
+from util.data import read_matrix
 
 calendar.setfirstweekday(calendar.SUNDAY)
 DATE_FORMAT = "%Y-%m-%d"
@@ -14,37 +12,76 @@ DATE_FORMAT = "%Y-%m-%d"
 
 class AssignmentHistory:
     def __init__(self, assignment_history_file):
+        """
+        assignment_history_file may be the json history or a SQLite database
+        (.db, .sqlite, .sqlite3), see core/history/backends.py
+        """
         self.assignment_history_file = assignment_history_file
+        self.backend = create_backend(assignment_history_file)
 
-        with open(assignment_history_file, "r") as file:
-            self.assignment_history = json.load(file)
+        # person -> task_key -> date string, "" when never eligible, shared
+        # until the csv changes, never changed in place
+        self.pref_update_history = read_matrix("data/prefs_update_history.csv")
+        # (person, task_key) -> parsed pref update date, None when never eligible
+        self.start_dates = {}
 
-        self.pref_update_history = pd.read_csv(
-            "data/prefs_update_history.csv", index_col=0
-        )
-        self.pref_update_history.fillna("", inplace=True)
-        self.pref_update_history = self.pref_update_history.to_dict(orient="index")
+        # task_key -> sorted dates of its date_tasks and (task_key, start_date)
+        # -> rounds, see rounds(). Built on first use, dropped when the
+        # history changes
+        self.task_dates = None
+        self.rounds_cache = {}
+
+    @property
+    def assignment_history(self):
+        """the full history as a DateTask -> person dict"""
+        return parse_keys(dict(self.backend.items()))
+
+    def assignments_between(self, start=None, end=None):
+        """DateTask -> person dict of assignments dated in [start, end)"""
+        return parse_keys(dict(self.backend.items(start, end)))
 
     def record_assignments(self, assignments):
-        self.assignment_history.update(assignments)
-        write_dict_to_file(self.assignment_history, self.assignment_history_file)
+        """assignments may be keyed by DateTask or date_task strings"""
+        self.backend.append(format_keys(assignments))
+        self.clear_rounds()
 
     def remove_assignments(self, assignments):
-        for key in assignments:
-            self.assignment_history.pop(key, None)
-        write_dict_to_file(self.assignment_history, self.assignment_history_file)
+        self.backend.delete([str(date_task) for date_task in assignments])
+        self.clear_rounds()
+
+    def clear_rounds(self):
+        self.task_dates = None
+        self.rounds_cache = {}
+
+    def assignments_frame(self):
+        """
+        Parsed, typed assignment history, one row per assignment with columns
+        date (datetime64), task_key and person
+
+        date_tasks without a day (monthly duties) are dated to the 1st
+        """
+        return self.backend.frame()
+
+    def pref_start_dates(self):
+        """
+        person x task_key frame of the dates each person last updated their prefs
+        for a task, NaT where they have never been eligible
+        """
+        import pandas as pd
+
+        start_dates = pd.DataFrame.from_dict(self.pref_update_history, orient="index")
+        return start_dates.apply(
+            lambda column: pd.to_datetime(column.mask(column == ""), format=DATE_FORMAT)
+        )
 
     def count_eligible_months(self, person, task_key, end_year, end_month):
         """
         How many months have passed from being eligible for task until end_year/end_month
         """
-        if not self.pref_update_history[person][task_key]:
+        start_date = self.pref_start_date(person, task_key)
+        if start_date is None:
             return 0
 
-        start_date = datetime.strptime(
-            self.pref_update_history[person][task_key], DATE_FORMAT
-        ).date()
-
         start_year = int(start_date.year)
         start_month = int(start_date.month)
 
@@ -58,26 +95,35 @@ class AssignmentHistory:
     def rounds(self, person, task_key):
         """
         count how many rounds person has been eligible for task_key since they last updated prefs
+
+        people who updated their prefs on the same day share the count, it is
+        a binary search of the task's dates, see date_index()
         """
-        # TODO memoize
-        if not self.pref_update_history[person][task_key]:
+        start_date = self.pref_start_date(person, task_key)
+        if start_date is None:
             return 0
 
-        start_date = datetime.strptime(
-            self.pref_update_history[person][task_key], DATE_FORMAT
-        ).date()
-
-        rounds = len(
-            [
-                k
-                for k in self.assignment_history.keys()
-                if trim_task_name(k) == task_key
-                and datetime.strptime(
-                    trim_task_date(k),
-                    DATE_FORMAT,
-                ).date()
-                >= start_date
-            ]
-        )
-
-        return rounds
+        key = (task_key, start_date)
+        if key not in self.rounds_cache:
+            dates = self.date_index().get(task_key, [])
+            self.rounds_cache[key] = len(dates) - bisect_left(dates, start_date)
+        return self.rounds_cache[key]
+
+    def pref_start_date(self, person, task_key):
+        """the date person last updated their prefs for task_key, None if never"""
+        key = (person, task_key)
+        if key not in self.start_dates:
+            start = self.pref_update_history[person][task_key]
+            self.start_dates[key] = (
+                datetime.strptime(start, DATE_FORMAT).date() if start else None
+            )
+        return self.start_dates[key]
+
+    def date_index(self):
+        """task_key -> sorted dates of the task's date_tasks in the history"""
+        if self.task_dates is None:
+            task_dates = defaultdict(list)
+            for task_key, task_date in self.backend.task_dates():
+                task_dates[task_key].append(task_date)
+            self.task_dates = dict(task_dates)
+        return self.task_dates
@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from datetime import date
+
+from ..backends import JsonHistoryBackend, SqliteHistoryBackend, parse_date_task
+from util.helpers import write_dict_to_file
+
+ASSIGNMENTS = {
+    "2024-9-29-usher": "Addy, Levi",
+    "2024-10-6-usher": "Byers, Austin",
+    "2024-10-13-lesson": "Addy, Levi",
+    "2024-11-lords_supper_prep": "Byers, Austin",
+}
+
+
+class HistoryBackendTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        json_path = os.path.join(self.tmp.name, "history.json")
+        write_dict_to_file(ASSIGNMENTS, json_path)
+
+        sqlite = SqliteHistoryBackend(os.path.join(self.tmp.name, "history.db"))
+        sqlite.append(ASSIGNMENTS)
+
+        self.backends = [JsonHistoryBackend(json_path), sqlite]
+
+    def tearDown(self):
+        self.backends[1].connection.close()
+        self.tmp.cleanup()
+
+    def test_parse_date_task(self):
+        assert parse_date_task("2024-10-6-usher") == (date(2024, 10, 6), "usher")
+        assert parse_date_task("2024-11-lords_supper_prep") == (
+            date(2024, 11, 1),
+            "lords_supper_prep",
+        )
+
+    def test_range_queries(self):
+        for backend in self.backends:
+            assert dict(backend.items()) == ASSIGNMENTS
+            assert dict(backend.items(date(2024, 10, 1), date(2024, 11, 1))) == {
+                "2024-10-6-usher": "Byers, Austin",
+                "2024-10-13-lesson": "Addy, Levi",
+            }
+            assert list(backend.task_dates()) == sorted(
+                parse_date_task(date_task)[::-1] for date_task in ASSIGNMENTS
+            )
+            assert len(backend.frame()) == len(ASSIGNMENTS)
+
+    def test_append_and_delete(self):
+        for backend in self.backends:
+            backend.append({"2024-10-6-usher": "Addy, Levi"})
+            backend.delete(["2024-9-29-usher"])
+
+            assert dict(backend.items(end=date(2024, 10, 7))) == {
+                "2024-10-6-usher": "Addy, Levi"
+            }
+
+
+if __name__ == "__main__":
+    unittest.main()
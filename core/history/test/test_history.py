@@ -0,0 +1,50 @@
+import shutil
+import tempfile
+import unittest
+
+from core.roster import Roster
+from ..history import AssignmentHistory
+
+
+class AssignmentHistoryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        history_file = f"{self.tmp.name}/history.json"
+        shutil.copy("data/previous-assignments.json", history_file)
+        self.history = AssignmentHistory(history_file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def count_since(self, person, task_key):
+        start_date = self.history.pref_start_date(person, task_key)
+        if start_date is None:
+            return 0
+        return sum(
+            date_task.task_key == task_key and date_task.date >= start_date
+            for date_task in self.history.assignment_history
+        )
+
+    def test_rounds_match_a_scan_of_the_history(self):
+        roster = Roster()
+        for person in roster.people:
+            for task_key in roster.task_keys:
+                assert self.history.rounds(person, task_key) == self.count_since(
+                    person, task_key
+                )
+
+    def test_rounds_follow_record_and_remove(self):
+        roster = Roster()
+        person = roster.get_eligible("song_leader")[0]
+        before = self.history.rounds(person, "song_leader")
+
+        self.history.record_assignments({"2030-1-6-song_leader": person})
+        assert self.history.rounds(person, "song_leader") == before + 1
+
+        self.history.remove_assignments(["2030-1-6-song_leader"])
+        assert self.history.rounds(person, "song_leader") == before
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+from time import perf_counter
+
+from pulp import (
+    LpConstraintGE,
+    LpConstraintLE,
+    LpSolutionInfeasible,
+    LpSolutionIntegerFeasible,
+    LpSolutionNoSolutionFound,
+    LpSolutionOptimal,
+    LpSolutionUnbounded,
+    LpStatusInfeasible,
+    LpStatusNotSolved,
+    LpStatusOptimal,
+    LpStatusUnbounded,
+    LpStatusUndefined,
+)
+
+
+class MatrixObjective:
+    """the objective of a MatrixProblem, value() like an LpAffineExpression"""
+
+    def __init__(self, problem):
+        self.problem = problem
+
+    def value(self):
+        return self.problem.objective_value
+
+    def __len__(self):
+        return len(self.problem.objective_terms)
+
+
+class MatrixProblem:
+    """
+    A binary maximization assembled as sparse arrays and solved in process by
+    scipy.optimize.milp (HiGHS), no PuLP expressions are built and no model
+    file is written
+
+    keys: one binary column per key, in order. Constraint rows are
+    ([(key, coefficient), ...], sense, rhs) with PuLP's LpConstraint senses
+
+    Has the parts of LpProblem the rest of the code reads: status,
+    sol_status, objective.value(), numVariables(), numConstraints(). scipy
+    does not take a starting solution, a warm start is not used
+    """
+
+    def __init__(self, keys):
+        self.columns = {key: i for i, key in enumerate(dict.fromkeys(keys))}
+        self.objective_terms = []
+        self.objective = MatrixObjective(self)
+
+        # coordinates of the constraint matrix and the bounds of each row
+        self.row_index = []
+        self.column_index = []
+        self.coefficients = []
+        self.lower = []
+        self.upper = []
+
+        self.status = LpStatusNotSolved
+        self.sol_status = LpSolutionNoSolutionFound
+        self.objective_value = None
+        self.values = None
+        self.result = None
+
+    def set_objective(self, terms):
+        """[(key, coefficient), ...] to maximize"""
+        self.objective_terms = list(terms)
+
+    def extend(self, rows):
+        for terms, sense, rhs in rows:
+            row = len(self.lower)
+            for key, coefficient in terms:
+                self.row_index.append(row)
+                self.column_index.append(self.columns[key])
+                self.coefficients.append(coefficient)
+
+            self.lower.append(-float("inf") if sense == LpConstraintLE else rhs)
+            self.upper.append(float("inf") if sense == LpConstraintGE else rhs)
+
+    def numVariables(self):
+        return len(self.columns)
+
+    def numConstraints(self):
+        return len(self.lower)
+
+    def arrays(self):
+        """(c, A, lower, upper) of max c.x subject to lower <= A x <= upper"""
+        import numpy as np
+        from scipy.sparse import csr_array
+
+        c = np.zeros(len(self.columns))
+        for key, coefficient in self.objective_terms:
+            c[self.columns[key]] += coefficient
+
+        # HiGHS takes 32 bit indices
+        A = csr_array(
+            (
+                np.array(self.coefficients, dtype=float),
+                (
+                    np.array(self.row_index, dtype=np.int32),
+                    np.array(self.column_index, dtype=np.int32),
+                ),
+            ),
+            shape=(len(self.lower), len(self.columns)),
+        )
+        return c, A, np.array(self.lower), np.array(self.upper)
+
+    def solve(self, verbose=False, time_limit=None, gap=None):
+        """
+        solve with HiGHS, time_limit and gap as in get_solver. Returns the
+        PuLP status, the solution is read with value(key)
+        """
+        import numpy as np
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        c, A, lower, upper = self.arrays()
+
+        options = {"disp": verbose}
+        if time_limit is not None:
+            options["time_limit"] = time_limit
+        if gap is not None:
+            options["mip_rel_gap"] = gap
+
+        start = perf_counter()
+        # milp minimizes
+        self.result = milp(
+            -c,
+            integrality=np.ones(len(c)),
+            bounds=Bounds(0, 1),
+            constraints=LinearConstraint(A, lower, upper) if len(lower) else None,
+            options=options,
+        )
+        self.solve_time = perf_counter() - start
+
+        # 0 optimal, 1 iteration or time limit, 2 infeasible, 3 unbounded
+        self.status, self.sol_status = {
+            0: (LpStatusOptimal, LpSolutionOptimal),
+            2: (LpStatusInfeasible, LpSolutionInfeasible),
+            3: (LpStatusUnbounded, LpSolutionUnbounded),
+        }.get(self.result.status, (LpStatusUndefined, LpSolutionNoSolutionFound))
+
+        if self.result.x is not None:
+            self.values = self.result.x
+            self.objective_value = float(c @ self.result.x)
+            if self.result.status == 1:
+                # stopped with a feasible schedule, as PuLP reports CBC's
+                self.status, self.sol_status = (
+                    LpStatusOptimal,
+                    LpSolutionIntegerFeasible,
+                )
+        elif self.result.status == 1:
+            self.status = LpStatusNotSolved
+
+        return self.status
+
+    def value(self, key):
+        """the solved value of key's column, None before a solution"""
+        if self.values is None:
+            return None
+        return self.values[self.columns[key]]
+
+    def summary(self):
+        """nodes and gap for the profiler, like SchedulingProblem.parse_cbc_log"""
+        summary = {}
+        for key, attribute in (("nodes", "mip_node_count"), ("gap", "mip_gap")):
+            value = getattr(self.result, attribute, None)
+            if value is not None:
+                summary[key] = value
+        return summary
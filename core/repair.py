@@ -0,0 +1,78 @@
+from pulp import LpSolutionIntegerFeasible, LpSolutionOptimal, LpStatus
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.solver import SchedulingProblem
+from core.stats import AssignmentStats
+from core.task.date_task import parse_keys
+
+
+def repair(
+    schedule: Schedule,
+    roster: Roster,
+    history: AssignmentHistory,
+    edits,
+    weeks=None,
+    stats: AssignmentStats = None,
+    profiler=None,
+    backend="pulp",
+    **solver_options,
+):
+    """
+    Re-balance a schedule around hand edits without losing them
+
+    The edited cells (date_task -> person) are pinned and the rest of the
+    month is solved again with the same objective and constraints as a full
+    solve, seeded with the current schedule. With weeks only the cells within
+    that many calendar weeks of an edited cell are solved again, every other
+    cell keeps its current assignment, which leaves a much smaller model
+
+    backend is passed to SchedulingProblem and solver_options to its solve,
+    the scipy backend does not take the current schedule as a warm start
+
+    Returns the date_task -> person changes made to the schedule. Raises
+    ValueError and leaves the schedule as it was when no schedule keeps the
+    edits, e.g. an edit breaks the month's exclusions
+    """
+    edits = parse_keys(edits)
+    current = dict(schedule.assignments or {})
+
+    fixed = dict(edits)
+    if weeks is not None:
+        edited_weeks = {schedule.week_of(date_task) for date_task in edits}
+        fixed.update(
+            (date_task, person)
+            for date_task, person in current.items()
+            if date_task not in fixed
+            and all(
+                abs(schedule.week_of(date_task) - week) > weeks for week in edited_weeks
+            )
+        )
+
+    # solved into a copy so a failed repair does not touch the schedule
+    repaired = Schedule(schedule.year, schedule.month)
+    problem = SchedulingProblem(
+        repaired,
+        roster,
+        history,
+        stats=stats,
+        profiler=profiler,
+        fixed=fixed,
+        backend=backend,
+    )
+    problem.solve(warm_start=current, **solver_options)
+
+    if problem.prob.sol_status not in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        raise ValueError(
+            f"no schedule keeps the {len(edits)} edited assignments "
+            f"({LpStatus[problem.prob.status]})"
+        )
+
+    changes = {
+        date_task: person
+        for date_task, person in repaired.assignments.items()
+        if current.get(date_task) != person
+    }
+    schedule.update_assignments(changes)
+    return changes
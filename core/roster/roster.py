@@ -1,28 +1,49 @@
 import calendar
-import pandas as pd
 from core.task import Tasks
+from util.data import derived, is_one, read_csv, read_matrix
 
 calendar.setfirstweekday(calendar.SUNDAY)
 
 
 class Roster:
     def __init__(self):
-        # Read eligibility matrix
-        self.eligibility_df = pd.read_csv("data/prefs.csv")
-        self.eligibility_df.set_index("name", inplace=True)
+        # Read eligibility matrix, task -> eligible people in roster order,
+        # shared with every Roster until prefs.csv changes, never changed in place
+        self.eligible = derived("eligible", ["data/prefs.csv"], read_eligibility)
+        self.eligible_sets = {
+            task: frozenset(people) for task, people in self.eligible.items()
+        }
 
         # List of people and tasks
-        self.people = self.eligibility_df.index
+        self.people = list(read_matrix("data/prefs.csv"))
         self.tasks = Tasks()
         self.task_keys = [task.key for task in self.tasks]
 
-        self.excluded_tasks = self.create_excluded_tasks_cache()
+        # copied, set_excluded changes this roster's pairs only
+        self.excluded_tasks = set(
+            derived(
+                "excluded_tasks",
+                ["data/exclusions.csv", "data/duty-codes.csv"],
+                self.create_excluded_tasks_cache,
+            )
+        )
+
+        # bumped whenever eligibility or exclusions change, see app/render.py
+        self.version = 0
+
+    @property
+    def eligibility_df(self):
+        """the eligibility matrix as a frame of 1s and NaNs, e.g. for AssignmentStats"""
+        eligibility_df = read_csv("data/prefs.csv", index_col="name")
+        if len(eligibility_df.index) != len(self.people):
+            eligibility_df = eligibility_df.loc[self.people]
+        return eligibility_df
 
     def is_eligible(self, person, task) -> bool:
-        return self.eligibility_df.loc[person, task] == 1.0
+        return person in self.eligible_sets[task]
 
     def get_eligible(self, task):
-        return self.eligibility_df[task].dropna().index.to_list()
+        return list(self.eligible[task])
 
     def is_excluded(self, task1, task2):
         return (task1, task2) in self.excluded_tasks or (
@@ -30,21 +51,49 @@ class Roster:
             task1,
         ) in self.excluded_tasks
 
+    def remove_people(self, people):
+        """drop people from the roster, e.g. when they are temporarily unavailable"""
+        people = set(people)
+        self.people = [person for person in self.people if person not in people]
+        self.eligible = {
+            task: [person for person in eligible if person not in people]
+            for task, eligible in self.eligible.items()
+        }
+        self.eligible_sets = {
+            task: eligible - people for task, eligible in self.eligible_sets.items()
+        }
+        self.version += 1
+
+    def set_excluded(self, task1, task2, excluded=True):
+        """add or remove an exclusion pair, in both orders like the cache"""
+        for pair in ((task1, task2), (task2, task1)):
+            if excluded:
+                self.excluded_tasks.add(pair)
+            else:
+                self.excluded_tasks.discard(pair)
+        self.version += 1
+
     def create_excluded_tasks_cache(self):
         """set of exclusion pairs, use is_eligible to ignore ordering"""
 
         # Read exclusions matrix
-        exclusions_df = pd.read_csv("data/exclusions.csv", index_col=0)
-        exclusions_df.fillna(0, inplace=True)
+        exclusions = read_matrix("data/exclusions.csv")
 
         excluded_tasks = set()
 
         for task1 in self.task_keys:
             for task2 in self.task_keys:
-                if (
-                    exclusions_df.loc[task1, task2] == 1
-                    or exclusions_df.loc[task2, task1] == 1
-                ):
+                if is_one(exclusions[task1][task2]) or is_one(exclusions[task2][task1]):
                     excluded_tasks.add((task1, task2))
 
         return excluded_tasks
+
+
+def read_eligibility():
+    """task -> people marked 1 in data/prefs.csv, in the order of the csv"""
+    prefs = read_matrix("data/prefs.csv")
+    tasks = next(iter(prefs.values()), {})
+    return {
+        task: [person for person, row in prefs.items() if is_one(row[task])]
+        for task in tasks
+    }
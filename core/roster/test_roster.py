@@ -1,8 +1,46 @@
+import os
+import shutil
+import tempfile
 import unittest
 
+import pandas as pd
+
+from core.roster import Roster
+
 
 class RosterTests(unittest.TestCase):
-    pass
+
+    def setUp(self):
+        # a copy of data/ to edit, the roster reads it relative to the cwd
+        self.cwd = os.getcwd()
+        self.dir = tempfile.mkdtemp()
+        shutil.copytree("data", f"{self.dir}/data")
+        os.chdir(self.dir)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.dir)
+
+    def test_csvs_are_parsed_once(self):
+        assert Roster().eligibility_df is Roster().eligibility_df
+
+    def test_edited_csvs_are_read_again(self):
+        roster = Roster()
+        person = roster.get_eligible("song_leader")[0]
+        task1, task2 = next(iter(roster.excluded_tasks))
+
+        prefs = pd.read_csv("data/prefs.csv", index_col="name")
+        prefs.loc[person, "song_leader"] = None
+        prefs.to_csv("data/prefs.csv")
+        exclusions = pd.read_csv("data/exclusions.csv", index_col=0)
+        exclusions.loc[task1, task2] = exclusions.loc[task2, task1] = None
+        exclusions.to_csv("data/exclusions.csv")
+
+        edited = Roster()
+
+        assert not edited.is_eligible(person, "song_leader")
+        assert not edited.is_excluded(task1, task2)
+        assert roster.is_eligible(person, "song_leader")
 
 
 if __name__ == "__main__":
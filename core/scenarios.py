@@ -0,0 +1,126 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import pandas as pd
+from pulp import LpStatus
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.solver import SchedulingProblem
+from core.stats import AssignmentBiases, AssignmentStats
+
+
+class Scenario:
+    """
+    A variant of the month's scheduling problem, overrides applied on top of
+    the data/ csvs
+
+    name: label for the comparison table
+    biases: task -> {person: bias} merged over data/biases.csv
+    unavailable: people removed from the roster for this month
+    exclude: (task1, task2) pairs that should not go to the same man
+    allow: (task1, task2) pairs removed from exclusions.csv
+    save_file: alternative history to solve against
+    """
+
+    def __init__(
+        self,
+        name,
+        biases=None,
+        unavailable=(),
+        exclude=(),
+        allow=(),
+        save_file=None,
+    ):
+        self.name = name
+        self.biases = biases or {}
+        self.unavailable = list(unavailable)
+        self.exclude = [tuple(pair) for pair in exclude]
+        self.allow = [tuple(pair) for pair in allow]
+        self.save_file = save_file
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+    def apply(self, roster: Roster, bias):
+        """apply overrides to this process' roster and a copy of the biases"""
+        roster.remove_people(self.unavailable)
+
+        for task1, task2 in self.exclude:
+            roster.set_excluded(task1, task2)
+        for task1, task2 in self.allow:
+            roster.set_excluded(task1, task2, excluded=False)
+
+        bias = {task: dict(people) for task, people in bias.items()}
+        for task, people in self.biases.items():
+            bias.setdefault(task, {}).update(people)
+
+        return bias
+
+
+def solve_scenario(year, month, scenario: Scenario, save_file):
+    """
+    Build and solve one scenario. Runs in its own process so the roster,
+    biases and history it loads are isolated from other scenarios
+    """
+    start = perf_counter()
+
+    roster = Roster()
+    bias = scenario.apply(roster, AssignmentBiases().bias)
+    history = AssignmentHistory(scenario.save_file or save_file)
+    stats = AssignmentStats(roster, history)
+
+    schedule = Schedule(year, month)
+    problem = SchedulingProblem(schedule, roster, history, stats=stats, bias=bias)
+    problem.solve()
+
+    # fairness once this month's schedule is counted, history is not written
+    stats.record_assignments(schedule.assignments)
+
+    return {
+        "scenario": scenario.name,
+        "status": LpStatus[problem.prob.status],
+        "objective": problem.prob.objective.value(),
+        "fairness_deviation": stats.fairness_deviation(roster),
+        "solve_seconds": problem.solve_time,
+        "total_seconds": perf_counter() - start,
+        "assignments": schedule.assignments,
+    }
+
+
+def run_scenarios(year, month, scenarios, save_file, max_workers=None):
+    """
+    Solve each scenario in a separate process and compare them
+
+    Returns a frame indexed by scenario name with status, objective,
+    fairness deviation, timings and how many date_tasks differ from the first
+    scenario, and a dict of each scenario's assignments
+    """
+    # spawn so every worker loads its own TaskMetadata/AssignmentBiases
+    # singletons rather than inheriting the parent's
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        results = list(
+            executor.map(
+                solve_scenario,
+                [year] * len(scenarios),
+                [month] * len(scenarios),
+                scenarios,
+                [save_file] * len(scenarios),
+            )
+        )
+
+    assignments = {result["scenario"]: result.pop("assignments") for result in results}
+    comparison = pd.DataFrame(results).set_index("scenario")
+
+    baseline = assignments[scenarios[0].name]
+    comparison["changes"] = [
+        sum(baseline.get(date_task) != person for date_task, person in a.items())
+        for a in assignments.values()
+    ]
+
+    return comparison, assignments
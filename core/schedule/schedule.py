@@ -1,32 +1,60 @@
-from itertools import zip_longest
-import pandas as pd
+import hashlib
 import calendar
 
-
 calendar.setfirstweekday(calendar.SUNDAY)
 
-from core.task import TaskMetadata
-from util.helpers import trim_date_task_day, trim_task_name
+from core.task import DateTask, TaskMetadata
+from core.task.date_task import parse_keys
+from util.data import read_matrix
 from collections import OrderedDict
 
+HASH_MODULUS = 2**160
+
 
 class Schedule:
     def __init__(self, year, month):
         self.set_year_month(year, month)
-        self.service_times_df = pd.read_csv("data/service-times.csv", index_col=0)
+        service_times = read_matrix("data/service-times.csv")
 
-        self.duty_names_df = pd.read_csv("data/duty-names.csv", index_col=0)
-        self.duty_names = self.duty_names_df.to_dict()["Name"]  # label?
-        self.schedule_duty_order = self.duty_names_df.index.to_list()
+        duty_names = read_matrix("data/duty-names.csv")
+        self.duty_names = {
+            task_key: row["Name"] for task_key, row in duty_names.items()
+        }  # label?
+        self.schedule_duty_order = list(duty_names)
 
-        self.duty_codes_df = pd.read_csv("data/duty-codes.csv")
-        self.service_days = set(
-            self.duty_codes_df.select_dtypes(include="number").iloc[0, :].to_list()
-        )
+        metadata = TaskMetadata()
+        self.service_days = metadata.service_days
+
+        self.service_names = list(service_times)
+
+        # indexes over the csvs so assignments can be sorted and bucketed
+        # without searching lists or masking frames
+        self.duty_order = {
+            task_key: i for i, task_key in enumerate(self.schedule_duty_order)
+        }
+        self.service_duties = {
+            service: {task_key for task_key, value in row.items() if value != ""}
+            for service, row in service_times.items()
+        }
+        codes = metadata.duty_codes
+        self.service_duties["weekly"] = {key for key in codes if codes[key] == "w"}
+        self.service_duties["monthly"] = {key for key in codes if codes[key] == "m"}
 
-        self.service_names = self.service_times_df.index.to_list()
+        # the service_assignments buckets each task_key is shown in
+        self.duty_buckets = {}
+        for bucket, task_keys in self.service_duties.items():
+            for task_key in task_keys:
+                self.duty_buckets.setdefault(task_key, []).append(bucket)
 
         self.assignments = None
+        self.assignments_digest = 0
+
+    @property
+    def assignments_hash(self):
+        """content hash of the assignments, e.g. for render caches"""
+        if self.assignments is None:
+            return None
+        return f"{self.assignments_digest:040x}"
 
     def set_year_month(self, year, month):
         self.year = year
@@ -37,65 +65,95 @@ class Schedule:
             self.get_first_calendar_day_for_each_week()
         )
 
+        # DateTasks for this month, built once per task, see get_date_tasks
+        self.date_tasks = {}
+
     def set_assignments(self, assignments):
+        """assignments may be keyed by DateTask or date_task strings (from json/html)"""
         # sort keys based on names csv
-        sorted_assignments = dict(
+        self.assignments = dict(
             sorted(
-                assignments.items(),
-                key=lambda x: self.schedule_duty_order.index(trim_task_name(x[0])),
+                parse_keys(assignments).items(),
+                key=lambda x: self.duty_order[x[0].task_key],
             )
         )
+        self.assignments_digest = Schedule.hash_assignments(self.assignments)
 
-        self.assignments = sorted_assignments
-        self.service_assignments = Schedule.get_service_assignments(
-            self.service_times_df, self.assignments
-        )
-        self.service_assignments["weekly"] = Schedule.get_coded_duty_assignments(
-            self.duty_codes_df, "w", self.assignments
-        )
-        self.service_assignments["monthly"] = Schedule.get_coded_duty_assignments(
-            self.duty_codes_df, "m", self.assignments
+        self.service_assignments = OrderedDict(
+            (bucket, {}) for bucket in self.service_duties
         )
+        for date_task, person in self.assignments.items():
+            for bucket in self.duty_buckets.get(date_task.task_key, ()):
+                self.service_assignments[bucket][date_task] = person
 
-    def get_service_weeks(self):
-        return [
-            [week[day] for day in self.service_days if week[day]]
-            for week in self.calendar
-        ]
+    def update_assignment(self, date_task, person):
+        """
+        Reassign a single date_task in O(1), the date_task keeps its place in
+        the sorted assignments and its buckets. Falls back to set_assignments
+        for a date_task that is not in the schedule yet
+        """
+        date_task = DateTask.parse(date_task)
+        if self.assignments is None or date_task not in self.assignments:
+            return self.set_assignments({**(self.assignments or {}), date_task: person})
 
-    @staticmethod
-    def get_service_assignments(service_times_df, assignments):
-        service_assignments = OrderedDict()
+        self.assignments_digest = (
+            self.assignments_digest
+            - Schedule.hash_assignment(date_task, self.assignments[date_task])
+            + Schedule.hash_assignment(date_task, person)
+        ) % HASH_MODULUS
+
+        self.assignments[date_task] = person
+        for bucket in self.duty_buckets.get(date_task.task_key, ()):
+            self.service_assignments[bucket][date_task] = person
 
-        for i, service_time in enumerate(service_times_df.index.to_list()):
-            service_duties = set(service_times_df.iloc[i].dropna().index.to_list())
-            service_assignments[service_time] = {
-                task: assigned
-                for task, assigned in assignments.items()
-                if trim_task_name(task) in service_duties
-            }
+    def update_assignments(self, changes):
+        """
+        update_assignment for each date_task -> person change, changes may be
+        keyed by DateTask or date_task strings
+        """
+        for date_task, person in changes.items():
+            self.update_assignment(date_task, person)
 
-        return service_assignments
+    def week_of(self, date_task):
+        """index of the calendar week a date_task falls in"""
+        for i, week in enumerate(self.calendar):
+            if date_task.day in week:
+                return i
+        raise ValueError(f"{date_task} is not in {self.month}/{self.year}")
 
     @staticmethod
-    def get_coded_duty_assignments(duty_codes_df, code, assignments):
-        coded_duty = duty_codes_df.loc[0, (duty_codes_df == code).any()].index.to_list()
+    def hash_assignment(date_task, person):
+        return int.from_bytes(hashlib.sha1(f"{date_task}={person}".encode()).digest())
 
-        return {
-            task: assigned
-            for task, assigned in assignments.items()
-            if trim_task_name(task) in coded_duty
-        }
+    @staticmethod
+    def hash_assignments(assignments):
+        """
+        order independent content hash of date_task -> person assignments, the
+        sum of each assignment's hash so one assignment can be swapped in O(1)
+        """
+        return (
+            sum(
+                Schedule.hash_assignment(date_task, person)
+                for date_task, person in assignments.items()
+            )
+            % HASH_MODULUS
+        )
+
+    def get_service_weeks(self):
+        return [
+            [week[day] for day in self.service_days if week[day]]
+            for week in self.calendar
+        ]
 
     def get_date_tasks(self, task):
         """
         For tasks that happen per service or weekly, we need to treat them
-        as separate tasks that need to be scheduled. We will add
-        columns to the data like `{year}-{month}-{day}-{task_key}`.
+        as separate tasks that need to be scheduled. Each is a DateTask
+        written like `{year}-{month}-{day}-{task_key}` at the json/html
+        boundaries.
 
-        When using the date_task as an index into another frame, we
-        must trim the date_task back to its original form, e.g. `song_leader`
-        (task_key)
+        When using the date_task as an index into another frame, use
+        its task_key, e.g. `song_leader`
 
         duty_codes (TODO rename task_codes) is referenced to modify how we multiple the duties
         - tasks without any codes (not appearing in this df) are assumed
@@ -104,56 +162,29 @@ class Schedule:
         - a code of 'm' represents a monthly duty
 
         weeks are dated to the 1st day (Sunday) of the week
+
+        the list is built once per task and shared, do not modify it
         """
+        if task in self.date_tasks:
+            return self.date_tasks[task]
+
         date_tasks = []
         metadata = TaskMetadata()
         code = metadata.get_duty_code(task)
         if code == "m":
-            date_tasks.append(f"{self.year}-{self.month}-1-{task}")
+            date_tasks.append(DateTask(self.year, self.month, 1, task))
         elif code == "w":
             for i in self.first_calendar_days_for_each_week:
-                date_tasks.append(f"{self.year}-{self.month}-{i}-{task}")
+                date_tasks.append(DateTask(self.year, self.month, i, task))
         else:
             codes = str(code)
             for week in self.calendar:
                 for i, day in enumerate(week):
                     if str(i) in codes and day != 0:
-                        date_tasks.append(f"{self.year}-{self.month}-{day}-{task}")
-        return date_tasks
-
-    def week_aligned_date_tasks_pairs(self, task1, task2):
-        """
-        need to pad start to get weekly duties to align correctly
-        otherwise we exclude tasks in different weeks
-        """
-        date_tasks1 = self.get_date_tasks(task1)
-        date_tasks2 = self.get_date_tasks(task2)
-
-        task1_codes = TaskMetadata().get_duty_code(task1)
-        task2_codes = TaskMetadata().get_duty_code(task2)
+                        date_tasks.append(DateTask(self.year, self.month, day, task))
 
-        if len(date_tasks1) != len(date_tasks2):
-            task1_weekly, task2_weekly = "w" in task1_codes, "w" in task2_codes
-
-            if task1_weekly ^ task2_weekly:
-                weekly_date_tasks = date_tasks1 if "w" in task1_codes else date_tasks2
-                daily_date_tasks = date_tasks2 if "w" in task1_codes else date_tasks1
-
-                if (
-                    len(weekly_date_tasks) > len(daily_date_tasks)
-                    and int(trim_date_task_day(daily_date_tasks[0]))
-                    not in self.calendar[0]
-                ):
-                    daily_date_tasks = [0, *daily_date_tasks]
-
-                date_tasks1 = daily_date_tasks
-                date_tasks2 = weekly_date_tasks
-
-        return zip_longest(
-            date_tasks1,
-            date_tasks2,
-            fillvalue=0,
-        )
+        self.date_tasks[task] = date_tasks
+        return date_tasks
 
     def get_first_calendar_day_for_each_week(self):
         # week ordinals we have service
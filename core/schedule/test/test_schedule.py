@@ -1,5 +1,7 @@
 import unittest
+from datetime import date
 
+from core.history import AssignmentHistory
 from ..schedule import Schedule
 
 
@@ -10,21 +12,26 @@ class ScheduleTests(unittest.TestCase):
 
         assert len(sch.get_service_weeks()) == 5
 
-    def test_week_aligned_date_tasks_pairs(self):
-        sch = Schedule(2024, 9)
+    def test_update_assignment_matches_set_assignments(self):
+        history = AssignmentHistory("data/previous-assignments.json")
+        assignments = history.assignments_between(date(2025, 4, 1), date(2025, 5, 1))
+
+        sch = Schedule(2025, 4)
+        sch.set_assignments(assignments)
 
-        aligned_tasks1 = sch.week_aligned_date_tasks_pairs(
-            "sound_board_operator", "first_lesson"
-        )
+        date_task1, date_task2 = list(assignments)[:2]
+        changes = {
+            date_task1: assignments[date_task2],
+            date_task2: assignments[date_task1],
+        }
+        sch.update_assignments(changes)
 
-        aligned_tasks2 = sch.week_aligned_date_tasks_pairs(
-            "first_lesson", "sound_board_operator"
-        )
+        expected = Schedule(2025, 4)
+        expected.set_assignments({**assignments, **changes})
 
-        assert ("first_lesson-13", "sound_board_operator-1") not in aligned_tasks1
-        assert ("first_lesson-13", "sound_board_operator-1") not in aligned_tasks2
-        assert ("sound_board_operator-1", "first_lesson-13") not in aligned_tasks1
-        assert ("sound_board_operator-1", "first_lesson-13") not in aligned_tasks2
+        assert list(sch.assignments.items()) == list(expected.assignments.items())
+        assert sch.service_assignments == expected.service_assignments
+        assert sch.assignments_hash == expected.assignments_hash
 
 
 if __name__ == "__main__":
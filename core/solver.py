@@ -1,28 +1,149 @@
+import os
+import re
+import tempfile
 from collections import OrderedDict, defaultdict
 from datetime import datetime, timedelta
+from time import perf_counter
 from pulp import *
 
 from core.history import AssignmentHistory
+from core.matrix import MatrixProblem
+from core.task.date_task import parse_keys
 from core.roster import Roster
 from core.schedule import Schedule
-from core.stats import AssignmentStats, AssignmentBiases
+from core.stats import AssignmentStats, AssignmentBiases, bias_value
 from util import *
+from util.profiling import Profiler
 from itertools import chain
 
 from logging import debug
 
+# short names for the PuLP solvers that can be chosen from run.py, any other
+# name pulp.listSolvers() knows is passed through unchanged
+SOLVERS = {
+    "cbc": "PULP_CBC_CMD",
+    "highs": "HiGHS",
+    "highs_cmd": "HiGHS_CMD",
+    "glpk": "GLPK_CMD",
+    "scip": "SCIP_CMD",
+    "gurobi": "GUROBI",
+    "cplex": "CPLEX_CMD",
+}
+
+# how the model is built and solved, see SchedulingProblem
+BACKENDS = ("pulp", "scipy")
+
+
+def get_solver(
+    name="cbc",
+    verbose=False,
+    time_limit=None,
+    threads=None,
+    gap=None,
+    warm_start=False,
+    log_path=None,
+):
+    """
+    A PuLP solver by short name (see SOLVERS) or PuLP class name
+
+    time_limit: seconds before the solver stops with the best solution so far
+    gap: relative MIP gap, e.g. 0.01 stops once within 1% of the best bound
+    """
+    solver_name = SOLVERS.get(name.lower(), name)
+    if solver_name not in listSolvers():
+        raise ValueError(
+            f"Unknown solver {name}, expected one of {', '.join(SOLVERS)} "
+            f"or a PuLP solver name"
+        )
+
+    options = {"msg": verbose, "warmStart": warm_start}
+    for key, value in (
+        ("timeLimit", time_limit),
+        ("threads", threads),
+        ("gapRel", gap),
+        ("logPath", log_path),
+    ):
+        if value is not None:
+            options[key] = value
+
+    solver = getSolver(solver_name, **options)
+    if not solver.available():
+        raise ValueError(
+            f"Solver {name} is not installed, available solvers: "
+            f"{', '.join(listSolvers(onlyAvailable=True))}"
+        )
+    return solver
+
 
 class SchedulingProblem:
-    def __init__(self, schedule: Schedule, roster: Roster, history: AssignmentHistory):
+    def __init__(
+        self,
+        schedule: Schedule,
+        roster: Roster,
+        history: AssignmentHistory,
+        sparse=True,
+        stats: AssignmentStats = None,
+        bias=None,
+        profiler: Profiler = None,
+        fixed=None,
+        backend="pulp",
+        task_keys=None,
+        blocked=None,
+    ):
+        """
+        sparse: only introduce assignment variables for eligible (date_task, person)
+        pairs. The dense model creates a variable for every pair and pins the
+        ineligible ones to 0 in constrain_assign_only_eligible_people
+
+        stats: reuse stats that are kept up to date across several months
+        (see core/batch.py), computed from history if not given
+
+        bias: task -> {person: bias} overriding data/biases.csv (see
+        core/scenarios.py), AssignmentBiases if not given
+
+        profiler: collects timings, variable and constraint counts of the model
+        build and solve, a fresh Profiler if not given
+
+        fixed: date_task -> person cells of this month pinned to that person,
+        see core/repair.py. Only the pinned person gets a variable for a fixed
+        cell, and anything committed to history for this month is not pinned
+        as it is replaced by the fixed and re-solved cells
+
+        backend: "pulp" builds an LpProblem solved by the solver given to
+        solve(), "scipy" assembles the same rows as sparse arrays for
+        scipy.optimize.milp (HiGHS) in process, see core/matrix.py
+
+        task_keys: only schedule these tasks, e.g. one part of the month
+        solved on its own (see core/decompose.py), all of the roster's if not
+        given. The schedule gets only their assignments
+
+        blocked: (date_task, person) pairs that get no variable, e.g. people
+        already doing an excluded task that week in another part of the month
+        """
+        if backend not in BACKENDS:
+            raise ValueError(
+                f"Unknown backend {backend}, expected one of {', '.join(BACKENDS)}"
+            )
+        self.backend = backend
         self.schedule = schedule
+        self.sparse = sparse
         self.roster = roster
+        self.history = history
+        self.profiler = profiler if profiler is not None else Profiler()
+        self.fixed = parse_keys(fixed) if fixed else {}
 
         self.people = self.roster.people
 
-        self.tasks = self.roster.tasks
+        self.tasks = [
+            task
+            for task in self.roster.tasks
+            if task_keys is None or task.key in task_keys
+        ]
         self.task_keys = [task.key for task in self.tasks]
+        blocked = set(blocked or ())
 
-        stats = AssignmentStats(roster, history)
+        if stats is None:
+            stats = AssignmentStats(roster, history)
         self.excluded_tasks = self.roster.excluded_tasks
         self.is_excluded = self.roster.is_excluded
         self.get_eligible = self.roster.get_eligible
@@ -30,7 +151,7 @@ class SchedulingProblem:
         self.is_eligible = self.roster.is_eligible
         self.ideal_avg = stats.ideal_avg
         self.actual_avg = stats.actual_avg
-        self.bias = AssignmentBiases().bias
+        self.bias = bias if bias is not None else AssignmentBiases().bias
 
         self.get_date_tasks = self.schedule.get_date_tasks
 
@@ -39,58 +160,204 @@ class SchedulingProblem:
             dt for task_key in self.task_keys for dt in self.get_date_tasks(task_key)
         ]
 
-        self.historical_assignments_vars = list(history.assignment_history.items())
+        # people that may be assigned to each task in this model
+        self.candidates = {
+            task_key: (
+                [person for person in self.people if self.is_eligible(person, task_key)]
+                if self.sparse
+                else list(self.people)
+            )
+            for task_key in self.task_keys
+        }
+
+        # the only history that couples into this month's model is the
+        # consecutive-week lookback (see constrain_month_boundary_assignments)
+        # and assignments already committed for this month or later
+        lookback_start = datetime(
+            self.schedule.year, self.schedule.month, 1
+        ) - timedelta(days=7)
+        month_date_tasks = set(self.all_date_tasks) if fixed is not None else ()
+        self.historical_assignments_vars = [
+            (date_task, person)
+            for date_task, person in history.assignments_between(
+                lookback_start.date() if self.sparse else None
+            ).items()
+            if date_task not in month_date_tasks
+            and date_task.task_key in self.candidates
+        ]
 
-        # all possible assignment pair (person, task) combinations for month
+        # all possible assignment pair (person, task) combinations for month,
+        # a fixed cell only has its pinned person
+        self.month_assignment_vars = [
+            (date_task, person)
+            for task_key in self.task_keys
+            for person in self.candidates[task_key]
+            for date_task in self.get_date_tasks(task_key)
+            if self.fixed.get(date_task, person) == person
+            and (date_task in self.fixed or (date_task, person) not in blocked)
+        ]
+        self.month_assignment_vars += [
+            (date_task, person)
+            for date_task, person in self.fixed.items()
+            if date_task.task_key in self.candidates
+            and person not in self.candidates[date_task.task_key]
+        ]
 
         self.assignment_vars = list(
-            chain(
-                (
-                    (date_task, person)
-                    for person in self.people
-                    for date_task in self.all_date_tasks
-                    # if self.is_eligible(person, trim_task_name(date_task))
-                ),
-                self.historical_assignments_vars,
-            )
+            chain(self.month_assignment_vars, self.historical_assignments_vars)
         )
 
-        self.x = LpVariable.dicts(
-            "assignment",
-            self.assignment_vars,
-            cat="Binary",
-        )
+        with self.profiler.phase("variables") as phase:
+            if self.backend == "scipy":
+                self.prob = MatrixProblem(self.assignment_vars)
+                # key -> column of the constraint matrix
+                self.x = self.prob.columns
+            else:
+                self.prob = LpProblem("Scheduling_Problem", LpMaximize)
+                self.x = LpVariable.dicts(
+                    "assignment",
+                    self.assignment_vars,
+                    cat="Binary",
+                )
+
+            # people with a variable for each date_task
+            self.assignees = defaultdict(list)
+            for date_task, person in self.x.keys():
+                self.assignees[date_task].append(person)
+
+            phase["variables"] = len(self.x)
+            phase["historical_variables"] = len(self.historical_assignments_vars)
+
+        with self.profiler.phase("set_objective_function") as phase:
+            self.set_objective_function()
+            phase["terms"] = len(self.prob.objective)
+
+        constraints = [
+            self.constrain_past_assignments,
+            self.constrain_one_person_per_task,
+            self.constrain_do_not_assign_excluded_tasks,
+            self.constrain_do_not_over_assign_in_month,
+            self.constrain_do_not_over_assign_new_people,
+            self.constrain_month_boundary_assignments,
+        ]
+        if not self.sparse:
+            constraints.insert(2, self.constrain_assign_only_eligible_people)
+
+        for constrain in constraints:
+            with self.profiler.phase(constrain.__name__) as phase:
+                num_constraints = self.prob.numConstraints()
+                constrain()
+                phase["constraints"] = self.prob.numConstraints() - num_constraints
+
+    def solve(
+        self,
+        verbose=False,
+        warm_start=None,
+        solver="cbc",
+        time_limit=None,
+        threads=None,
+        gap=None,
+    ):
+        """
+        warm_start: optional date_task -> person assignments (e.g. a previously
+        saved schedule or previous_month_pattern()) used as the initial solution
+
+        solver, time_limit, threads, gap: see get_solver. When the time limit
+        or gap stops the search early the best feasible solution found is used
+
+        wall time of the solver call is kept in self.solve_time, status,
+        objective and CBC's gap are added to the profiler's solve phase
+
+        The scipy backend always solves with HiGHS, solver and threads are not
+        used and it takes no warm start
+        """
+        if self.backend == "scipy":
+            with self.profiler.phase("solve") as phase:
+                result = self.prob.solve(
+                    verbose=verbose, time_limit=time_limit, gap=gap
+                )
+                self.solve_time = self.prob.solve_time
+
+                phase.update(self.prob.summary())
+                phase["solver"] = "scipy.optimize.milp"
+                self.report_solve(phase, time_limit)
+
+            return self.set_solution(result)
+
+        if warm_start:
+            with self.profiler.phase("set_initial_assignments"):
+                self.set_initial_assignments(warm_start)
+
+        with self.profiler.phase("solve") as phase:
+            # the log goes to a file so CBC's gap can be read back whether
+            # or not it is echoed to the console
+            log_fd, log_path = tempfile.mkstemp(suffix=".log")
+            os.close(log_fd)
+            try:
+                backend = get_solver(
+                    solver,
+                    verbose=verbose,
+                    time_limit=time_limit,
+                    threads=threads,
+                    gap=gap,
+                    warm_start=bool(warm_start),
+                    log_path=log_path,
+                )
+
+                start = perf_counter()
+                result = self.prob.solve(backend)
+                self.solve_time = perf_counter() - start
+
+                with open(log_path) as log:
+                    phase.update(self.parse_cbc_log(log.read()))
+            finally:
+                os.remove(log_path)
 
-        self.set_objective_function()
-        self.constrain_past_assignments()
-        self.constrain_one_person_per_task()
-        self.constrain_assign_only_eligible_people()
-        self.constrain_do_not_assign_excluded_tasks()
-        self.constrain_do_not_over_assign_in_month()
-        self.constrain_do_not_over_assign_new_people()
-        self.constrain_month_boundary_assignments()
+            phase["solver"] = backend.name
+            self.report_solve(phase, time_limit)
 
-    def solve(self, verbose=False):
-        result = self.prob.solve(PULP_CBC_CMD(msg=verbose))
+        return self.set_solution(result)
 
-        if self.prob.status == -1:
+    def report_solve(self, phase, time_limit):
+        """add the outcome of the solve to its profiler phase and print it"""
+        phase["status"] = LpStatus[self.prob.status]
+        phase["sol_status"] = LpSolution[self.prob.sol_status]
+        phase["objective"] = self.prob.objective.value()
+        phase["variables"] = self.prob.numVariables()
+        phase["constraints"] = self.prob.numConstraints()
+
+        if self.prob.sol_status == LpSolutionIntegerFeasible:
+            gap_found = f" (gap {phase['gap']})" if "gap" in phase else ""
+            print(
+                f"stopped at the time limit or gap, using the best solution found{gap_found}"
+            )
+        elif self.prob.status == LpStatusNotSolved and time_limit is not None:
+            print(
+                f"no feasible solution found within the {time_limit}s time limit, "
+                "try a longer time limit"
+            )
+        elif self.prob.sol_status != LpSolutionOptimal:
             print(f"result: {LpStatus[self.prob.status]}")
             print("debug constraints")
             # for constraint in self.prob.constraints.values():
             #     debug(constraint)
 
+    def value(self, key):
+        """solved value of the (date_task, person) variable, None if not solved"""
+        if self.backend == "scipy":
+            return self.prob.value(key)
+        return self.x[key].varValue
+
+    def set_solution(self, result):
+        """set the schedule's assignments from the solved variables"""
         # TODO I think there is some unnecessary code in here
-        assignment = {}
-        for person in self.people:
-            assigned_tasks = [
-                task
-                for task in self.all_date_tasks
-                if self.x[(task, person)].varValue == 1
-            ]
-            if assigned_tasks:
-                assignment[person] = assigned_tasks
-                for task in assigned_tasks:
-                    if not self.is_eligible(person, trim_task_name(task)):
+        assignment = defaultdict(list)
+        for task in self.all_date_tasks:
+            for person in self.assignees[task]:
+                # feasible solutions from a stopped search may be off by a tolerance
+                if round(self.value((task, person)) or 0) == 1:
+                    assignment[person].append(task)
+                    if not self.is_eligible(person, task.task_key):
                         print(f"{person} is NOT eligible for {task}")
 
         schedule_assignments = OrderedDict()
@@ -108,79 +375,222 @@ class SchedulingProblem:
             if expected_task not in schedule_assignments.keys():
                 print(f"{expected_task} MISSING!")
 
-        self.schedule.set_assignments(schedule_assignments)
+        with self.profiler.phase("set_assignments"):
+            self.schedule.set_assignments(schedule_assignments)
 
         return result, self.schedule, self.roster
 
+    @staticmethod
+    def parse_cbc_log(log):
+        """
+        nodes, iterations and wallclock seconds from the summary CBC prints when
+        it finishes, and the gap when it stopped before proving optimality
+        """
+        summary = {}
+        for key, pattern, cast in (
+            ("nodes", r"^Enumerated nodes:\s+(\d+)", int),
+            ("iterations", r"^Total iterations:\s+(\d+)", int),
+            ("cbc_seconds", r"^Time \(Wallclock seconds\):\s+(\S+)", float),
+            ("gap", r"^Gap:\s+(\S+)", float),
+        ):
+            match = re.search(pattern, log, re.MULTILINE)
+            if match:
+                summary[key] = cast(match.group(1))
+        return summary
+
+    def set_initial_assignments(self, assignments):
+        """
+        Seed every variable with its value in assignments. Pairs that no longer
+        have a variable (e.g. the person is no longer eligible) are dropped, CBC
+        repairs or discards a start that has become infeasible
+        """
+        # past assignments are pinned, they win over the warm start
+        assignments = {
+            **parse_keys(assignments),
+            **dict(self.historical_assignments_vars),
+        }
+
+        for (date_task, person), var in self.x.items():
+            var.setInitialValue(1 if assignments.get(date_task) == person else 0)
+
+    def previous_month_pattern(self):
+        """
+        Last month's assignments carried over to this month's date_tasks, the
+        n-th date_task of a task gets whoever did the n-th date_task last month
+        """
+        year, month = self.schedule.year, self.schedule.month
+        first_of_month = datetime(year, month, 1)
+        first_of_prev_month = (first_of_month - timedelta(days=1)).replace(day=1)
+
+        previous = defaultdict(list)
+        for date_task, person in sorted(
+            self.history.assignments_between(
+                first_of_prev_month.date(), first_of_month.date()
+            ).items()
+        ):
+            previous[date_task.task_key].append(person)
+
+        pattern = {}
+        for task_key in self.task_keys:
+            if previous[task_key]:
+                for i, date_task in enumerate(self.get_date_tasks(task_key)):
+                    pattern[date_task] = previous[task_key][i % len(previous[task_key])]
+
+        return pattern
+
     def set_objective_function(self):
         """
         We want to choose assignees so as to Maximize the deviation between their historical mean and the ideal mean
         Over time, we should converge to everyone having the ideal mean
         """
-        self.prob = LpProblem("Scheduling_Problem", LpMaximize)
-        self.prob += lpSum(
-            # maximize the difference between ideal and actual averages
+        terms = [
             (
-                self.ideal_avg[trim_task_name(date_task)]
+                (date_task, person),
+                # maximize the difference between ideal and actual averages
+                self.ideal_avg[date_task.task_key]
                 - (
-                    self.actual_avg.loc[person, trim_task_name(date_task)]
+                    self.actual_avg.at[person, date_task.task_key]
                     * self.bias_value(person, date_task)
-                )
+                ),
             )
+            for date_task, person in self.month_assignment_vars
+        ]
+
+        if self.backend == "scipy":
+            self.prob.set_objective(terms)
+        else:
             # 1 if assigned, 0 otherwise
-            * self.x[(date_task, person)]
-            for person in self.people
-            for date_task in self.all_date_tasks
-            # if self.is_eligible(person, trim_task_name(date_task))
+            self.prob += LpAffineExpression(
+                [(self.x[key], coefficient) for key, coefficient in terms]
+            )
+
+    def add_rows(self, rows):
+        """
+        add ([(key, coefficient), ...], sense, rhs) constraint rows to the
+        model, built directly rather than through PuLP's operators
+        """
+        if self.backend == "scipy":
+            self.prob.extend(rows)
+            return
+
+        self.prob.extend(
+            LpConstraint(
+                LpAffineExpression(
+                    [(self.x[key], coefficient) for key, coefficient in terms]
+                ),
+                sense=sense,
+                rhs=rhs,
+            )
+            for terms, sense, rhs in rows
         )
 
+    def row(self, keys, sense, rhs):
+        """the constraint row sum(x[key] for key in keys) <sense> rhs"""
+        return [(key, 1) for key in keys], sense, rhs
+
     def constrain_past_assignments(self):
         """Constrain all past assignments variables to 1"""
-        for task, person in self.historical_assignments_vars:
-            self.prob += self.x[(task, person)] == 1
+        self.add_rows(
+            self.row([key], LpConstraintEQ, 1)
+            for key in self.historical_assignments_vars
+        )
 
     def constrain_one_person_per_task(self):
-        for task in self.all_date_tasks:
-            self.prob += (
-                lpSum(
-                    self.x[(task, person)]
-                    for person in self.people
-                    # if self.is_eligible(person, trim_task_name(task))
-                )
-                == 1
+        self.add_rows(
+            self.row(
+                [(task, person) for person in self.assignees[task]], LpConstraintEQ, 1
             )
+            for task in self.all_date_tasks
+        )
 
-    # TODO try only introducing vars with eligible people
     def constrain_assign_only_eligible_people(self):
-        for person in self.people:
-            for task in self.task_keys:
-                if not self.is_eligible(person, task):
-                    for ineligible_task in self.get_date_tasks(task):
-                        self.prob += self.x[(ineligible_task, person)] == 0
+        """only needed by the dense model, the sparse model has no ineligible variables"""
+        self.add_rows(
+            self.row([(ineligible_task, person)], LpConstraintEQ, 0)
+            for person in self.people
+            for task in self.task_keys
+            if not self.is_eligible(person, task)
+            for ineligible_task in self.get_date_tasks(task)
+            if (ineligible_task, person) in self.x
+        )
 
     def constrain_do_not_assign_excluded_tasks(self):
-        for task1, task2 in self.excluded_tasks:
-            for person in self.people:
-                if self.is_eligible(person, task1) and self.is_eligible(person, task2):
-                    for ineligible_pair in self.schedule.week_aligned_date_tasks_pairs(
-                        task1, task2
-                    ):
-                        if (
-                            0 not in ineligible_pair
-                            and ineligible_pair[0] != ineligible_pair[1]
-                        ):
-                            self.prob += (
-                                self.x[(ineligible_pair[0], person)]
-                                + self.x[(ineligible_pair[1], person)]
-                                <= 1
+        """
+        no one does two excluded tasks in the same calendar week, one row per
+        person eligible for both and pair of date_tasks in a week
+        """
+        week_index = self.week_index()
+        eligible = self.roster.eligible_sets
+
+        rows = []
+        for task1, task2 in self.excluded_task_pairs():
+            # eligible for both, in roster order
+            people = [
+                person
+                for person in self.people
+                if person in eligible[task1] and person in eligible[task2]
+            ]
+            if not people:
+                continue
+
+            for week, date_tasks1 in week_index[task1].items():
+                for date_task1 in date_tasks1:
+                    for date_task2 in week_index[task2].get(week, ()):
+                        rows.extend(
+                            self.row(
+                                [(date_task1, person), (date_task2, person)],
+                                LpConstraintLE,
+                                1,
                             )
+                            for person in people
+                            # a fixed cell only has its pinned person
+                            if (date_task1, person) in self.x
+                            and (date_task2, person) in self.x
+                        )
+
+        self.add_rows(rows)
+
+    def week_index(self):
+        """task_key -> calendar week -> the task's date_tasks that week"""
+        week_of_day = {
+            day: week
+            for week, days in enumerate(self.schedule.calendar)
+            for day in days
+            if day
+        }
+        week_index = {}
+        for task_key in self.task_keys:
+            week_index[task_key] = defaultdict(list)
+            for date_task in self.get_date_tasks(task_key):
+                week_index[task_key][week_of_day[date_task.day]].append(date_task)
+        return week_index
+
+    def excluded_task_pairs(self):
+        """each pair of different excluded tasks once, both on the roster"""
+        task_keys = set(self.task_keys)
+        return sorted(
+            {
+                tuple(sorted(pair))
+                for pair in self.excluded_tasks
+                if pair[0] != pair[1] and set(pair) <= task_keys
+            }
+        )
 
     def constrain_do_not_over_assign_in_month(self):
+        rows = []
         for task in self.task_keys:
             eligible = self.get_eligible(task)
             num_eligible = len(eligible)
+            date_tasks = self.get_date_tasks(task)
             for person in eligible:
-                date_tasks = self.get_date_tasks(task)
+                assigned = [
+                    (date_task, person)
+                    for date_task in date_tasks
+                    if (date_task, person) in self.x
+                ]
+                # every cell of the task is fixed to someone else
+                if not assigned:
+                    continue
 
                 if num_eligible >= len(date_tasks):
                     # we have an abundance everyone should go at most once
@@ -188,21 +598,20 @@ class SchedulingProblem:
                     # TODO catchup mechanism, if someone is behind in being assigned to a certain task
                     # we can allow them to go twice in one month by checking if their actual_avg is below some threshold
                     # when compared to the ideal_avg
-                    self.prob += (
-                        lpSum(self.x[(date_task, person)] for date_task in date_tasks)
-                        <= 1
-                    )
+                    rows.append(self.row(assigned, LpConstraintLE, 1))
                 else:
                     # Some may repeat, but no one should repeat more than one more than the other people
-                    self.prob += (
-                        lpSum(self.x[(date_task, person)] for date_task in date_tasks)
-                        <= (len(date_tasks) + num_eligible - 1) / num_eligible
+                    rows.append(
+                        self.row(
+                            assigned,
+                            LpConstraintLE,
+                            (len(date_tasks) + num_eligible - 1) / num_eligible,
+                        )
                     )
                     # And everyone should get assigned at least once
-                    self.prob += (
-                        lpSum(self.x[(date_task, person)] for date_task in date_tasks)
-                        >= 1
-                    )
+                    rows.append(self.row(assigned, LpConstraintGE, 1))
+
+        self.add_rows(rows)
 
     def constrain_do_not_over_assign_new_people(self):
         """solved by boosting ideal avg, see stats.py"""
@@ -212,85 +621,49 @@ class SchedulingProblem:
         """
         do not double assign person in next week if there are multiple choices
         month boundary doesn't matter rename method
-        """
 
+        consecutive date_tasks of each task are this month's and any known
+        assignments from the week before the month (or committed later)
+        """
         today = datetime(self.schedule.year, self.schedule.month, 1)
         first_of_month = today.replace(day=1)
-        last_week_prev_month = first_of_month - timedelta(days=7)
-
-        filtered_assignments = {}
-        for date_task, assigned in self.assignment_vars:
-            date_part, task_part = date_task.rsplit("-", 1)
-            date_obj = datetime.strptime(date_part, "%Y-%m-%d")
+        last_week_prev_month = (first_of_month - timedelta(days=7)).date()
 
-            if date_obj >= last_week_prev_month:
-                filtered_assignments[date_task] = assigned
-
-        task_consec_pairs_dict = defaultdict(list)
-        grouped_tasks = defaultdict(list)
-
-        for date_task in filtered_assignments.keys():
-            date_part, task_part = date_task.rsplit("-", 1)
-            grouped_tasks[task_part].append(date_task)
-
-        # Sort and create tuples
         # assumes we schedule contiguous months
-        # sort, then group by
-        # {
-        # task: [(dt0,dt1), (dt1, dt2), (dt2, dt3), (dt3, dt4])]
-        # }
+        grouped_tasks = defaultdict(set)
+        for task_key in self.task_keys:
+            grouped_tasks[task_key].update(self.get_date_tasks(task_key))
+        for date_task, _ in self.historical_assignments_vars:
+            if date_task.date >= last_week_prev_month:
+                grouped_tasks[date_task.task_key].add(date_task)
+
+        rows = []
         for task, date_tasks in grouped_tasks.items():
-            sorted_dates = sorted(
-                date_tasks,
-                key=lambda x: datetime.strptime(x.rsplit("-", 1)[0], "%Y-%m-%d"),
+            eligible = (
+                self.roster.eligible_sets[task] if task in self.candidates else ()
             )
 
-            task_consec_pairs_dict[task] = [
-                (sorted_dates[i], sorted_dates[i + 1])
-                for i in range(len(sorted_dates) - 1)
-            ]
-
-        task_consec_pairs_dict = dict(task_consec_pairs_dict)
+            # Must check that there are enough people to go around
+            if len(eligible) < 2:
+                continue
+
+            sorted_dates = sorted(date_tasks)
+            for earlier_date_task, later_date_task in zip(
+                sorted_dates, sorted_dates[1:]
+            ):
+                # an earlier date from last month is a known assignment, only
+                # the assigned person has a variable for it
+                rows.extend(
+                    self.row(
+                        [(earlier_date_task, person), (later_date_task, person)],
+                        LpConstraintLE,
+                        1,
+                    )
+                    for person in self.assignees[later_date_task]
+                    if person in eligible and (earlier_date_task, person) in self.x
+                )
 
-        # TODO
-        # TODO
-        for person in self.people:
-            for task, consec_date_tasks_pairs in task_consec_pairs_dict.items():
-                if (
-                    self.is_eligible(person, task)
-                    # Must check that there are enough people to go around
-                    and len(self.get_eligible(task)) >= 2
-                ):
-                    for i, (earlier_date_task, later_date_task) in enumerate(
-                        consec_date_tasks_pairs
-                    ):
-                        if (
-                            # earliest date is from last month, this assignment is known
-                            i == 0
-                            and person == filtered_assignments[earlier_date_task]
-                        ) or i > 0:
-                            self.prob += (
-                                self.x[
-                                    (
-                                        earlier_date_task,
-                                        person,
-                                    )
-                                ]
-                                + self.x[(later_date_task, person)]
-                            ) <= 1
-                        # print(f"{person}: {earlier_date_task} + {later_date_task} <= 1")
+        self.add_rows(rows)
 
     def bias_value(self, person, date_task):
-        bias_for_task = self.bias[trim_task_name(date_task)]
-
-        if person not in bias_for_task:
-            return 1
-
-        bias_value = bias_for_task[person]
-
-        if bias_value == 1:
-            return 1
-        elif bias_value < 1:
-            return 1 / max(1 - bias_value, 0.01)
-        elif bias_value > 1:
-            return 1 - bias_value
+        return bias_value(self.bias[date_task.task_key], person)
@@ -1,2 +1,3 @@
 from .stats import AssignmentStats
-from .biases import AssignmentBiases
+from .biases import AssignmentBiases, bias_value
+from .decayed import DecayedStats
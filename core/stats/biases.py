@@ -1,21 +1,35 @@
 import os
 
-import pandas as pd
+from util.data import read_csv
+from util.decorators import reloaded_singleton
 
-from util.decorators import singleton
 
-
-@singleton
+@reloaded_singleton("data/biases.csv", "data/prefs.csv")
 class AssignmentBiases:
     def __init__(self):
         # Read biases matrix
         if os.path.isfile("data/biases.csv"):
-            bias_df = pd.read_csv("data/biases.csv", index_col=0)
-            bias_df.fillna(1, inplace=True)
+            bias_df = read_csv("data/biases.csv", index_col=0).fillna(1)
         else:
-            eligibility_df = pd.read_csv("data/prefs.csv")
-            eligibility_df.set_index("name", inplace=True)
-            bias_df = eligibility_df.copy()
+            bias_df = read_csv("data/prefs.csv", index_col="name").copy()
             bias_df[:] = 1
 
         self.bias = bias_df.to_dict()
+
+
+def bias_value(bias_for_task, person):
+    """
+    multiplier of a person's actual average in the objective, from their bias
+    for the task: below 1 makes them look further behind, above 1 ahead
+    """
+    if person not in bias_for_task:
+        return 1
+
+    bias = bias_for_task[person]
+
+    if bias == 1:
+        return 1
+    elif bias < 1:
+        return 1 / max(1 - bias, 0.01)
+    elif bias > 1:
+        return 1 - bias
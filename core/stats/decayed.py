@@ -0,0 +1,200 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.task.date_task import DateTask
+from util.data import file_version
+from util.helpers import write_dict_to_file
+from .stats import AssignmentStats
+
+# months until an assignment counts half as much
+DEFAULT_HALF_LIFE = 12
+
+PREFS_UPDATE_HISTORY = "data/prefs_update_history.csv"
+
+
+def month_number(date):
+    return date.year * 12 + date.month - 1
+
+
+class DecayedStats(AssignmentStats):
+    """
+    AssignmentStats where an assignment counts less the older it is, halving
+    every half_life months, so last month weighs more than years ago
+
+    actual_avg is the decayed count of a person's assignments to a task over
+    the decayed count of the task's dates since their pref update, 0 without
+    any. New people are boosted by their undecayed rounds as in
+    AssignmentStats
+
+    The counters are kept in a json file next to the history (path, by
+    default <history>.decayed.json) and updated by record_assignments, so
+    loading them reads people x tasks numbers rather than the whole history.
+    They are rebuilt from the history when it or the pref update dates were
+    changed by something else, e.g. a hand edit of the save file. Record to
+    the history first and then here, as core/batch.py and PUT /commit do
+    """
+
+    def __init__(
+        self,
+        roster: Roster,
+        history: AssignmentHistory,
+        half_life=DEFAULT_HALF_LIFE,
+        path=None,
+    ):
+        self.history = history
+        self.half_life = half_life
+        self.decay_rate = 0.5 ** (1 / half_life)
+        self.path = path or (
+            os.path.splitext(history.assignment_history_file)[0] + ".decayed.json"
+        )
+
+        self.ideal_avg = self.ideal_averages(roster)
+        self.people = pd.Index(roster.people)
+        self.task_keys = pd.Index(roster.task_keys)
+        self.start_dates = history.pref_start_dates().reindex(
+            index=self.people, columns=self.task_keys
+        )
+
+        self.version = 0
+        if not self.load():
+            self.rebuild()
+            self.save()
+        self.update_averages()
+
+    def data_version(self):
+        """what the counters were computed from, json friendly"""
+        return [
+            list(file_version(path) or ())
+            for path in (self.history.assignment_history_file, PREFS_UPDATE_HISTORY)
+        ]
+
+    def load(self):
+        """read the saved counters, False when missing or out of date"""
+        if not os.path.exists(self.path):
+            return False
+
+        with open(self.path, "r") as f:
+            saved = json.load(f)
+
+        if (
+            saved.get("half_life") != self.half_life
+            or saved.get("data_version") != self.data_version()
+            or saved.get("people") != list(self.people)
+            or saved.get("task_keys") != list(self.task_keys)
+        ):
+            return False
+
+        self.as_of = saved["as_of"]
+        for name in ("assignment_frequency", "decayed_rounds", "eligible_rounds"):
+            setattr(
+                self,
+                name,
+                pd.DataFrame(saved[name], index=self.people, columns=self.task_keys),
+            )
+        return True
+
+    def save(self):
+        write_dict_to_file(
+            {
+                "half_life": self.half_life,
+                "data_version": self.data_version(),
+                "as_of": self.as_of,
+                "people": list(self.people),
+                "task_keys": list(self.task_keys),
+                "assignment_frequency": self.assignment_frequency.values.tolist(),
+                "decayed_rounds": self.decayed_rounds.values.tolist(),
+                "eligible_rounds": self.eligible_rounds.values.tolist(),
+            },
+            self.path,
+        )
+
+    def rebuild(self):
+        """the counters from the whole history, decayed to its last month"""
+        assignments = self.history.assignments_frame()
+        months = assignments["date"].dt.year * 12 + assignments["date"].dt.month - 1
+        self.as_of = int(months.max()) if len(months) else None
+        weights = self.decay_rate ** (self.as_of - months) if len(months) else months
+
+        self.assignment_frequency = (
+            assignments.assign(weight=weights)
+            .groupby(["person", "task_key"])["weight"]
+            .sum()
+            .unstack(fill_value=0)
+            .reindex(index=self.people, columns=self.task_keys, fill_value=0)
+            .astype(float)
+        )
+        self.eligible_rounds = self.rounds(
+            assignments, self.start_dates, self.people, self.task_keys
+        )
+
+        # decayed weight of the task's dates on or after each start date
+        self.decayed_rounds = pd.DataFrame(
+            0.0, index=self.people, columns=self.task_keys
+        )
+        for task in self.task_keys:
+            in_task = (assignments["task_key"] == task).to_numpy()
+            if not in_task.any():
+                continue
+
+            order = np.argsort(assignments["date"].to_numpy()[in_task])
+            dates = assignments["date"].to_numpy()[in_task][order]
+            # weight of every date from each one on
+            after = np.cumsum(weights.to_numpy()[in_task][order][::-1])[::-1]
+            after = np.append(after, 0)
+
+            starts = self.start_dates[task]
+            eligible = starts.notna().to_numpy()
+            first = np.searchsorted(
+                dates, starts.to_numpy()[eligible].astype(dates.dtype), side="left"
+            )
+            self.decayed_rounds.loc[eligible, task] = after[first]
+
+    def decay(self, months):
+        factor = self.decay_rate**months
+        self.assignment_frequency *= factor
+        self.decayed_rounds *= factor
+
+    def averages(self):
+        # both counters are decayed to as_of, their ratio is the same whichever
+        # month that is. Clipping the rounds as AssignmentStats does would not
+        # be, decayed rounds fall below 1
+        return (
+            self.assignment_frequency
+            / self.decayed_rounds.where(self.decayed_rounds > 0)
+        ).fillna(0)
+
+    def record_assignments(self, assignments, count=1):
+        """
+        Add newly committed assignments to the counters and save them. A month
+        after the last one recorded first decays everything up to it
+        """
+        for date_task, person in sorted(
+            (DateTask.parse(date_task), person)
+            for date_task, person in assignments.items()
+        ):
+            task_key = date_task.task_key
+            if task_key not in self.task_keys:
+                continue
+
+            month = month_number(date_task.date)
+            if self.as_of is None:
+                self.as_of = month
+            elif month > self.as_of:
+                self.decay(month - self.as_of)
+                self.as_of = month
+            weight = count * self.decay_rate ** (self.as_of - month)
+
+            if person in self.people:
+                self.assignment_frequency.at[person, task_key] += weight
+
+            eligible = self.start_dates[task_key] <= pd.Timestamp(date_task.date)
+            self.decayed_rounds[task_key] += weight * eligible
+            self.eligible_rounds[task_key] += count * eligible
+
+        self.update_averages()
+        self.save()
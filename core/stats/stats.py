@@ -1,6 +1,7 @@
-import re
+import numpy as np
 import pandas as pd
 from core.history import AssignmentHistory
+from core.task.date_task import DateTask
 from core.roster import Roster
 from util.helpers import write_dict_to_file
 
@@ -9,71 +10,34 @@ gamma = 0.2  # decay parameter for new people
 
 class AssignmentStats:
     def __init__(self, roster: Roster, history: AssignmentHistory):
-        self.ideal_avg = {
-            task: 1 / count
-            for task, count in roster.eligibility_df.sum(axis=0).to_dict().items()
-        }
+        self.ideal_avg = self.ideal_averages(roster)
+
+        people = pd.Index(roster.people)
+        task_keys = pd.Index(roster.task_keys)
+
+        # typed history, one row per assignment: date, task_key, person
+        assignments = history.assignments_frame()
 
-        # Historical assignments Create DataFrame from dictionary
-        assignment_history_df = pd.DataFrame(
-            {
-                "Key": history.assignment_history.keys(),
-                "Value": history.assignment_history.values(),
-            }
+        # how many times each person has been assigned to each task
+        # new persons to history get a frequency of 0
+        self.assignment_frequency = (
+            assignments.groupby(["person", "task_key"])
+            .size()
+            .unstack(fill_value=0)
+            .reindex(index=people, columns=task_keys, fill_value=0)
         )
 
-        # Pivot to make values the index and keys the columns
-        assignment_history_df = assignment_history_df.pivot_table(
-            index="Value", columns="Key", aggfunc=lambda x: 1, fill_value=0
+        # count how many times the person has been eligible for a task since joining
+        self.start_dates = history.pref_start_dates().reindex(
+            index=people, columns=task_keys
+        )
+        self.eligible_rounds = self.rounds(
+            assignments, self.start_dates, people, task_keys
         )
-        # add new persons to rounds/history
-        # set their assignment history to 1 so they do not get biased in first schedule
-        for person in roster.people:
-            if person not in assignment_history_df.index:
-                assignment_history_df.loc[person] = 0
 
-        # if person is chosen for task, compute the difference between ideal and avg
-        # TODO: remove? Or implement diff indicators on frontend
-        # Render depends on this still
-        self.assignment_delta = {task: {} for task in roster.task_keys}
-
-        # actual avg per person per task
-        # could this be done in a jinja script tag?
-        self.actual_avg = pd.DataFrame(index=roster.people, columns=roster.task_keys)
-        for person in roster.people:
-            for task in roster.task_keys:
-                if person in assignment_history_df.index:
-                    date_task_pattern = re.compile(f"[0-9]+-[0-9]+-(?:[0-9]+-)?{task}")
-                    assignment_frequency = assignment_history_df.loc[
-                        person,
-                        assignment_history_df.columns.str.contains(
-                            date_task_pattern, regex=True
-                        ),
-                    ].sum()
-
-                    # count how many times the person has been eligible for a task since joining
-                    rounds = max(history.rounds(person, task), 1)
-
-                    self.actual_avg.at[person, task] = assignment_frequency / (rounds)
-
-                    # boost new people
-                    if rounds <= 5:
-                        actual_avg = self.actual_avg.at[person, task]
-                        self.actual_avg.at[person, task] = (
-                            1 if actual_avg == 0 else actual_avg
-                        ) * (1 + (1 - gamma * rounds))
-
-                    self.assignment_delta[task][person] = round(
-                        (
-                            (self.actual_avg.at[person, task] - self.ideal_avg[task])
-                            / self.ideal_avg[task]
-                        )
-                        * 100,
-                        2,
-                    )
-
-                else:
-                    self.actual_avg.at[person, task] = 0
+        # bumped whenever the averages change, see app/render.py
+        self.version = 0
+        self.update_averages()
 
         # TODO write to stats dir
         write_dict_to_file(self.ideal_avg, "/Users/stipton/Desktop/avgideal.json")
@@ -81,3 +45,96 @@ class AssignmentStats:
             self.actual_avg.to_dict(), "/Users/stipton/Desktop/avgactual.json"
         )
         write_dict_to_file(self.assignment_delta, "/Users/stipton/Desktop/delta.json")
+
+    @staticmethod
+    def ideal_averages(roster: Roster):
+        """task -> 1 / number of people eligible for it"""
+        return {
+            task: 1 / count
+            for task, count in roster.eligibility_df.sum(axis=0).to_dict().items()
+        }
+
+    def averages(self):
+        """actual avg per person per task, before new people are boosted"""
+        return self.assignment_frequency / self.eligible_rounds.clip(lower=1)
+
+    def update_averages(self):
+        rounds = self.eligible_rounds.clip(lower=1)
+
+        # actual avg per person per task
+        actual_avg = self.averages()
+
+        # boost new people
+        boosted = actual_avg.mask(actual_avg == 0, 1) * (1 + (1 - gamma * rounds))
+        self.actual_avg = actual_avg.mask(rounds <= 5, boosted)
+
+        # if person is chosen for task, compute the difference between ideal and avg
+        # TODO: remove? Or implement diff indicators on frontend
+        # Render depends on this still
+        ideal_avg = pd.Series(self.ideal_avg).reindex(self.actual_avg.columns)
+        self.assignment_delta = (
+            ((self.actual_avg - ideal_avg) / ideal_avg * 100).round(2).to_dict()
+        )
+        self.version += 1
+
+    def fairness_deviation(self, roster: Roster):
+        """
+        standard deviation of the relative difference between actual and ideal
+        averages over every eligible (person, task) pair, 0 is perfectly fair
+        """
+        eligible = roster.eligibility_df.reindex(
+            index=self.actual_avg.index, columns=self.actual_avg.columns
+        ).eq(1)
+        ideal_avg = pd.Series(self.ideal_avg).reindex(self.actual_avg.columns)
+        relative = (self.actual_avg - ideal_avg) / ideal_avg
+
+        return float(relative.where(eligible).stack().std())
+
+    def record_assignments(self, assignments, count=1):
+        """
+        Update frequencies and rounds for newly committed assignments without
+        rebuilding from the whole history, see AssignmentHistory.record_assignments
+        """
+        for date_task, person in assignments.items():
+            date_task = DateTask.parse(date_task)
+            task_key = date_task.task_key
+            if task_key not in self.eligible_rounds.columns:
+                continue
+
+            if person in self.assignment_frequency.index:
+                self.assignment_frequency.at[person, task_key] += count
+
+            self.eligible_rounds[task_key] += count * (
+                self.start_dates[task_key] <= pd.Timestamp(date_task.date)
+            )
+
+        self.update_averages()
+
+    def remove_assignments(self, assignments):
+        self.record_assignments(assignments, count=-1)
+
+    @staticmethod
+    def rounds(assignments, start_dates, people, task_keys):
+        """
+        person x task_key frame counting the date_tasks of each task in the history
+        on or after the person's pref update date for that task, see
+        AssignmentHistory.rounds
+        """
+        start_dates = start_dates.reindex(index=people, columns=task_keys)
+        rounds = pd.DataFrame(0, index=people, columns=task_keys)
+
+        task_dates = assignments.groupby("task_key")["date"]
+        for task in task_keys:
+            if task not in task_dates.groups:
+                continue
+
+            dates = np.sort(task_dates.get_group(task).to_numpy())
+            starts = start_dates[task]
+            eligible = starts.notna().to_numpy()
+
+            counts = len(dates) - np.searchsorted(
+                dates, starts.to_numpy()[eligible].astype(dates.dtype), side="left"
+            )
+            rounds.loc[eligible, task] = counts
+
+        return rounds
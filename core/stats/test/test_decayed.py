@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from ..decayed import DecayedStats
+from ..stats import AssignmentStats
+
+
+class DecayedStatsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.history_file = os.path.join(self.tmp, "history.json")
+        shutil.copy("data/previous-assignments.json", self.history_file)
+
+        self.roster = Roster()
+        self.history = AssignmentHistory(self.history_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_no_decay_matches_full_stats(self):
+        stats = DecayedStats(self.roster, self.history, half_life=float("inf"))
+        full = AssignmentStats(self.roster, self.history)
+
+        # without any rounds the full stats divide the assignments by 1
+        eligible = full.eligible_rounds > 0
+        pd.testing.assert_frame_equal(
+            stats.actual_avg.where(eligible),
+            full.actual_avg.where(eligible),
+            check_dtype=False,
+        )
+
+    def test_record_assignments_matches_rebuild(self):
+        stats = DecayedStats(self.roster, self.history, half_life=6)
+        assert os.path.exists(os.path.join(self.tmp, "history.decayed.json"))
+
+        usher = self.roster.get_eligible("usher")[0]
+        lesson = self.roster.get_eligible("lesson")[0]
+        assignments = {"2025-9-7-usher": usher, "2025-9-7-lesson": lesson}
+
+        self.history.record_assignments(assignments)
+        stats.record_assignments(assignments)
+
+        # the saved counters are read back without the history
+        loaded = DecayedStats(self.roster, self.history, half_life=6)
+        assert loaded.as_of == stats.as_of
+        pd.testing.assert_frame_equal(loaded.actual_avg, stats.actual_avg)
+
+        rebuilt = DecayedStats(
+            self.roster,
+            self.history,
+            half_life=6,
+            path=os.path.join(self.tmp, "rebuilt.json"),
+        )
+        pd.testing.assert_frame_equal(rebuilt.actual_avg, stats.actual_avg)
+
+    def test_record_then_remove_matches_rebuild(self):
+        stats = DecayedStats(self.roster, self.history, half_life=6)
+        assignments = {
+            f"2026-1-{day}-{task_key}": self.roster.get_eligible(task_key)[0]
+            for day in (4, 11, 18)
+            for task_key in ("usher", "lesson", "song_leader")
+        }
+
+        self.history.record_assignments(assignments)
+        stats.record_assignments(assignments)
+        self.history.remove_assignments(assignments)
+        stats.remove_assignments(assignments)
+
+        # anchored months after the history's last one, same averages
+        rebuilt = DecayedStats(
+            self.roster,
+            self.history,
+            half_life=6,
+            path=os.path.join(self.tmp, "rebuilt.json"),
+        )
+        assert stats.as_of > rebuilt.as_of
+        pd.testing.assert_frame_equal(rebuilt.actual_avg, stats.actual_avg)
+
+
+if __name__ == "__main__":
+    unittest.main()
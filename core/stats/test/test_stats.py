@@ -0,0 +1,67 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import pandas as pd
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from ..stats import AssignmentStats
+
+
+class AssignmentStatsTests(unittest.TestCase):
+
+    def test_rounds_counts_date_tasks_since_pref_update(self):
+        assignments = pd.DataFrame(
+            {
+                "date": pd.to_datetime(
+                    ["2024-09-01", "2024-10-06", "2024-10-13", "2024-10-13"]
+                ),
+                "task_key": ["usher", "usher", "usher", "lesson"],
+                "person": ["A", "B", "A", "B"],
+            }
+        )
+        start_dates = pd.DataFrame(
+            {
+                "usher": pd.to_datetime(["2024-10-01", None]),
+                "lesson": pd.to_datetime(["2024-01-01", "2024-10-13"]),
+            },
+            index=["A", "B"],
+        )
+
+        rounds = AssignmentStats.rounds(
+            assignments,
+            start_dates,
+            pd.Index(["A", "B"]),
+            pd.Index(["usher", "lesson"]),
+        )
+
+        assert rounds.at["A", "usher"] == 2
+        assert rounds.at["B", "usher"] == 0
+        assert rounds.at["A", "lesson"] == 1
+        assert rounds.at["B", "lesson"] == 1
+
+    def test_record_assignments_matches_rebuild(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            history_file = os.path.join(tmp, "history.json")
+            shutil.copy("data/previous-assignments.json", history_file)
+
+            roster = Roster()
+            history = AssignmentHistory(history_file)
+            stats = AssignmentStats(roster, history)
+
+            usher = roster.get_eligible("usher")[0]
+            lesson = roster.get_eligible("lesson")[0]
+            assignments = {"2025-5-4-usher": usher, "2025-5-4-lesson": lesson}
+
+            history.record_assignments(assignments)
+            stats.record_assignments(assignments)
+
+            pd.testing.assert_frame_equal(
+                stats.actual_avg, AssignmentStats(roster, history).actual_avg
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
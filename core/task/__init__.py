@@ -1,3 +1,4 @@
 from .tasks import Tasks, TaskMetadata
+from .date_task import DateTask
 
-__all__ = [Tasks, TaskMetadata]
+__all__ = [Tasks, TaskMetadata, DateTask]
@@ -0,0 +1,91 @@
+import re
+from datetime import date
+
+date_task_pattern = re.compile(
+    r"^(?P<year>[0-9]+)-(?P<month>[0-9]+)-(?:(?P<day>[0-9]+)-)?(?P<task_key>\w+)$"
+)
+
+
+class DateTask:
+    """
+    One occurrence of a task, e.g. the song_leader on 2024-10-13
+
+    DateTasks are interned, there is only ever one instance per
+    (year, month, day, task_key), so they can be compared and hashed cheaply
+    and used as dict keys throughout core. The `{year}-{month}-{day}-{task_key}`
+    string form (see __str__ and parse) is only used at the json/html boundaries
+
+    day is 0 for monthly duties written without a day, `{year}-{month}-{task_key}`
+    """
+
+    __slots__ = ("year", "month", "day", "task_key", "date", "_key", "_hash", "_str")
+
+    _interned = {}
+
+    def __new__(cls, year, month, day, task_key):
+        key = (year, month, day, task_key)
+        date_task = cls._interned.get(key)
+        if date_task is None:
+            date_task = super().__new__(cls)
+            date_task.year = year
+            date_task.month = month
+            date_task.day = day
+            date_task.task_key = task_key
+            date_task.date = date(year, month, day or 1)
+            date_task._key = key
+            date_task._hash = hash(key)
+            date_task._str = (
+                f"{year}-{month}-{day}-{task_key}"
+                if day
+                else f"{year}-{month}-{task_key}"
+            )
+            cls._interned[key] = date_task
+        return date_task
+
+    @classmethod
+    def parse(cls, date_task):
+        """DateTask for a `{year}-{month}-{day}-{task_key}` string, or a DateTask"""
+        if isinstance(date_task, DateTask):
+            return date_task
+
+        match = date_task_pattern.match(date_task)
+        if not match:
+            raise ValueError(
+                f"Expected a date_task in the form YYYY-mm-dd-<task_key>. Received {date_task}"
+            )
+
+        year, month, day, task_key = match.groups()
+        return cls(int(year), int(month), int(day or 0), task_key)
+
+    def __reduce__(self):
+        # unpickle (e.g. in a worker process) through the interning table
+        return (DateTask, self._key)
+
+    def __str__(self):
+        return self._str
+
+    def __repr__(self):
+        return f"DateTask({self._str!r})"
+
+    def __hash__(self):
+        return self._hash
+
+    def __eq__(self, other):
+        return self is other or (
+            isinstance(other, DateTask) and self._key == other._key
+        )
+
+    def __lt__(self, other):
+        return (self.date, self.task_key) < (other.date, other.task_key)
+
+
+def parse_keys(assignments):
+    """date_task -> person dict with DateTask keys, from json/html string keys"""
+    return {
+        DateTask.parse(date_task): person for date_task, person in assignments.items()
+    }
+
+
+def format_keys(assignments):
+    """date_task -> person dict with string keys, for json/html"""
+    return {str(date_task): person for date_task, person in assignments.items()}
@@ -1,25 +1,26 @@
 import calendar
-import pandas as pd
-
-from util.decorators import singleton
+from util.data import read_rows
+from util.decorators import reloaded_singleton
 
 calendar.setfirstweekday(calendar.SUNDAY)
 
 
-@singleton
+@reloaded_singleton("data/duty-codes.csv")
 class TaskMetadata:
     def __init__(self):
         # duty codes
         # TODO rename task codes
-        self.duty_codes = pd.read_csv("data/duty-codes.csv")
+        # task_key -> code, in the order of the csv
+        header, rows = read_rows("data/duty-codes.csv")
+        self.duty_codes = dict(zip(header, rows[0]))
 
-        # service_days
-        self.service_days = set(
-            self.duty_codes.select_dtypes(include="number").iloc[0, :].to_list()
-        )
+        # service_days, the numeric codes
+        self.service_days = {
+            int(code) for code in self.duty_codes.values() if code.isdigit()
+        }
 
     def get_duty_code(self, task_key):
-        return str(self.duty_codes.at[0, task_key])
+        return self.duty_codes[task_key]
 
 
 class Task:
@@ -33,7 +34,4 @@ class Tasks:
 
     def __new__(cls):
         metadata = TaskMetadata()
-        return [
-            Task(key, code)
-            for key, code in metadata.duty_codes.loc[0].to_dict().items()
-        ]
+        return [Task(key, code) for key, code in metadata.duty_codes.items()]
@@ -0,0 +1,40 @@
+import pickle
+import unittest
+
+from ..date_task import DateTask, format_keys, parse_keys
+
+
+class DateTaskTests(unittest.TestCase):
+
+    def test_parse_round_trip(self):
+        for date_task in ["2024-10-13-song_leader", "2024-11-lords_supper_prep"]:
+            assert str(DateTask.parse(date_task)) == date_task
+
+        date_task = DateTask.parse("2024-10-13-song_leader")
+        assert (date_task.year, date_task.month, date_task.day) == (2024, 10, 13)
+        assert date_task.task_key == "song_leader"
+
+    def test_interned(self):
+        date_task = DateTask(2024, 10, 13, "usher")
+
+        assert DateTask.parse("2024-10-13-usher") is date_task
+        assert pickle.loads(pickle.dumps(date_task)) is date_task
+
+    def test_sorts_by_date(self):
+        date_tasks = [
+            DateTask.parse(dt) for dt in ["2024-10-13-usher", "2024-9-29-usher"]
+        ]
+
+        assert [str(dt) for dt in sorted(date_tasks)] == [
+            "2024-9-29-usher",
+            "2024-10-13-usher",
+        ]
+
+    def test_keys(self):
+        assignments = {"2024-10-13-usher": "Addy, Levi"}
+
+        assert format_keys(parse_keys(assignments)) == assignments
+
+
+if __name__ == "__main__":
+    unittest.main()
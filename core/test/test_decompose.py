@@ -0,0 +1,74 @@
+import unittest
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from ..decompose import blocked_by, solve_decomposed, task_components
+from ..solver import SchedulingProblem
+from ..validation import ConstraintIndex
+
+
+class DecomposeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.roster = Roster()
+        self.history = AssignmentHistory("data/previous-assignments.json")
+
+    def test_components_split_at_exclusions(self):
+        components = task_components(self.roster)
+        assert sorted(sum(components, [])) == sorted(self.roster.task_keys)
+
+        # without exclusions every task is its own part
+        self.roster.excluded_tasks = set()
+        assert len(task_components(self.roster)) == len(self.roster.task_keys)
+
+    def test_blocked_by_other_tasks(self):
+        schedule = Schedule(2025, 5)
+        date_task = schedule.get_date_tasks("lesson")[0]
+        person = self.roster.get_eligible("lesson")[0]
+        blocked = blocked_by(
+            schedule, self.roster, ["song_leader"], {date_task: person}
+        )
+
+        assert self.roster.is_excluded("lesson", "song_leader")
+        same_week = [
+            dt
+            for dt in schedule.get_date_tasks("song_leader")
+            if schedule.week_of(dt) == schedule.week_of(date_task)
+        ]
+        assert blocked == {(dt, person) for dt in same_week}
+
+    def test_coordinated_parts_are_valid(self):
+        full = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        full.solve()
+
+        schedule = Schedule(2025, 5)
+        summary = solve_decomposed(
+            schedule, self.roster, self.history, coordinate=True, processes=1
+        )
+
+        assert len(summary["parts"]) > 1
+        assert set(schedule.assignments.keys()) == set(full.all_date_tasks)
+        index = ConstraintIndex(schedule, self.roster, self.history)
+        assert index.check(schedule.assignments) == {}
+        # never better than the single model
+        assert summary["objective"] <= full.prob.objective.value() + 1e-6
+
+    def test_parts_use_the_backend(self):
+        full = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        full.solve()
+
+        schedule = Schedule(2025, 5)
+        summary = solve_decomposed(
+            schedule, self.roster, self.history, processes=1, backend="scipy"
+        )
+
+        self.assertAlmostEqual(
+            summary["objective"], full.prob.objective.value(), places=6
+        )
+        index = ConstraintIndex(schedule, self.roster, self.history)
+        assert index.check(schedule.assignments) == {}
+
+
+if __name__ == "__main__":
+    unittest.main()
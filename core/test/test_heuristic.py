@@ -0,0 +1,39 @@
+import unittest
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from ..heuristic import HeuristicScheduler
+from ..solver import SchedulingProblem
+from ..validation import ConstraintIndex
+
+
+class HeuristicSchedulerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.roster = Roster()
+        self.history = AssignmentHistory("data/previous-assignments.json")
+
+    def test_schedule_keeps_the_rules(self):
+        for month in (5, 8):
+            schedule = Schedule(2025, month)
+            scheduler = HeuristicScheduler(schedule, self.roster, self.history)
+            assignments = scheduler.solve()
+
+            assert set(assignments.keys()) == set(scheduler.date_tasks)
+            index = ConstraintIndex(schedule, self.roster, self.history)
+            assert index.check(assignments) == {}, month
+
+    def test_warm_starts_the_model(self):
+        heuristic = HeuristicScheduler(Schedule(2025, 5), self.roster, self.history)
+        assignments = heuristic.solve()
+
+        problem = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        problem.solve(warm_start=assignments)
+
+        assert heuristic.objective_value <= problem.prob.objective.value() + 1e-6
+        self.assertAlmostEqual(problem.prob.objective.value(), 1.784646, places=5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from ..repair import repair
+from ..solver import SchedulingProblem
+from ..validation import ConstraintIndex
+
+
+class RepairTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.roster = Roster()
+        cls.history = AssignmentHistory("data/previous-assignments.json")
+
+        schedule = Schedule(2025, 5)
+        SchedulingProblem(schedule, cls.roster, cls.history).solve()
+        cls.assignments = dict(schedule.assignments)
+
+    def setUp(self):
+        self.schedule = Schedule(2025, 5)
+        self.schedule.set_assignments(self.assignments)
+        self.index = ConstraintIndex(self.schedule, self.roster, self.history)
+
+    def edit(self, task_key):
+        date_task = self.schedule.get_date_tasks(task_key)[1]
+        person = next(
+            p
+            for p in self.roster.get_eligible(task_key)
+            if p != self.assignments[date_task] and not self.index.check({date_task: p})
+        )
+        self.schedule.update_assignments({date_task: person})
+        return {date_task: person}
+
+    def test_edits_are_kept(self):
+        edits = self.edit("song_leader")
+
+        repair(self.schedule, self.roster, self.history, edits)
+
+        for date_task, person in edits.items():
+            assert self.schedule.assignments[date_task] == person
+        assert self.index.check(self.schedule.assignments) == {}
+
+    def test_scipy_backend_keeps_edits(self):
+        edits = self.edit("song_leader")
+
+        repair(self.schedule, self.roster, self.history, edits, backend="scipy")
+
+        for date_task, person in edits.items():
+            assert self.schedule.assignments[date_task] == person
+        assert self.index.check(self.schedule.assignments) == {}
+
+    def test_cells_outside_the_neighbourhood_are_kept(self):
+        edits = self.edit("song_leader")
+        edited_week = self.schedule.week_of(next(iter(edits)))
+
+        changes = repair(self.schedule, self.roster, self.history, edits, weeks=0)
+
+        assert all(self.schedule.week_of(dt) == edited_week for dt in changes)
+
+    def test_infeasible_edits_leave_the_schedule(self):
+        first, second = self.schedule.get_date_tasks("song_leader")[:2]
+        person = self.assignments[first]
+
+        # the same person in consecutive weeks
+        with self.assertRaises(ValueError):
+            repair(
+                self.schedule,
+                self.roster,
+                self.history,
+                {first: person, second: person},
+                weeks=0,
+            )
+        assert self.schedule.assignments == self.assignments
+
+
+if __name__ == "__main__":
+    unittest.main()
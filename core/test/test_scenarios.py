@@ -0,0 +1,33 @@
+import unittest
+
+from core.roster import Roster
+from ..scenarios import Scenario
+
+
+class ScenarioTests(unittest.TestCase):
+
+    def test_apply_overrides(self):
+        roster = Roster()
+        person = roster.people[0]
+        bias = {"lesson": {person: 1}}
+
+        scenario = Scenario.from_dict(
+            {
+                "name": "variant",
+                "unavailable": [person],
+                "exclude": [["usher", "lesson"]],
+                "allow": [["first_lesson", "first_song_leader"]],
+                "biases": {"lesson": {person: 0.5}},
+            }
+        )
+        scenario_bias = scenario.apply(roster, bias)
+
+        assert person not in roster.people
+        assert roster.is_excluded("lesson", "usher")
+        assert not roster.is_excluded("first_song_leader", "first_lesson")
+        assert scenario_bias["lesson"][person] == 0.5
+        assert bias["lesson"][person] == 1
+
+
+if __name__ == "__main__":
+    unittest.main()
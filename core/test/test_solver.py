@@ -0,0 +1,146 @@
+import unittest
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from ..solver import SchedulingProblem, get_solver
+from ..validation import ConstraintIndex
+
+
+class SchedulingProblemTests(unittest.TestCase):
+
+    def setUp(self):
+        self.roster = Roster()
+        self.history = AssignmentHistory("data/previous-assignments.json")
+
+    def test_sparse_vars_are_eligible(self):
+        problem = SchedulingProblem(Schedule(2025, 6), self.roster, self.history)
+        month_date_tasks = set(problem.all_date_tasks)
+
+        for date_task, person in problem.x.keys():
+            if date_task in month_date_tasks:
+                assert self.roster.is_eligible(person, date_task.task_key)
+
+    def test_sparse_matches_dense(self):
+        sparse = SchedulingProblem(Schedule(2025, 6), self.roster, self.history)
+        dense = SchedulingProblem(
+            Schedule(2025, 6), self.roster, self.history, sparse=False
+        )
+
+        assert len(sparse.x) < len(dense.x)
+
+        sparse.solve()
+        dense.solve()
+
+        self.assertAlmostEqual(
+            sparse.prob.objective.value(), dense.prob.objective.value(), places=6
+        )
+
+    def test_warm_start_reaches_same_objective(self):
+        problem = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        pattern = problem.previous_month_pattern()
+
+        assert set(pattern.keys()) <= set(problem.all_date_tasks)
+
+        problem.solve()
+        cold = problem.prob.objective.value()
+        saved = dict(problem.schedule.assignments)
+
+        warm = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        warm.solve(warm_start=saved)
+
+        self.assertAlmostEqual(warm.prob.objective.value(), cold, places=6)
+
+    def test_profile_counts_constraints(self):
+        problem = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        problem.solve()
+
+        phases = {entry["phase"]: entry for entry in problem.profiler.phases}
+
+        assert phases["variables"]["variables"] == len(problem.x)
+        assert sum(
+            entry.get("constraints", 0)
+            for name, entry in phases.items()
+            if name.startswith("constrain_")
+        ) == len(problem.prob.constraints)
+        assert phases["solve"]["status"] == "Optimal"
+        self.assertAlmostEqual(
+            phases["solve"]["objective"], problem.prob.objective.value()
+        )
+
+    def test_solver_options(self):
+        with self.assertRaises(ValueError):
+            get_solver("not_a_solver")
+
+        problem = SchedulingProblem(Schedule(2025, 5), self.roster, self.history)
+        problem.solve(solver="cbc", threads=1, time_limit=60, gap=0.01)
+
+        assert set(problem.schedule.assignments.keys()) == set(problem.all_date_tasks)
+        self.assertAlmostEqual(problem.prob.objective.value(), 1.784646, places=5)
+
+    def test_exclusions_follow_calendar_weeks(self):
+        # august 2025 starts on a friday, weeks are not aligned by index
+        schedule = Schedule(2025, 8)
+        problem = SchedulingProblem(schedule, self.roster, self.history)
+
+        week_index = problem.week_index()
+        for task_key, weeks in week_index.items():
+            for week, date_tasks in weeks.items():
+                assert all(schedule.week_of(dt) == week for dt in date_tasks)
+
+        pairs = problem.excluded_task_pairs()
+        assert len(pairs) == len(set(pairs))
+        assert all((task2, task1) not in pairs for task1, task2 in pairs)
+
+        problem.solve()
+        index = ConstraintIndex(schedule, self.roster, self.history)
+        assert index.check(schedule.assignments) == {}
+
+    def test_weekly_tasks_pair_with_the_services_of_their_week(self):
+        # january 2025 starts on a wednesday, the weekly date_task of the
+        # first week is dated to the 1st and that week has no sunday
+        problem = SchedulingProblem(Schedule(2025, 1), self.roster, self.history)
+        assert ("first_lesson", "sound_board_operator") in (
+            problem.excluded_task_pairs()
+        )
+
+        week_index = problem.week_index()
+        weekly = week_index["sound_board_operator"]
+        sunday = week_index["first_lesson"]
+
+        assert [date_task.day for date_task in weekly[0]] == [1]
+        assert 0 not in sunday
+        for week in sunday:
+            assert [date_task.day for date_task in weekly[week]] == [
+                date_task.day for date_task in sunday[week]
+            ]
+
+    def test_scipy_backend_matches_pulp(self):
+        pulp = SchedulingProblem(Schedule(2025, 8), self.roster, self.history)
+        schedule = Schedule(2025, 8)
+        scipy = SchedulingProblem(schedule, self.roster, self.history, backend="scipy")
+
+        assert scipy.prob.numVariables() == len(pulp.x)
+        assert scipy.prob.numConstraints() == pulp.prob.numConstraints()
+
+        pulp.solve()
+        scipy.solve()
+
+        phases = {entry["phase"]: entry for entry in scipy.profiler.phases}
+        assert phases["solve"]["status"] == "Optimal"
+        self.assertAlmostEqual(
+            scipy.prob.objective.value(), pulp.prob.objective.value(), places=6
+        )
+        # ties between equally good schedules may be broken differently
+        assert set(schedule.assignments.keys()) == set(scipy.all_date_tasks)
+        index = ConstraintIndex(schedule, self.roster, self.history)
+        assert index.check(schedule.assignments) == {}
+
+        with self.assertRaises(ValueError):
+            SchedulingProblem(
+                Schedule(2025, 8), self.roster, self.history, backend="numpy"
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from ..solver import SchedulingProblem
+from ..validation import ConstraintIndex
+
+
+class ConstraintIndexTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.roster = Roster()
+        cls.history = AssignmentHistory("data/previous-assignments.json")
+
+        schedule = Schedule(2025, 5)
+        SchedulingProblem(schedule, cls.roster, cls.history).solve()
+        cls.assignments = dict(schedule.assignments)
+
+    def setUp(self):
+        self.schedule = Schedule(2025, 5)
+        self.schedule.set_assignments(self.assignments)
+        self.index = ConstraintIndex(self.schedule, self.roster, self.history)
+
+    def test_solved_month_is_valid(self):
+        assert self.index.check(self.schedule.assignments) == {}
+
+    def test_consecutive_weeks(self):
+        first, second = self.schedule.get_date_tasks("song_leader")[:2]
+        person = self.schedule.assignments[first]
+
+        violations = self.index.check({second: person})
+
+        assert "consecutive" in self.rules(violations, second)
+
+    def test_swap_is_checked_as_a_whole(self):
+        first, second = self.schedule.get_date_tasks("song_leader")[:2]
+        swap = {
+            first: self.schedule.assignments[second],
+            second: self.schedule.assignments[first],
+        }
+
+        # each half alone repeats the person in consecutive weeks, the swap does not
+        assert "consecutive" in self.rules(
+            self.index.check({first: swap[first]}), first
+        )
+        assert "consecutive" not in self.rules(self.index.check(swap), first)
+        assert "consecutive" not in self.rules(self.index.check(swap), second)
+
+    def test_apply_tracks_changes(self):
+        first, second = self.schedule.get_date_tasks("song_leader")[:2]
+        person = self.schedule.assignments[first]
+        replacement = next(
+            p
+            for p in self.roster.get_eligible("song_leader")
+            if p != person and not self.index.check({first: p})
+        )
+
+        self.index.apply({first: replacement})
+
+        assert "consecutive" not in self.rules(
+            self.index.check({second: person}), second
+        )
+
+    @staticmethod
+    def rules(violations, date_task):
+        return [v["rule"] for v in violations.get(date_task, [])]
+
+
+if __name__ == "__main__":
+    unittest.main()
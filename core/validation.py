@@ -0,0 +1,172 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from core.history import AssignmentHistory
+from core.roster import Roster
+from core.schedule import Schedule
+from core.task.date_task import parse_keys
+
+
+class ConstraintIndex:
+    """
+    The solver's hard constraints over a schedule, indexed so a hand edit
+    can be checked without building the MIP
+
+    Keeps each person's date_tasks by calendar week, the eligible people for
+    each task, the exclusion adjacency of tasks and each date_task's previous
+    and next date_task of the same task (the last week of the previous month
+    comes from history, like constrain_month_boundary_assignments). Checking
+    a move only looks at the people and weeks it touches
+
+    apply() must be called with every change made to the schedule
+    """
+
+    def __init__(
+        self,
+        schedule: Schedule,
+        roster: Roster,
+        history: AssignmentHistory = None,
+    ):
+        self.schedule = schedule
+        self.roster = roster
+
+        self.people = set(roster.people)
+        self.eligible = {
+            task: set(roster.get_eligible(task)) for task in roster.task_keys
+        }
+        self.excluded = defaultdict(set)
+        for task1, task2 in roster.excluded_tasks:
+            self.excluded[task1].add(task2)
+
+        # the week before the month is only needed for the consecutive-week rule
+        first_of_month = date(schedule.year, schedule.month, 1)
+        lookback = (
+            history.assignments_between(
+                first_of_month - timedelta(days=7), first_of_month
+            )
+            if history is not None
+            else {}
+        )
+
+        self.week = {}
+        self.neighbours = {}
+        for task in roster.task_keys:
+            date_tasks = schedule.get_date_tasks(task)
+            for date_task in date_tasks:
+                self.week[date_task] = schedule.week_of(date_task)
+
+            previous = [dt for dt in lookback if dt.task_key == task]
+            ordered = sorted(previous)[-1:] + sorted(date_tasks)
+            for i, date_task in enumerate(ordered):
+                self.neighbours[date_task] = (
+                    ordered[i - 1] if i > 0 else None,
+                    ordered[i + 1] if i + 1 < len(ordered) else None,
+                )
+
+        self.assigned = dict(lookback)
+        # person -> week -> date_tasks
+        self.by_week = defaultdict(lambda: defaultdict(set))
+        self.apply(schedule.assignments or {})
+
+    def apply(self, changes):
+        """record changes (date_task -> person) made to the schedule"""
+        for date_task, person in parse_keys(changes).items():
+            week = self.week.get(date_task)
+            previous = self.assigned.get(date_task)
+            if previous is not None and week is not None:
+                self.by_week[previous][week].discard(date_task)
+
+            self.assigned[date_task] = person
+            if week is not None:
+                self.by_week[person][week].add(date_task)
+
+    def check(self, changes):
+        """
+        date_task -> violations for each change that breaks a rule, each
+        violation is a dict of the rule's name and a message. Changes are
+        checked together, e.g. both halves of a swap, against the schedule
+        as it would be after all of them. Empty when every change is allowed
+        """
+        try:
+            changes = parse_keys(changes)
+        except ValueError as e:
+            return {"": [violation("date_task", str(e))]}
+
+        violations = {}
+        for date_task, person in changes.items():
+            found = self.check_assignment(date_task, person, changes)
+            if found:
+                violations[date_task] = found
+        return violations
+
+    def check_assignment(self, date_task, person, changes):
+        task = date_task.task_key
+
+        if task not in self.eligible:
+            return [violation("unknown_task", f"unknown task {task}")]
+        if date_task not in self.week:
+            return [
+                violation(
+                    "not_scheduled",
+                    f"{date_task} is not in the "
+                    f"{self.schedule.month}/{self.schedule.year} schedule",
+                )
+            ]
+        if person not in self.people:
+            return [violation("not_on_roster", f"{person} is not on the roster")]
+        if person not in self.eligible[task]:
+            return [violation("ineligible", f"{person} is not eligible for {task}")]
+
+        found = []
+
+        # another excluded task that week, see constrain_do_not_assign_excluded_tasks
+        for other in self.assigned_in_week(person, self.week[date_task], changes):
+            if other != date_task and other.task_key in self.excluded[task]:
+                found.append(
+                    violation(
+                        "excluded",
+                        f"{person} is also assigned {other.task_key} on {other.date}",
+                    )
+                )
+
+        # the same task the week before or after, see
+        # constrain_month_boundary_assignments
+        if len(self.eligible[task]) >= 2:
+            for neighbour in self.neighbours[date_task]:
+                if neighbour is not None and (
+                    changes.get(neighbour, self.assigned.get(neighbour)) == person
+                ):
+                    found.append(
+                        violation(
+                            "consecutive",
+                            f"{person} is also assigned {task} on {neighbour.date}",
+                        )
+                    )
+
+        return found
+
+    def assigned_in_week(self, person, week, changes):
+        """the person's date_tasks in week once changes are applied"""
+        date_tasks = {
+            date_task
+            for date_task in self.by_week[person][week]
+            if changes.get(date_task, person) == person
+        }
+        date_tasks.update(
+            date_task
+            for date_task, assignee in changes.items()
+            if assignee == person and self.week.get(date_task) == week
+        )
+        return date_tasks
+
+
+def violation(rule, message):
+    return {"rule": rule, "message": message}
+
+
+def validate_assignments(changes, schedule: Schedule, roster: Roster, history=None):
+    """
+    ConstraintIndex.check for a one-off set of changes, see ConstraintIndex to
+    check many edits to the same schedule
+    """
+    return ConstraintIndex(schedule, roster, history).check(changes)
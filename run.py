@@ -5,15 +5,24 @@ import argparse
 from logging import info
 import os
 import json
+import tracemalloc
+from functools import partial
 from pathlib import Path
 from core.schedule import Schedule
-from core.solver import SchedulingProblem
 from core.roster import Roster
 from core.history import AssignmentHistory
-from core.stats import AssignmentStats
+from core.stats import AssignmentStats, DecayedStats
+from core.task.date_task import format_keys
 from util.helpers import *
+from util.profiling import Profiler
 
 import app
+from app.journal import AssignmentJournal
+from app.render import ScheduleRenderer
+
+# the solver (pulp), flask and the server are imported by the code paths that
+# use them, loading a saved month does not pay for them, see
+# benchmarks/bench_startup.py
 
 
 def parse_args():
@@ -30,13 +39,345 @@ def parse_args():
         "-s",
         "--save_file",
         default="data/previous-assignments.json",
-        help="optional alternative 'save' json file. If not specified previous-assignments.json will be used",
+        help="optional alternative 'save' json file or SQLite database (.db). If not specified previous-assignments.json will be used",
+    )
+    parser.add_argument(
+        "-n",
+        "--num_months",
+        type=int,
+        default=1,
+        help="schedule this many consecutive months, each month is committed to the save file before solving the next (no web app is started)",
+    )
+    parser.add_argument(
+        "-r",
+        "--resolve",
+        action="store_true",
+        help="solve again even if a schedule was previously saved for this month",
+    )
+    parser.add_argument(
+        "-w",
+        "--warm_start",
+        choices=["saved", "previous", "heuristic"],
+        help="seed the solver with the saved schedule for this month ('saved', implies --resolve), last month's assignments ('previous') or a heuristic schedule ('heuristic')",
+    )
+    parser.add_argument(
+        "--stats",
+        choices=["full", "decayed"],
+        default="full",
+        help="fairness averages over the whole history ('full', default) or with older assignments counting less, from counters kept next to the save file ('decayed', see core/stats/decayed.py)",
+    )
+    parser.add_argument(
+        "--half_life",
+        type=float,
+        default=12,
+        help="with --stats decayed, months until an assignment counts half as much (default 12)",
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["mip", "heuristic"],
+        default="mip",
+        help="solve the model ('mip', default) or build a schedule in milliseconds with a greedy and local search that keeps the same rules but may be less fair ('heuristic', see core/heuristic.py)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="serve every month's schedule at /schedules/<year>/<month>/ from one process, months that are not saved yet are solved in the background",
+    )
+    parser.add_argument(
+        "--repair",
+        action="store_true",
+        help="keep the cells edited in the web app since the saved schedule was solved and solve the rest again",
+    )
+    parser.add_argument(
+        "--repair_weeks",
+        type=int,
+        help="with --repair, only solve again the cells within this many weeks of an edit",
+    )
+    parser.add_argument(
+        "--solver",
+        help="MIP solver, one of cbc, highs, highs_cmd, glpk, scip, gurobi, cplex (see core.solver.SOLVERS) or any PuLP solver name that is installed (default cbc)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["pulp", "scipy"],
+        default="pulp",
+        help="build the model with PuLP for --solver, or as sparse arrays solved in process by scipy's HiGHS milp (default pulp)",
+    )
+    parser.add_argument(
+        "--decompose",
+        choices=["components", "coordinate"],
+        help="solve groups of tasks that share no exclusions as separate models in parallel, 'coordinate' also splits them by duty code and solves those in rounds (see core/decompose.py)",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="with --decompose, the number of worker processes (default one per part)",
     )
     parser.add_argument(
-        "-v", "--verbose", action="store_true", help="turn on additional logging"
+        "--threads", type=int, help="number of threads the solver may use"
     )
+    parser.add_argument(
+        "--time_limit",
+        type=float,
+        help="stop the solver after this many seconds and use the best schedule found",
+    )
+    parser.add_argument(
+        "--gap",
+        type=float,
+        help="stop once the schedule is within this relative gap of optimal, e.g. 0.01",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="turn on additional logging, including a per-phase timing and memory profile",
+    )
+
+    args = parser.parse_args()
+
+    if args.decompose:
+        if args.engine == "heuristic":
+            parser.error(
+                "--decompose solves its parts with the MIP solver, not --engine heuristic"
+            )
+        if args.warm_start:
+            parser.error("--decompose does not warm start its parts, drop --warm_start")
+        if args.num_months > 1 or args.serve:
+            parser.error(
+                "--decompose only applies to a single month, not --num_months or --serve"
+            )
+
+    if args.engine == "heuristic":
+        ignored = [
+            flag
+            for flag, value in (
+                ("--backend", args.backend != "pulp"),
+                ("--solver", args.solver),
+                ("--threads", args.threads),
+                ("--time_limit", args.time_limit is not None),
+                ("--gap", args.gap is not None),
+                ("--warm_start", args.warm_start),
+            )
+            if value
+        ]
+        if ignored:
+            parser.error(
+                f"--engine heuristic does not use a MIP solver, drop {', '.join(ignored)}"
+            )
+        if args.num_months > 1 or args.serve:
+            parser.error(
+                "--engine heuristic only applies to a single month, not --num_months or --serve"
+            )
+
+    if args.backend == "scipy" and args.warm_start:
+        parser.error(
+            "--backend scipy takes no starting solution, drop --warm_start (use -r to solve a saved month again)"
+        )
+
+    return args
+
 
-    return parser.parse_args()
+def solver_options(args):
+    return {
+        "solver": args.solver or "cbc",
+        "threads": args.threads,
+        "time_limit": args.time_limit,
+        "gap": args.gap,
+    }
+
+
+def create_stats(args, roster, history):
+    if args.stats == "decayed":
+        return DecayedStats(roster, history, half_life=args.half_life)
+    return AssignmentStats(roster, history)
+
+
+def report_solve_time(solve_time_path, solve_time, warm_start):
+    """
+    Keep the last cold solve time for this month so warm started re-solves can
+    report how much time they saved
+    """
+    cold_solve_time = None
+    if os.path.exists(solve_time_path):
+        with open(solve_time_path, "r") as f:
+            cold_solve_time = json.loads(f.read()).get("cold_solve_seconds")
+
+    if warm_start and cold_solve_time is not None:
+        print(
+            f"warm start solve: {solve_time:.2f}s, cold solve: {cold_solve_time:.2f}s, "
+            f"saved {cold_solve_time - solve_time:.2f}s"
+        )
+    else:
+        print(f"{'warm start' if warm_start else 'cold'} solve: {solve_time:.2f}s")
+
+    if not warm_start:
+        cold_solve_time = solve_time
+
+    write_dict_to_file(
+        {
+            "cold_solve_seconds": cold_solve_time,
+            "last_solve_seconds": solve_time,
+            "warm_start": bool(warm_start),
+        },
+        solve_time_path,
+    )
+
+
+def repair_saved_schedule(
+    args, schedule, roster, history, stats, journal_path, profiler
+):
+    """re-solve the saved schedule around its hand edits, see core/repair.py"""
+    from core.repair import repair
+
+    journal = AssignmentJournal(journal_path)
+    schedule.update_assignments(journal.replay())
+    edits = journal.edits()
+
+    try:
+        with profiler.phase("repair") as phase:
+            changes = repair(
+                schedule,
+                roster,
+                history,
+                edits,
+                weeks=args.repair_weeks,
+                stats=stats,
+                profiler=profiler,
+                backend=args.backend,
+                verbose=args.verbose,
+                **solver_options(args),
+            )
+            phase["edits"] = len(edits)
+            phase["changes"] = len(changes)
+    except ValueError as e:
+        print(f"repair failed, keeping the saved schedule: {e}")
+        return
+
+    journal.compact()
+    print(
+        f"repaired around {len(edits)} edits in {phase['seconds']:.2f}s, "
+        f"{len(changes)} assignments changed"
+    )
+
+
+def solve_decomposed_schedule(args, schedule, roster, history, stats, profiler):
+    """solve the month as separate parts, see core/decompose.py"""
+    from core.decompose import solve_decomposed
+
+    with profiler.phase("decompose") as phase:
+        summary = solve_decomposed(
+            schedule,
+            roster,
+            history,
+            stats=stats,
+            coordinate=args.decompose == "coordinate",
+            processes=args.processes,
+            backend=args.backend,
+            verbose=args.verbose,
+            **solver_options(args),
+        )
+        phase["parts"] = len(summary["parts"])
+        phase["rounds"] = summary["rounds"]
+        phase["objective"] = summary["objective"]
+
+    print(
+        f"solved {len(summary['parts'])} parts in {summary['rounds']} rounds, "
+        f"{summary['seconds']:.2f}s, objective {summary['objective']:.6f}"
+    )
+    return summary
+
+
+def solve_heuristic_schedule(args, schedule, roster, history, stats, profiler):
+    """schedule the month without a MIP solver, see core/heuristic.py"""
+    from core.heuristic import HeuristicScheduler
+
+    with profiler.phase("heuristic") as phase:
+        scheduler = HeuristicScheduler(schedule, roster, history, stats=stats)
+        scheduler.solve()
+        phase["objective"] = scheduler.objective_value
+
+    print(
+        f"heuristic schedule in {scheduler.solve_time * 1000:.1f}ms, "
+        f"objective {scheduler.objective_value:.6f}"
+    )
+
+
+def run_batch(args, roster, history, output_file_stem, html_dir, json_dir):
+    """
+    Schedule args.num_months months starting at args.month/args.year, see
+    core/batch.py. Each month is written to <stem>-<month>-<year>.json/.html
+    where a trailing -<month>-<year> on the dest_file stem is replaced
+    """
+    from core.batch import rolling_horizon
+
+    stem_prefix = output_file_stem.removesuffix(f"-{args.month}-{args.year}")
+
+    def json_output_path(year, month):
+        return f"{json_dir}/{stem_prefix}-{month}-{year}.json"
+
+    def saved_assignments(year, month):
+        if args.resolve or not os.path.exists(json_output_path(year, month)):
+            return None
+
+        print(f"Found previous schedule in {json_output_path(year, month)}")
+        with open(json_output_path(year, month), "r") as f:
+            return json.loads(f.read())
+
+    stats = create_stats(args, roster, history)
+
+    for schedule in rolling_horizon(
+        args.year,
+        args.month,
+        args.num_months,
+        roster,
+        history,
+        stats=stats,
+        saved_assignments=saved_assignments,
+        verbose=args.verbose,
+        solver_options=solver_options(args),
+        backend=args.backend,
+    ):
+        json_path = json_output_path(schedule.year, schedule.month)
+        html_path = f"{html_dir}/{Path(json_path).stem}.html"
+
+        write_dict_to_file(format_keys(schedule.assignments), json_path)
+
+        renderer = ScheduleRenderer(schedule, roster, stats)
+        write_string_to_file(
+            renderer.render_schedule_to_html(interactive=False), html_path
+        )
+
+        print(f"{schedule.month}/{schedule.year}")
+        print("html: " + term_link(f"file://{html_path}"))
+        print("json: " + term_link(f"file://{json_path}"))
+
+
+def run_server(args, output_dir, output_file_stem):
+    """
+    serve every month from one process, see app/server.py. Months are named
+    like run.py -n, args.month/args.year is solved first if it is not saved
+    """
+    from app.server import ScheduleServer
+    from werkzeug.serving import run_simple
+
+    server = ScheduleServer(
+        args.save_file,
+        output_dir,
+        output_file_stem.removesuffix(f"-{args.month}-{args.year}"),
+        solver_options=solver_options(args),
+        backend=args.backend,
+        create_stats=partial(create_stats, args),
+    )
+
+    if (args.year, args.month) not in server.saved_months() or args.resolve:
+        job = server.submit(args.year, args.month)
+        print(f"solving {args.month}/{args.year} in the background, job {job['id']}")
+
+    print(
+        "schedule: "
+        + term_link(f"http://127.0.0.1:5000/schedules/{args.year}/{args.month}/")
+    )
+    run_simple("127.0.0.1", 5000, server, threaded=True)
 
 
 def main():
@@ -57,33 +398,97 @@ def main():
     json_filename = f"{output_file_stem}.json"
     html_output_path = f"{html_dir}/{html_filename}"
     json_output_path = f"{json_dir}/{json_filename}"
+    solve_time_path = f"{json_dir}/{output_file_stem}.solve.json"
+    profile_path = f"{json_dir}/{output_file_stem}.profile.json"
+    journal_path = f"{json_dir}/{output_file_stem}.journal.jsonl"
     tmp_working_path = f"/tmp/{json_filename}"
 
     os.makedirs(html_dir, exist_ok=True)
     os.makedirs(json_dir, exist_ok=True)
 
-    history = AssignmentHistory(args.save_file)
-    roster = Roster()
-    stats = AssignmentStats(roster, history)
-    schedule = Schedule(year, month)
+    if args.verbose:
+        tracemalloc.start()
+    profiler = Profiler()
+
+    if args.serve:
+        return run_server(args, output_dir, output_file_stem)
+
+    with profiler.phase("load_history"):
+        history = AssignmentHistory(args.save_file)
+    with profiler.phase("load_roster"):
+        roster = Roster()
+
+    if args.num_months > 1:
+        return run_batch(args, roster, history, output_file_stem, html_dir, json_dir)
 
-    if os.path.exists(json_output_path):
+    with profiler.phase("stats"):
+        stats = create_stats(args, roster, history)
+    with profiler.phase("load_schedule"):
+        schedule = Schedule(year, month)
+
+    resolve = args.resolve or args.warm_start == "saved"
+
+    if os.path.exists(json_output_path) and not resolve:
         with open(json_output_path, "r") as f:
             print(f"\n\nFound previous schedule in {json_output_path}\n\n")
             assignments = json.loads(f.read())
             schedule.set_assignments(assignments)
+
+        if args.repair:
+            repair_saved_schedule(
+                args, schedule, roster, history, stats, journal_path, profiler
+            )
+            write_dict_to_file(format_keys(schedule.assignments), json_output_path)
     else:
         print("Solving new Schedule...")
-        schedule_problem = SchedulingProblem(schedule, roster, history)
-        solver_result, solver_assignments, roster = schedule_problem.solve(
-            verbose=args.verbose
-        )
-        write_dict_to_file(schedule.assignments, json_output_path)
+        if args.decompose:
+            solve_decomposed_schedule(args, schedule, roster, history, stats, profiler)
+        elif args.engine == "heuristic":
+            solve_heuristic_schedule(args, schedule, roster, history, stats, profiler)
+        else:
+            from core.solver import SchedulingProblem
+
+            with profiler.phase("model_build"):
+                schedule_problem = SchedulingProblem(
+                    schedule,
+                    roster,
+                    history,
+                    stats=stats,
+                    profiler=profiler,
+                    backend=args.backend,
+                )
+
+            warm_start = None
+            if args.warm_start == "saved" and os.path.exists(json_output_path):
+                with open(json_output_path, "r") as f:
+                    warm_start = json.loads(f.read())
+            elif args.warm_start == "heuristic":
+                from core.heuristic import HeuristicScheduler
+
+                warm_start = HeuristicScheduler(
+                    Schedule(year, month), roster, history, stats=stats
+                ).solve()
+            elif args.warm_start:
+                warm_start = schedule_problem.previous_month_pattern()
+
+            solver_result, solver_assignments, roster = schedule_problem.solve(
+                verbose=args.verbose, warm_start=warm_start, **solver_options(args)
+            )
+            report_solve_time(solve_time_path, schedule_problem.solve_time, warm_start)
+        write_dict_to_file(format_keys(schedule.assignments), json_output_path)
+        # edits to the schedule that was replaced
+        AssignmentJournal(journal_path).clear()
+
+        profiler.write(profile_path)
+        if args.verbose:
+            profiler.print()
+            print("profile: " + term_link(f"file://{profile_path}"))
 
     options = {
         "HTML_OUTPUT_PATH": html_output_path,
         "PDF_OUTPUT_PATH": pdf_output_file,
         "JSON_OUTPUT_PATH": json_output_path,
+        "JOURNAL_PATH": journal_path,
         "TMP_WORKING_PATH": tmp_working_path,
     }
 
@@ -0,0 +1,79 @@
+#!/opt/anaconda3/envs/roster/bin/python3
+# coding: utf-8
+
+import argparse
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from core.scenarios import Scenario, run_scenarios
+from core.task.date_task import format_keys
+from util.helpers import *
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Solve and compare variants of a month's schedule in parallel"
+    )
+    parser.add_argument("month", type=int, help="the month (1-12)")
+    parser.add_argument("year", type=int, help="the year (e.g. 2025)")
+    parser.add_argument(
+        "scenarios_file",
+        help="""json list of scenarios, e.g. [{"name": "baseline"}, {"name": "levi away",
+        "unavailable": ["Addy, Levi"]}, {"name": "no usher exclusion", "allow": [["usher",
+        "lesson"]]}, {"name": "less lessons", "biases": {"lesson": {"Addy, Levi": 1.5}}}],
+        see core/scenarios.py""",
+    )
+    parser.add_argument(
+        "-s",
+        "--save_file",
+        default="data/previous-assignments.json",
+        help="optional alternative 'save' json file or SQLite database (.db). If not specified previous-assignments.json will be used",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="number of scenarios to solve at once, defaults to the number of CPUs",
+    )
+    parser.add_argument(
+        "-o",
+        "--output_dir",
+        help="optional directory to write each scenario's assignments json and the comparison csv",
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    with open(args.scenarios_file, "r") as f:
+        scenarios = [Scenario.from_dict(d) for d in json.loads(f.read())]
+
+    comparison, assignments = run_scenarios(
+        args.year, args.month, scenarios, args.save_file, max_workers=args.jobs
+    )
+
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(comparison)
+
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        stem = Path(args.scenarios_file).stem
+
+        comparison.to_csv(f"{args.output_dir}/{stem}.csv")
+        for name, scenario_assignments in assignments.items():
+            write_dict_to_file(
+                format_keys(scenario_assignments),
+                f"{args.output_dir}/{stem}-{name}.json",
+            )
+
+        print("csv: " + term_link(f"file://{args.output_dir}/{stem}.csv"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/opt/anaconda3/envs/roster/bin/python3
+"""
+Import a json assignment history (e.g. data/previous-assignments.json) into a
+SQLite history database that can be passed to run.py --save_file
+
+    scripts/migrate_history.py data/previous-assignments.json data/previous-assignments.db
+"""
+
+import json
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from core.history.backends import SQLITE_SUFFIXES, SqliteHistoryBackend
+
+
+def run():
+    if len(sys.argv) != 3:
+        raise RuntimeError("Expected path to json history and path to SQLite database")
+
+    json_path, db_path = sys.argv[1], sys.argv[2]
+
+    if not os.path.isfile(json_path):
+        raise RuntimeError(f"Invalid path: {json_path}")
+
+    if os.path.splitext(db_path)[1] not in SQLITE_SUFFIXES:
+        raise RuntimeError(f"Expected one of {', '.join(SQLITE_SUFFIXES)}: {db_path}")
+
+    with open(json_path, "r") as f:
+        assignments = json.load(f)
+
+    backend = SqliteHistoryBackend(db_path)
+    backend.append(assignments)
+
+    (count,) = backend.connection.execute("SELECT COUNT(*) FROM assignments").fetchone()
+    print(f"imported {len(assignments)} assignments, {db_path} has {count}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,100 @@
+import csv
+import glob
+import os
+
+DATA_FILES = "data/*.csv"
+
+# (path, read_csv arguments) -> (file version, frame)
+_frames = {}
+# path -> (file version, (header, rows))
+_rows = {}
+# (name, paths) -> (file versions, value)
+_derived = {}
+
+
+def file_version(path):
+    """(mtime, size) of path, None when it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def files_version(paths):
+    return tuple(file_version(path) for path in paths)
+
+
+def data_version(pattern=DATA_FILES):
+    """versions of every data csv, changes when one is edited, added or removed"""
+    return tuple((path, file_version(path)) for path in sorted(glob.glob(pattern)))
+
+
+def read_csv(path, **kwargs):
+    """
+    pd.read_csv(path, **kwargs), parsed again only when the file changes
+
+    The frame is shared by every caller, copy it before changing it in place
+    """
+    # imported on first use, the core classes read their csvs with read_rows
+    import pandas as pd
+
+    key = (os.path.abspath(path), tuple(sorted(kwargs.items())))
+    version = file_version(path)
+    cached = _frames.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, pd.read_csv(path, **kwargs))
+        _frames[key] = cached
+    return cached[1]
+
+
+def read_rows(path):
+    """
+    (header, rows) of a csv parsed with the csv module, every value a string
+    and "" when empty, parsed again only when the file changes. Shared like
+    read_csv
+    """
+    key = os.path.abspath(path)
+    version = file_version(path)
+    cached = _rows.get(key)
+    if cached is None or cached[0] != version:
+        with open(path, newline="") as f:
+            header, *rows = list(csv.reader(f))
+        cached = (version, (header, rows))
+        _rows[key] = cached
+    return cached[1]
+
+
+def read_matrix(path):
+    """
+    {row label: {column: value}} of a csv whose first column labels its rows,
+    like pd.read_csv(path, index_col=0) with "" for missing values
+    """
+
+    def build():
+        header, rows = read_rows(path)
+        return {row[0]: dict(zip(header[1:], row[1:])) for row in rows}
+
+    return derived("matrix", [path], build)
+
+
+def is_one(value):
+    """a csv cell marked 1 (or 1.0), as eligibility and exclusion matrices are"""
+    try:
+        return float(value) == 1
+    except ValueError:
+        return False
+
+
+def derived(name, paths, build):
+    """
+    build() once per change of any of paths, for structures derived from the
+    data files (eligibility lists, exclusion pairs). Shared like read_csv
+    """
+    key = (name, tuple(os.path.abspath(path) for path in paths))
+    version = files_version(paths)
+    cached = _derived.get(key)
+    if cached is None or cached[0] != version:
+        cached = (version, build())
+        _derived[key] = cached
+    return cached[1]
@@ -7,3 +7,24 @@ def singleton(cls):
         return instances[cls]
 
     return get_instance
+
+
+def reloaded_singleton(*paths):
+    """
+    singleton that is created again once any of the files it reads changes,
+    so a long running process picks up edits to data/ (see util/data.py)
+    """
+    from util.data import files_version
+
+    def decorate(cls):
+        instances = {}
+
+        def get_instance(*args, **kwargs):
+            version = files_version(paths)
+            if cls not in instances or instances[cls][0] != version:
+                instances[cls] = (version, cls(*args, **kwargs))
+            return instances[cls][1]
+
+        return get_instance
+
+    return decorate
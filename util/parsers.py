@@ -1,10 +1,11 @@
 #!/usr/bin/env python
 # coding: utf-8
 
-from pyquery import PyQuery as pq
-
 
 def assignments_from_html(html):
+    # pyquery is only needed by the legacy POST /save
+    from pyquery import PyQuery as pq
+
     doc = pq(html)
     cells = doc("td.duty-cell")
     assignments = {}
@@ -21,6 +22,8 @@ def assignments_from_html(html):
 
 
 def assignments_from_html_file(html_filename):
+    from pyquery import PyQuery as pq
+
     print("file://" + html_filename)
     doc = pq(filename=html_filename)
     cells = doc("td.duty-cell")
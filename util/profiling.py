@@ -0,0 +1,79 @@
+import json
+import resource
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from time import perf_counter
+
+
+def max_rss_mb():
+    """peak resident set size of this process so far"""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on linux
+    return round(max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+
+class Profiler:
+    """
+    Wall time and memory per phase of the solver pipeline
+
+    Phases nest, each records its depth and is listed in the order it started.
+    Callers may add details (e.g. constraint counts) to the dict yielded by
+    phase(). Python allocation peaks are recorded when tracemalloc is tracing,
+    see run.py --verbose
+    """
+
+    def __init__(self):
+        self.phases = []
+        self.depth = 0
+        # highest traced peak seen so far by each open phase
+        self.peaks = []
+
+    @contextmanager
+    def phase(self, name):
+        entry = {"phase": name, "depth": self.depth}
+        self.phases.append(entry)
+        self.depth += 1
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            allocated_before, peak = tracemalloc.get_traced_memory()
+            # keep the enclosing phase's peak before resetting it for this one
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            self.peaks.append(0)
+            tracemalloc.reset_peak()
+
+        start = perf_counter()
+        try:
+            yield entry
+        finally:
+            entry["seconds"] = round(perf_counter() - start, 6)
+            entry["max_rss_mb"] = max_rss_mb()
+            if tracing:
+                allocated, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, self.peaks.pop())
+                if self.peaks:
+                    self.peaks[-1] = max(self.peaks[-1], peak)
+                entry["allocated_mb"] = round((allocated - allocated_before) / 2**20, 2)
+                entry["peak_mb"] = round(peak / 2**20, 2)
+            self.depth -= 1
+
+    def to_dict(self):
+        return {"phases": self.phases}
+
+    def write(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=4, default=str)
+
+    def print(self):
+        for entry in self.phases:
+            details = ", ".join(
+                f"{key}={value}"
+                for key, value in entry.items()
+                if key not in ("phase", "depth", "seconds")
+            )
+            print(
+                f"{'  ' * entry['depth']}{entry['phase']:<{48 - 2 * entry['depth']}}"
+                f"{entry.get('seconds', 0):>9.3f}s  {details}"
+            )